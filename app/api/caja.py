@@ -6,10 +6,12 @@ from datetime import datetime
 from app.db.session import get_session
 from app.models.cajaModel import Caja
 from app.models.ventaModel import Venta
-from app.models.pagosModel import (Pago,
-                                   MetodosPago)
+from app.models.pagosModel import Pago
 
 from app.models.empleadoModel import Empleados
+from app.models.resumenVentaModel import ResumenVentaDia
+from app.api.refactors.resumenRefactor import METPAGO_VENTAS
+from app.api.refactors.dimensionesCache import obtener_dimensiones
 
 
 from app.schemas.cajaSchema import (AperturaCajaRequest,
@@ -20,7 +22,7 @@ from app.schemas.cajaSchema import (AperturaCajaRequest,
 router = APIRouter()
 
 @router.post("/abrir")
-async def abrir_caja(
+def abrir_caja(
     apertura: AperturaCajaRequest,
     session: Session = Depends(get_session)
 ):
@@ -40,7 +42,7 @@ async def abrir_caja(
 
 
 @router.patch("/cerrar/{id_caja}")
-async def cerrar_caja(
+def cerrar_caja(
     id_caja: int,
     cierre: CierreCajaRequest,
     session: Session = Depends(get_session)
@@ -61,7 +63,7 @@ async def cerrar_caja(
 
 
 @router.get("/detalles/{id_caja}", response_model=CajaDetalleResponse)
-async def obtener_detalle_caja(id_caja: int, session: Session = Depends(get_session)):
+def obtener_detalle_caja(id_caja: int, session: Session = Depends(get_session)):
 
     caja = session.exec(
         select(Caja).where(Caja.id_caja == id_caja)
@@ -81,29 +83,27 @@ async def obtener_detalle_caja(id_caja: int, session: Session = Depends(get_sess
     else:
         usuario_apertura = empleado
 
-    # 3. Calcular totales desde Ventas
-    ventas_totales = session.exec(
+    # 3. Calcular totales desde el acumulado diario (ventas y pagos por método)
+    totales = session.exec(
         select(
-            func.count(Venta.id_venta).label('numero_ventas'),
-            func.sum(Venta.total).label('total_ventas')
+            ResumenVentaDia.id_metpago,
+            func.sum(ResumenVentaDia.num).label('num'),
+            func.sum(ResumenVentaDia.monto).label('monto_total')
         )
-        .where(Venta.id_caja == id_caja)
-    ).first()
-
-    numero_ventas = ventas_totales.numero_ventas or 0
-    total_ventas_raw = ventas_totales.total_ventas
-    total_ventas = float(total_ventas_raw) if isinstance(total_ventas_raw, Decimal) else (total_ventas_raw or 0.0)
-
-    totales_pago = session.exec(
-        select(
-            Pago.id_metpago,
-            func.sum(Pago.monto).label('monto_total')
-        )
-        .join(Venta, Pago.id_venta == Venta.id_venta) # Join para filtrar por caja
-        .where(Venta.id_caja == id_caja)
-        .group_by(Pago.id_metpago)
+        .where(ResumenVentaDia.id_caja == id_caja)
+        .group_by(ResumenVentaDia.id_metpago)
     ).all()
 
+    numero_ventas = 0
+    total_ventas = 0.0
+    totales_pago = []
+    for row in totales:
+        if row.id_metpago == METPAGO_VENTAS:
+            numero_ventas = int(row.num or 0)
+            total_ventas = float(row.monto_total) if isinstance(row.monto_total, Decimal) else (row.monto_total or 0.0)
+        else:
+            totales_pago.append(row)
+
     total_efectivo = 0.0
     total_tarjeta = 0.0
     total_transferencia = 0.0
@@ -139,28 +139,35 @@ async def obtener_detalle_caja(id_caja: int, session: Session = Depends(get_sess
 
 
 @router.get("/ventas/{id_caja}")
-async def obtener_ventas_caja(id_caja: int, session: Session = Depends(get_session)):
+def obtener_ventas_caja(id_caja: int, session: Session = Depends(get_session)):
     result = session.exec(
         select(
             Pago.id_venta,
-            MetodosPago.metodo.label("Metodo"),
+            Pago.id_metpago,
             Pago.monto,
             Pago.referencia
         )
         .join(Venta, Pago.id_venta == Venta.id_venta)
-        .join(MetodosPago, Pago.id_metpago == MetodosPago.id_metpago)
         .where(Venta.id_caja == id_caja)
         .order_by(Pago.id_venta)
     )
     rows = result.all()
+    # Nombre del método desde la caché de dimensiones, sin join
+    dimensiones = obtener_dimensiones(session)
 
     ventas = []
     for r in rows:
-        d = dict(r._mapping)
-        monto = d.get("monto")
-        if isinstance(monto, Decimal):
-            d["monto"] = float(monto)
-        ventas.append(d)
+        metodo = dimensiones.metodo_pago(r.id_metpago)
+        # Igual que el join anterior: pagos con un método inexistente no se listan
+        if metodo is None:
+            continue
+        monto = r.monto
+        ventas.append({
+            "id_venta": r.id_venta,
+            "Metodo": metodo,
+            "monto": float(monto) if isinstance(monto, Decimal) else monto,
+            "referencia": r.referencia
+        })
 
     return ventas
 
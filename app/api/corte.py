@@ -1,17 +1,19 @@
 from collections import defaultdict
 
 from app.models.empleadoModel import Empleados
-from app.models.sucursalModel import Sucursal
 from app.models.cajaModel import Caja
 
 from fastapi import APIRouter, Depends, Query
 from sqlmodel import Session, select, func
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from app.db.session import get_session
 from app.models.ventaModel import Venta
-from app.models.pagosModel import Pago, MetodosPago
+from app.models.pagosModel import Pago
+from app.models.resumenVentaModel import ResumenVentaDia
+from app.api.refactors.resumenRefactor import METPAGO_VENTAS
+from app.api.refactors.dimensionesCache import obtener_dimensiones
 from app.core.permissions import require_any_permission
 
 from app.schemas.corteSchema import (ResumenDia,
@@ -26,7 +28,7 @@ router = APIRouter()
 
 
 @router.get("/resumen-mes", response_model=List[ResumenDia])
-async def get_resumen_mes(
+def get_resumen_mes(
     mes: Optional[int] = Query(None),
     anio: Optional[int] = Query(None),
     id_suc: Optional[int] = Query(None),
@@ -40,39 +42,45 @@ async def get_resumen_mes(
     if anio is None:
         anio = hoy.year
     
-    # Obtener todas las ventas del mes especificado
-    statement = select(Venta, Pago, MetodosPago).outerjoin(
-        Pago, Venta.id_venta == Pago.id_venta
-    ).outerjoin(
-        MetodosPago, Pago.id_metpago == MetodosPago.id_metpago
+    # Rango semiabierto [inicio, fin) sobre el acumulado diario (ResumenVentaDia)
+    inicio = date(anio, mes, 1)
+    fin = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+
+    statement = select(
+        ResumenVentaDia.fecha,
+        ResumenVentaDia.id_metpago,
+        func.sum(ResumenVentaDia.num).label("num"),
+        func.sum(ResumenVentaDia.monto).label("monto")
     ).where(
-        func.year(Venta.fecha_hora) == anio,
-        func.month(Venta.fecha_hora) == mes
-    )
+        ResumenVentaDia.fecha >= inicio,
+        ResumenVentaDia.fecha < fin
+    ).group_by(ResumenVentaDia.fecha, ResumenVentaDia.id_metpago)
     
     if id_suc is not None:
-        statement = statement.where(Venta.id_suc == id_suc)
+        statement = statement.where(ResumenVentaDia.id_suc == id_suc)
     
     results = session.exec(statement).all()
+    # Nombre del método desde la caché de dimensiones, sin join
+    dimensiones = obtener_dimensiones(session)
     
-    # Crear un diccionario para agrupar por día
+    # Crear un diccionario para agrupar por día; solo cuentan los días que tienen ventas
     dias_data = {}
     
-    for venta, pago, metodo in results:
-        dia = venta.fecha_hora.day
-        
-        if dia not in dias_data:
-            dias_data[dia] = {
+    for fecha, id_metpago, num, monto in results:
+        if id_metpago == METPAGO_VENTAS and num > 0:
+            dias_data[fecha.day] = {
                 "efectivo": Decimal("0"),
                 "tarjeta": Decimal("0"),
                 "transferencia": Decimal("0")
             }
-        
-        # Si hay pago asociado, sumar el monto al método correspondiente
-        if pago and metodo:
-            metodo_nombre = metodo.metodo.lower()
-            if metodo_nombre in dias_data[dia]:
-                dias_data[dia][metodo_nombre] += pago.monto
+    
+    for fecha, id_metpago, num, monto in results:
+        # Sumar el monto de los pagos al método correspondiente
+        metodo = dimensiones.metodo_pago(id_metpago)
+        if metodo and fecha.day in dias_data:
+            metodo_nombre = metodo.lower()
+            if metodo_nombre in dias_data[fecha.day]:
+                dias_data[fecha.day][metodo_nombre] += monto
     
     # Crear la respuesta ordenada por día
     respuesta = []
@@ -88,7 +96,7 @@ async def get_resumen_mes(
 
 
 @router.get("/reporte-dia", response_model=List[SucursalDiaDetalle])
-async def get_reporte_dia(
+def get_reporte_dia(
     fecha: datetime = Query(..., description="Fecha del día a consultar (YYYY-MM-DD)"),
     session: Session = Depends(get_session)
 ):
@@ -96,9 +104,9 @@ async def get_reporte_dia(
     inicio = fecha.replace(hour=0, minute=0, second=0, microsecond=0)
     fin = inicio + timedelta(days=1)
 
-    # Buscar todas las sucursales
-    sucursales = session.exec(select(Sucursal)).all()
-    suc_map = {suc.id_suc: suc.nombre for suc in sucursales}
+    # Todas las sucursales y los métodos de pago, desde la caché de dimensiones
+    dimensiones = obtener_dimensiones(session)
+    suc_map = {suc.id_suc: suc.nombre for suc in dimensiones.sucursales.values()}
 
     # Buscar cajas abiertas ese día
     cajas_stmt = select(Caja).where(Caja.fecha_apertura >= inicio, Caja.fecha_apertura < fin)
@@ -122,10 +130,8 @@ async def get_reporte_dia(
         ))
 
     # Buscar pagos/ventas de ese día
-    pagos_stmt = select(Pago, Venta, MetodosPago).join(
+    pagos_stmt = select(Pago, Venta).join(
         Venta, Pago.id_venta == Venta.id_venta
-    ).join(
-        MetodosPago, Pago.id_metpago == MetodosPago.id_metpago
     ).where(
         Venta.fecha_hora >= inicio,
         Venta.fecha_hora < fin
@@ -133,11 +139,15 @@ async def get_reporte_dia(
     pagos = session.exec(pagos_stmt).all()
 
     pagos_por_suc = defaultdict(list)
-    for pago, venta, metpago in pagos:
+    for pago, venta in pagos:
+        metodo = dimensiones.metodo_pago(pago.id_metpago)
+        # Igual que el join anterior: pagos con un método inexistente no se listan
+        if metodo is None:
+            continue
         pagos_por_suc[venta.id_suc].append(PagoVentaDetalle(
             id_venta=venta.id_venta,
             dia=venta.fecha_hora.day,
-            metodo_pago=metpago.metodo,
+            metodo_pago=metodo,
             referencia=pago.referencia,
             monto=pago.monto,
             id_caja=venta.id_caja
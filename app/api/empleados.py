@@ -5,7 +5,7 @@ from app.db.session import get_session
 from app.models.empleadoModel import Empleados
 from app.schemas.empleadoSchema import readEmpleadoNoPass, createEmpleado
 from argon2 import PasswordHasher
-from app.core.permissions import require_permission, require_any_permission
+from app.core.permissions import require_permission, require_any_permission, invalidar_permisos_empleado
 
 from app.models.cargoModel import Cargos
 from app.schemas.cargoSchema import readCargo
@@ -115,6 +115,7 @@ def updateEmpleado(
     session.add(db_empleado)
     session.commit()
     session.refresh(db_empleado)
+    invalidar_permisos_empleado(id_emp)
     
     # Obtener los nombres de cargo y sucursal
     cargo = session.get(Cargos, db_empleado.id_ca)
@@ -148,6 +149,7 @@ def toggleEmpleadoStatus(
     session.add(db_empleado)
     session.commit()
     session.refresh(db_empleado)
+    invalidar_permisos_empleado(id_emp)
 
     return {
         "message": f"Empleado {'activado' if db_empleado.status else 'desactivado'}",
@@ -166,6 +168,7 @@ def deleteEmpleado(
     
     session.delete(db_empleado)
     session.commit()
+    invalidar_permisos_empleado(id_emp)
     
     return {"message": "Empleado eliminado correctamente"}
 
@@ -17,7 +17,7 @@ ph = PasswordHasher()
 
 
 @router.get("/{id_caja}/caja", response_model=List[readGastos])
-async def getGastosPorCaja(
+def getGastosPorCaja(
     id_caja: int,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_recurso"))
@@ -35,7 +35,7 @@ async def getGastosPorCaja(
 
 
 @router.get("/", response_model=List[readGastos])
-async def getGastos(
+def getGastos(
     session: Session = Depends(get_session),
     id_suc: int = Query(..., description="ID de la sucursal. 1 para ver todas, 2, 3, etc para ver solo esa sucursal"),
     fecha_inicio: Optional[str] = Query(None, description="Fecha de inicio para filtrar (formato: YYYY-MM-DD o ISO 8601)"),
@@ -85,7 +85,7 @@ async def getGastos(
     return results
 
 @router.post("/")
-async def create_gasto(gasto: createGastos, session: Session = Depends(get_session), _: None = Depends(require_permission("crear_recurso"))):
+def create_gasto(gasto: createGastos, session: Session = Depends(get_session), _: None = Depends(require_permission("crear_recurso"))):
     new_gasto = Gastos(
         id_suc=gasto.id_suc,
         descripcion=gasto.descripcion,
@@ -98,7 +98,7 @@ async def create_gasto(gasto: createGastos, session: Session = Depends(get_sessi
     return {"message":"Gasto creado"}
 
 @router.get("/{id_gastos}", response_model=readGastoNoFecha)
-async def getGastoById(id_gastos: int, session: Session = Depends(get_session), _: None = Depends(require_any_permission("ver_recurso", "modificar_recurso"))):
+def getGastoById(id_gastos: int, session: Session = Depends(get_session), _: None = Depends(require_any_permission("ver_recurso", "modificar_recurso"))):
     statement = (
         select(Gastos.id_gastos, Gastos.descripcion, Gastos.precio)
         .join(Sucursal, Gastos.id_suc == Sucursal.id_suc)
@@ -115,7 +115,7 @@ async def getGastoById(id_gastos: int, session: Session = Depends(get_session),
     return {"message":"No se encontro el gasto"}
 
 @router.delete("/{id_gastos}")
-async def deleteGastoById(id_gastos: int, session: Session = Depends(get_session), _: None = Depends(require_permission("eliminar_recurso"))):
+def deleteGastoById(id_gastos: int, session: Session = Depends(get_session), _: None = Depends(require_permission("eliminar_recurso"))):
     statement = select(Gastos).where(Gastos.id_gastos == id_gastos)
     result = session.exec(statement).first()
     if result:
@@ -125,7 +125,7 @@ async def deleteGastoById(id_gastos: int, session: Session = Depends(get_session
     return {"message":"No se encontro el gasto"}
 
 @router.put("/{id_gastos}")
-async def updateGasto(id_gastos: int, gasto: modGastos, session: Session = Depends(get_session), _: None = Depends(require_permission("modificar_recurso"))):
+def updateGasto(id_gastos: int, gasto: modGastos, session: Session = Depends(get_session), _: None = Depends(require_permission("modificar_recurso"))):
     statement = select(Gastos).where(Gastos.id_gastos == id_gastos)
     result = session.exec(statement).first()
     if result:
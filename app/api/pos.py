@@ -1,25 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, update, delete
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
+import os
+from sqlmodel import Session, select, update, delete, func
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 
-from app.db.session import get_session
+from app.db.session import get_session, engine
 from app.models.detallesModel import DetalleVenta
 from app.models.ventaModel import Venta, PVersion
 from app.models.pagosModel import Pago
 from app.models.pDireccionModel import pDireccion
-from app.models.DireccionesModel import Direccion
 from app.models.pEspecialModel import PEspecial
 
-from app.schemas.ventaSchema import VentaRequest, VentaResponse, RegistrarPagoRequest, VentaEditRequest
-
-from app.models.clienteModel import Cliente
-from app.models.sucursalModel import Sucursal
+from app.schemas.ventaSchema import (VentaRequest, VentaResponse, RegistrarPagoRequest, VentaEditRequest,
+                                     VentaCambiosRequest, CotizacionRequest)
 
 router = APIRouter()
 
+# Tamaño de página del listado de ventas (GET /pos/)
+LIMITE_VENTAS_DEFAULT = int(os.getenv("LIMITE_VENTAS_DEFAULT", "100"))
+LIMITE_VENTAS_MAX = int(os.getenv("LIMITE_VENTAS_MAX", "500"))
+
 from app.api.refactors.posRefactor import (validar_cliente_direccion,
+                                 precargar_referencias_venta,
                                  crear_detalles_venta,
                                  validar_items,
                                  validar_pagos_tipo_servicio,
@@ -31,70 +39,90 @@ from app.api.refactors.posRefactor import (validar_cliente_direccion,
                                  crear_registro_domicilio,
                                  crear_pedido_especial,
                                  crear_pagos,
-                                 crear_detalles_venta,
+                                 fila_detalle,
+                                 insertar_detalles,
                                  construir_respuesta)
 
-from app.api.refactors.getsRefactor import (_get_cliente_nombre,
-                                             _get_direccion_detalle,
-                                             _get_nombre_sucursal,
-                                             _calcular_totales_venta,
-                                             _contar_productos_venta,
-                                             _filtrar_por_fecha,
-                                             _obtener_nombre_cliente_por_tipo_servicio,
-                                             _procesar_producto_por_tipo)
+from app.api.refactors.getsRefactor import (_filtrar_por_fecha,
+                                             _formatear_direccion,
+                                             _procesar_producto_por_tipo,
+                                             _construir_pedidos_cocina,
+                                             _cargar_datos_pedidos,
+                                             _nombre_cliente_desde_datos,
+                                             _construir_listado_ventas,
+                                             _codificar_cursor,
+                                             _decodificar_cursor,
+                                             _despues_del_cursor,
+                                             _consulta_pedidos_especiales,
+                                             _despues_del_cursor_especial,
+                                             _codificar_cursor_especial,
+                                             _construir_pedidos_especiales)
+
+from app.api.refactors.cotizador import cotizar_items, aplicar_precios, faltan_precios, total_renglones
+from app.api.refactors.menuSnapshot import obtener_menu, obtener_precios
+
+from app.api.refactors.cocinaRefactor import (canal_cocina,
+                                              vigia_cocina,
+                                              obtener_version_sucursal,
+                                              registrar_evento_cocina,
+                                              leer_cambios_cocina,
+                                              incrementar_version_venta,
+                                              publicar_evento_cocina,
+                                              EVENTO_CREADO,
+                                              EVENTO_EDITADO,
+                                              EVENTO_STATUS,
+                                              EVENTO_COMPLETADO,
+                                              EVENTO_CANCELADO,
+                                              EVENTO_ELIMINADO)
+
+from app.api.refactors.ticketRefactor import obtener_ticket, VISTA_COCINA, VISTA_TICKET
+
+from app.api.refactors.resumenRefactor import (acumular_venta,
+                                               acumular_pagos,
+                                               retirar_venta)
 
 
 @router.get("/ver-pedidos-especiales")
-async def ver_pedidos_especiales(
+def ver_pedidos_especiales(
+    response: Response,
     session: Session = Depends(get_session),
     id_suc: int = 1,
     status: Optional[int] = None,
+    limite: Optional[int] = Query(None, ge=1, le=LIMITE_VENTAS_MAX),
+    cursor: Optional[str] = None,
 ):
+    """
+    Pedidos especiales ordenados por fecha de entrega.
+    Sin limite se regresan todos; con limite, si hay más el header X-Siguiente-Cursor
+    trae el valor para ?cursor= de la página siguiente.
+    """
     try:
-        from app.models.pEspecialModel import PEspecial
-        from app.models.ventaModel import Venta
-        
-        statement = select(PEspecial).order_by(PEspecial.fecha_creacion.asc())
+        posicion = _decodificar_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
 
-        # Filtrar por sucursal
-        statement = statement.join(Venta, PEspecial.id_venta == Venta.id_venta).where(Venta.id_suc == id_suc)
+    try:
+        # Por omisión solo los pendientes
+        statement = _consulta_pedidos_especiales(id_suc, 1 if status is None else status)
+        if posicion is not None:
+            statement = _despues_del_cursor_especial(statement, *posicion)
 
-        # Filtrar por status
-        if status is None:
-            statement = statement.where(PEspecial.status == 1)
+        if limite is None:
+            filas = session.exec(statement).all()
         else:
-            statement = statement.where(PEspecial.status == status)
-
-        pedidos_especiales = session.exec(statement).all()
-
-        resultados = []
-        for pedido in pedidos_especiales:
-            nombre_cliente = _get_cliente_nombre(session, pedido.id_clie)
-            detalles_direccion = _get_direccion_detalle(session, pedido.id_dir)
-            total_venta, anticipo, saldo_pendiente = _calcular_totales_venta(session, pedido.id_venta)
-            cantidad_productos = _contar_productos_venta(session, pedido.id_venta)
-
-            resultados.append({
-                "id_pespeciales": pedido.id_pespeciales,
-                "id_venta": pedido.id_venta,
-                "cliente_nombre": nombre_cliente,
-                "direccion_detalles": detalles_direccion,
-                "fecha_creacion": pedido.fecha_creacion,
-                "fecha_entrega": pedido.fecha_entrega,
-                "total_venta": total_venta,
-                "anticipo": anticipo,
-                "saldo_pendiente": saldo_pendiente,
-                "cantidad_productos": cantidad_productos
-            })
-
-        return resultados
+            filas = session.exec(statement.limit(limite + 1)).all()
+            if len(filas) > limite:
+                filas = filas[:limite]
+                response.headers["X-Siguiente-Cursor"] = _codificar_cursor_especial(filas[-1])
+
+        return _construir_pedidos_especiales(filas)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener pedidos especiales: {str(e)}")
 
 
 @router.get("/pedidos-resumen")
-async def listar_pedidos_resumen(
+def listar_pedidos_resumen(
     session: Session = Depends(get_session),
     filtro: str = "hoy",
     status: Optional[int] = None,
@@ -104,7 +132,21 @@ async def listar_pedidos_resumen(
         from app.models.ventaModel import Venta
         from app.models.pagosModel import Pago
         
-        statement = select(Venta).order_by(Venta.fecha_hora.desc())
+        # Total pagado y cantidad de items como subconsultas correlacionadas,
+        # así la lista completa sale en una sola consulta
+        total_pagado = (
+            select(func.coalesce(func.sum(Pago.monto), 0))
+            .where(Pago.id_venta == Venta.id_venta)
+            .correlate(Venta)
+            .scalar_subquery()
+        )
+        total_items = (
+            select(func.coalesce(func.sum(DetalleVenta.cantidad), 0))
+            .where(DetalleVenta.id_venta == Venta.id_venta)
+            .correlate(Venta)
+            .scalar_subquery()
+        )
+        statement = select(Venta, total_pagado, total_items).order_by(Venta.fecha_hora.desc())
 
         # Aplicar filtro de fecha
         statement = _filtrar_por_fecha(statement, filtro)
@@ -115,20 +157,23 @@ async def listar_pedidos_resumen(
         if id_suc:
             statement = statement.where(Venta.id_suc == id_suc)
 
-        ventas = session.exec(statement).all()
+        filas = session.exec(statement).all()
 
-        pedidos_resumen = []
-        for venta in ventas:
-            # Calcular total de pagos registrados en la tabla pagos
-            statement_pago = select(Pago).where(Pago.id_venta == venta.id_venta)
-            pagos_registrados = session.exec(statement_pago).all()
-            total_pagado = sum(Decimal(str(p.monto)) for p in pagos_registrados)
+        # Domicilios, pedidos especiales, clientes y sucursales en bloque
+        datos = _cargar_datos_pedidos(session, [venta for venta, _, _ in filas], con_detalles=False)
 
+        pedidos_resumen = []
+        for venta, total_pagado, total_items in filas:
             # Obtener cliente según el tipo de servicio
-            nombre_cliente = _obtener_nombre_cliente_por_tipo_servicio(session, venta)
+            nombre_cliente = _nombre_cliente_desde_datos(
+                venta,
+                datos["domicilios"].get(venta.id_venta),
+                datos["especiales"].get(venta.id_venta),
+                datos["clientes"]
+            )
 
-            nombre_sucursal = _get_nombre_sucursal(session, venta.id_suc)
-            total_items = _contar_productos_venta(session, venta.id_venta)
+            sucursal = datos["sucursales"].get(venta.id_suc)
+            nombre_sucursal = sucursal.nombre if sucursal else "Desconocida"
 
             pedido_dict = {
                 "id_venta": venta.id_venta,
@@ -151,7 +196,7 @@ async def listar_pedidos_resumen(
                 }.get(venta.status, "Desconocido"),
                 "total": float(venta.total),
                 "pagado": float(total_pagado),
-                "cantidad_items": total_items,
+                "cantidad_items": int(total_items),
                 "detalle": venta.detalles
             }
             pedidos_resumen.append(pedido_dict)
@@ -169,14 +214,13 @@ async def listar_pedidos_resumen(
 
 
 @router.get("/pedidos-cocina")
-async def listar_pedidos_cocina(
+def listar_pedidos_cocina(
     session: Session = Depends(get_session),
     filtro: str = "hoy",
     id_suc: Optional[int] = None,
 ):
     try:
         from app.models.ventaModel import Venta
-        from app.models.detallesModel import DetalleVenta
         
         statement = select(Venta).order_by(Venta.fecha_hora.asc())
 
@@ -192,53 +236,8 @@ async def listar_pedidos_cocina(
 
         ventas = session.exec(statement).all()
 
-        pedidos_cocina = []
-        for venta in ventas:
-            # Obtener cliente según el tipo de servicio
-            nombre_cliente = _obtener_nombre_cliente_por_tipo_servicio(session, venta)
-
-            # Obtener sucursal
-            nombre_sucursal = _get_nombre_sucursal(session, venta.id_suc)
-
-            # Obtener detalles de productos
-            statement_detalles = select(DetalleVenta).where(
-                DetalleVenta.id_venta == venta.id_venta,
-                DetalleVenta.status.in_([0, 1, 2])
-            )
-            detalles = session.exec(statement_detalles).all()
-
-            # Procesar productos
-            productos = []
-            for det in detalles:
-                productos.extend(_procesar_producto_por_tipo(session, det))
-
-            total_items = sum(det.cantidad for det in detalles)
-            
-
-            pedidos_cocina.append({
-                "id_venta": venta.id_venta,
-                "fecha_hora": venta.fecha_hora,
-                "cliente": nombre_cliente,
-                "tipo_servicio": venta.tipo_servicio,
-                "tipo_servicio_texto": {
-                    0: "Comer aquí",
-                    1: "Para llevar",
-                    2: "Domicilio",
-                    3: "Pedido Especial"
-                }.get(venta.tipo_servicio, "Desconocido"),
-                "mesa": venta.mesa if venta.tipo_servicio == 0 else None,
-                "sucursal": nombre_sucursal,
-                "status": venta.status,
-                "comentarios": venta.comentarios,
-                "status_texto": {
-                    0: "Preparando",
-                    1: "Entregado",
-                    2: "Completado"
-                }.get(venta.status, "Desconocido"),
-                "cantidad_items": total_items,
-                "cantidad_productos_diferentes": len(detalles),
-                "productos": productos
-            })
+        # Carga en bloque: detalles, domicilios, especiales, clientes y sucursales
+        pedidos_cocina = _construir_pedidos_cocina(session, ventas)
 
         return {
             "pedidos": pedidos_cocina,
@@ -253,8 +252,66 @@ async def listar_pedidos_cocina(
 
 
 
+@router.get("/pedidos-cocina/cambios")
+def cambios_pedidos_cocina(
+    id_suc: int,
+    desde: int = Query(..., ge=0),
+    filtro: str = "hoy",
+    session: Session = Depends(get_session),
+):
+    """
+    Pedidos de cocina de la sucursal que se crearon, modificaron o cerraron después de la
+    versión `desde` (la que regresó la consulta anterior o /pedidos-cocina/verificacion).
+    pedidos trae los que siguen abiertos, con el mismo formato de /pos/pedidos-cocina, y
+    cerrados los id_venta que hay que quitar de la pantalla. Con resincronizar=True la
+    bitácora ya no cubre `desde` y hay que recargar /pos/pedidos-cocina.
+    """
+    try:
+        cambios = leer_cambios_cocina(session, id_suc, desde)
+        if cambios is None:
+            version = obtener_version_sucursal(session, id_suc)
+            if version is None:
+                raise HTTPException(status_code=404, detail=f"No existe versión para la sucursal {id_suc}")
+            return {
+                "id_suc": id_suc,
+                "desde": desde,
+                "version": version,
+                "resincronizar": True,
+                "pedidos": [],
+                "cerrados": []
+            }
+
+        version, eventos = cambios
+        ventas = []
+        if eventos:
+            # Mismo criterio que /pos/pedidos-cocina para saber si sigue en pantalla
+            statement = select(Venta).where(
+                Venta.id_venta.in_(list(eventos)),
+                Venta.id_suc == id_suc,
+                Venta.status.in_([0, 1])
+            ).order_by(Venta.fecha_hora.asc())
+            ventas = session.exec(_filtrar_por_fecha(statement, filtro)).all()
+
+        pedidos_cocina = _construir_pedidos_cocina(session, ventas)
+        abiertos = {venta.id_venta for venta in ventas}
+
+        return {
+            "id_suc": id_suc,
+            "desde": desde,
+            "version": version,
+            "resincronizar": False,
+            "pedidos": pedidos_cocina,
+            "cerrados": sorted(id_venta for id_venta in eventos if id_venta not in abiertos)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener cambios de cocina: {str(e)}")
+
+
 @router.get("/pedidos-cocina/verificacion/{id_suc}")
-async def verificacion_actualizar(
+def verificacion_actualizar(
     id_suc: int,
     session: Session = Depends(get_session),
 ):
@@ -273,9 +330,45 @@ async def verificacion_actualizar(
     }
 
 
+def _version_sucursal(id_suc: int) -> Optional[int]:
+    with Session(engine) as session:
+        return obtener_version_sucursal(session, id_suc)
+
+
+@router.websocket("/pedidos-cocina/ws/{id_suc}")
+async def pedidos_cocina_ws(websocket: WebSocket, id_suc: int):
+    """
+    Canal push para la pantalla de cocina de una sucursal.
+    Al conectar se envía la versión actual; después, un evento por cada pedido que
+    cambió (creado, editado, status, completado, cancelado, eliminado) con la versión
+    de la sucursal ya incluyéndolo. Si un pedido cambió varias veces entre dos
+    revisiones del vigía llega solo su último evento. Funciona con varios workers: la
+    conexión recibe los cambios sin importar qué worker atendió la escritura.
+    """
+    await websocket.accept()
+    vigia_cocina.iniciar()
+    cola = canal_cocina.suscribir(id_suc)
+    try:
+        version = await run_in_threadpool(_version_sucursal, id_suc)
+        canal_cocina.iniciar_version(id_suc, version or 0)
+        await websocket.send_json({"evento": "sincronizar", "id_suc": id_suc, "version": version})
+
+        while True:
+            try:
+                evento = await asyncio.wait_for(cola.get(), timeout=30)
+            except asyncio.TimeoutError:
+                # Mantener viva la conexión y detectar clientes caídos
+                evento = {"evento": "ping", "id_suc": id_suc}
+            await websocket.send_json(jsonable_encoder(evento))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        canal_cocina.desuscribir(id_suc, cola)
+
+
 
 @router.get("/edit/{id_venta}/detalle")
-async def getDetallesEdit(
+def getDetallesEdit(
     id_venta: int,
     session: Session = Depends(get_session)
 ):
@@ -358,6 +451,7 @@ async def getDetallesEdit(
                 id_catalogo = 0
 
             prod = {
+                "id_detalle": det.id_detalle,
                 "id": id_catalogo if id_catalogo is not None else 0,
                 "tipo": tipo,
                 "cantidad": det.cantidad,
@@ -376,6 +470,7 @@ async def getDetallesEdit(
 
         return {
             "id_venta": venta.id_venta,
+            "version": venta.version,
             "productos": productos
         }
     except HTTPException:
@@ -385,127 +480,132 @@ async def getDetallesEdit(
 
 
 
+def _responder_ticket(render, contenido: bytes, media_type: str) -> Response:
+    return Response(content=contenido, media_type=media_type, headers={"X-Venta-Version": str(render.version)})
+
+
 @router.get("/pedidos-cocina/{id_venta}/detalle")
-async def obtener_detalle_pedido_cocina(
+def obtener_detalle_pedido_cocina(
     id_venta: int,
     session: Session = Depends(get_session)
 ):
     try:
-        from app.models.ventaModel import Venta
-        from app.models.detallesModel import DetalleVenta
-        from app.models.pDireccionModel import pDireccion
-        from app.models.pEspecialModel import PEspecial
-        
-        # Obtener venta
         venta = session.get(Venta, id_venta)
         if not venta:
             raise HTTPException(status_code=404, detail=f"Venta {id_venta} no encontrada")
 
-        # Obtener cliente según el tipo de servicio (misma lógica que en el listado)
-        nombre_cliente = _obtener_nombre_cliente_por_tipo_servicio(session, venta)
-
-        # Obtener sucursal
-        nombre_sucursal = _get_nombre_sucursal(session, venta.id_suc)
+        render = obtener_ticket(venta, VISTA_COCINA, lambda: _armar_detalle_cocina(session, venta))
+        return _responder_ticket(render, render.json, "application/json")
 
-        # Obtener detalles de productos
-        statement_detalles = select(DetalleVenta).where(
-            DetalleVenta.id_venta == id_venta,
-            DetalleVenta.status.in_([0, 1, 2])  # Solo los status válidos
-        )
-        detalles = session.exec(statement_detalles).all()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener detalle del pedido: {str(e)}")
 
-        # Procesar productos
-        productos = []
-        for det in detalles:
-            productos.extend(_procesar_producto_por_tipo(session, det))
 
-        total_items = sum(det.cantidad for det in detalles)
+def _armar_detalle_cocina(session: Session, venta: Venta) -> dict:
+    """Detalle del pedido para la pantalla de cocina (se guarda por versión de la venta)."""
+    # Cliente, sucursal, dirección y detalles en bloque, una consulta por tabla
+    datos = _cargar_datos_pedidos(session, [venta], status_detalles=[0, 1, 2], con_direcciones=True)
+    domicilio = datos["domicilios"].get(venta.id_venta)
+    pedido_especial = datos["especiales"].get(venta.id_venta)
+
+    # Obtener cliente según el tipo de servicio (misma lógica que en el listado)
+    nombre_cliente = _nombre_cliente_desde_datos(venta, domicilio, pedido_especial, datos["clientes"])
+
+    sucursal = datos["sucursales"].get(venta.id_suc)
+    nombre_sucursal = sucursal.nombre if sucursal else "Desconocida"
+
+    detalles = datos["detalles"].get(venta.id_venta, [])
+
+    # Procesar productos
+    productos = []
+    for det in detalles:
+        productos.extend(_procesar_producto_por_tipo(session, det))
+
+    total_items = sum(det.cantidad for det in detalles)
+
+    # Obtener información específica para domicilio o pedido especial
+    id_direccion = None
+    fecha_entrega = None
+
+    if venta.tipo_servicio == 2 and domicilio:  # Domicilio
+        id_direccion = domicilio.id_dir
+
+    elif venta.tipo_servicio == 3 and pedido_especial:  # Pedido Especial
+        id_direccion = pedido_especial.id_dir
+        fecha_entrega = pedido_especial.fecha_entrega
+
+    # Obtener información de dirección si existe
+    detalle_direccion = None
+    if id_direccion:
+        direccion = datos["direcciones"].get(id_direccion)
+        detalle_direccion = _formatear_direccion(direccion) if direccion else "Desconocida"
+
+    response = {
+        "id_venta": venta.id_venta,
+        "fecha_hora": venta.fecha_hora,
+        "cliente": nombre_cliente,
+        "tipo_servicio": venta.tipo_servicio,
+        "tipo_servicio_texto": {
+            0: "Comer aquí",
+            1: "Para llevar",
+            2: "Domicilio",
+            3: "Pedido Especial"
+        }.get(venta.tipo_servicio, "Desconocido"),
+        "mesa": venta.mesa if venta.tipo_servicio == 0 else None,
+        "sucursal": nombre_sucursal,
+        "status": venta.status,
+        "comentarios": venta.comentarios,
+        "status_texto": {
+            0: "Esperando",
+            1: "Preparando",
+            2: "Completado"
+        }.get(venta.status, "Desconocido"),
+        "cantidad_items": total_items,
+        "cantidad_productos_diferentes": len(detalles),
+        "productos": productos
+    }
 
-        # Obtener información específica para domicilio o pedido especial
-        id_direccion = None
-        fecha_entrega = None
-        
-        if venta.tipo_servicio == 2:  # Domicilio
-            statement_domicilio = select(pDireccion).where(pDireccion.id_venta == venta.id_venta)
-            domicilio = session.exec(statement_domicilio).first()
-            if domicilio:
-                id_direccion = domicilio.id_dir
-        
-        elif venta.tipo_servicio == 3:  # Pedido Especial
-            statement_pespecial = select(PEspecial).where(PEspecial.id_venta == venta.id_venta)
-            pedido_especial = session.exec(statement_pespecial).first()
-            if pedido_especial:
-                id_direccion = pedido_especial.id_dir
-                fecha_entrega = pedido_especial.fecha_entrega
-
-        # Obtener información de dirección si existe
-        detalle_direccion = None
-        if id_direccion:
-            detalle_direccion = _get_direccion_detalle(session, id_direccion)
+    # Agregar información de dirección y fecha de entrega si es necesario
+    if detalle_direccion:
+        response["direccion"] = detalle_direccion
 
-        response = {
-            "id_venta": venta.id_venta,
-            "fecha_hora": venta.fecha_hora,
-            "cliente": nombre_cliente,
-            "tipo_servicio": venta.tipo_servicio,
-            "tipo_servicio_texto": {
-                0: "Comer aquí",
-                1: "Para llevar",
-                2: "Domicilio",
-                3: "Pedido Especial"
-            }.get(venta.tipo_servicio, "Desconocido"),
-            "mesa": venta.mesa if venta.tipo_servicio == 0 else None,
-            "sucursal": nombre_sucursal,
-            "status": venta.status,
-            "comentarios": venta.comentarios,
-            "status_texto": {
-                0: "Esperando",
-                1: "Preparando",
-                2: "Completado"
-            }.get(venta.status, "Desconocido"),
-            "cantidad_items": total_items,
-            "cantidad_productos_diferentes": len(detalles),
-            "productos": productos
-        }
-        
-        # Agregar información de dirección y fecha de entrega si es necesario
-        if detalle_direccion:
-            response["direccion"] = detalle_direccion
-        
-        if fecha_entrega:
-            response["fecha_entrega"] = fecha_entrega
-        
-        return response
+    if fecha_entrega:
+        response["fecha_entrega"] = fecha_entrega
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener detalle del pedido: {str(e)}")
+    return response
 
 
 @router.post("/")
-async def crear_venta(
+def crear_venta(
     venta_request: VentaRequest,
     session: Session = Depends(get_session)
 ):
     try:
         # Validaciones
         validar_items(venta_request)
+        if faltan_precios(venta_request):
+            aplicar_precios(obtener_precios(session), venta_request)
         validar_pagos_tipo_servicio(venta_request)
-        validar_cliente_direccion(venta_request, session)
+        referencias = precargar_referencias_venta(venta_request, session)
+        validar_cliente_direccion(venta_request, session, referencias)
         detalles_domicilio = validar_domicilio(venta_request)
         validar_pedido_especial(venta_request)
         validar_mesa(venta_request)
         validar_sucursal(venta_request, session)
         
         nueva_venta = crear_venta_base(venta_request, detalles_domicilio, session)
+        acumular_venta(session, nueva_venta)
         crear_registro_domicilio(venta_request, nueva_venta.id_venta, session)
         crear_pedido_especial(venta_request, nueva_venta.id_venta, session)
         pagos_creados = crear_pagos(venta_request, nueva_venta.id_venta, session)
         crear_detalles_venta(venta_request, nueva_venta.id_venta, session)
+        evento = registrar_evento_cocina(session, nueva_venta, EVENTO_CREADO)
         
         # Commit de la transacción
         session.commit()
+        publicar_evento_cocina(evento)
         
         # Construir y retornar respuesta
         return construir_respuesta(
@@ -527,8 +627,33 @@ async def crear_venta(
 
 
 
+@router.post("/cotizar")
+def cotizar_venta(
+    cotizacion_request: CotizacionRequest,
+    session: Session = Depends(get_session)
+):
+    """Precios del carrito calculados en el servidor, sin registrar nada."""
+    menu = obtener_menu(session)
+    cotizacion = cotizar_items(menu.precios, cotizacion_request.items)
+
+    return {
+        "items": [
+            {
+                "cantidad": item.cantidad,
+                "precio_unitario": float(unitario),
+                "queso": item.queso,
+                "subtotal": float(subtotal)
+            }
+            for item, unitario, subtotal in zip(cotizacion_request.items, cotizacion.unitarios, cotizacion.subtotales)
+        ],
+        "total": float(cotizacion.total),
+        "version_menu": menu.version
+    }
+
+
+
 @router.post("/pagar")
-async def registrar_pago_venta(
+def registrar_pago_venta(
     pago_request: RegistrarPagoRequest,
     session: Session = Depends(get_session)
 ):
@@ -546,16 +671,19 @@ async def registrar_pago_venta(
             status_code=400,
             detail=f"Este endpoint es solo para ventas tipo 0, 2 o 3."
         )
-    
-    # 3. Calcular acumulado
-    statement = select(Pago).where(Pago.id_venta == pago_request.id_venta)
-    pagos_existentes = session.exec(statement).all()
-    
-    monto_pagado_anteriormente = sum(p.monto for p in pagos_existentes)
-    suma_nuevos_pagos = sum(pago.monto for pago in pago_request.pagos)
-    total_acumulado = monto_pagado_anteriormente + suma_nuevos_pagos
-    
+
     try:
+        # Tomar la venta antes de leer sus pagos: si otra terminal la cambió, 409
+        incrementar_version_venta(session, venta, pago_request.version)
+
+        # 3. Calcular acumulado
+        statement = select(Pago).where(Pago.id_venta == pago_request.id_venta)
+        pagos_existentes = session.exec(statement).all()
+
+        monto_pagado_anteriormente = sum(p.monto for p in pagos_existentes)
+        suma_nuevos_pagos = sum(pago.monto for pago in pago_request.pagos)
+        total_acumulado = monto_pagado_anteriormente + suma_nuevos_pagos
+
         # 4. Validaciones de monto
         if venta.tipo_servicio in [0, 2]:
             if abs(total_acumulado - venta.total) > Decimal('0.01'):
@@ -575,6 +703,7 @@ async def registrar_pago_venta(
         
         # 5. Crear registros de pago
         pagos_creados = []
+        nuevos_pagos = []
         for pago_data in pago_request.pagos:
             nuevo_pago = Pago(
                 id_venta=pago_request.id_venta,
@@ -583,6 +712,7 @@ async def registrar_pago_venta(
                 referencia=pago_data.referencia
             )
             session.add(nuevo_pago)
+            nuevos_pagos.append(nuevo_pago)
             
             pago_info = {
                 "id_metpago": pago_data.id_metpago,
@@ -591,13 +721,19 @@ async def registrar_pago_venta(
             if pago_data.referencia:
                 pago_info["referencia"] = pago_data.referencia
             pagos_creados.append(pago_info)
+        acumular_pagos(session, venta, nuevos_pagos)
 
+        evento = None
         if total_acumulado >= venta.total:
+            if venta.status != 2:
+                evento = registrar_evento_cocina(session, venta, EVENTO_COMPLETADO)
             venta.status = 2
             session.add(venta) # Marcamos la venta para actualizar
             
         session.commit()
         session.refresh(venta) # Refrescamos para asegurar que tenemos el status nuevo
+        if evento:
+            publicar_evento_cocina(evento)
         
         # 6. Responder
         saldo_pendiente = float(venta.total - total_acumulado)
@@ -611,7 +747,8 @@ async def registrar_pago_venta(
             "total_pagado": float(total_acumulado),
             "saldo_pendiente": saldo_pendiente,
             "pagos_nuevos": pagos_creados,
-            "status_actualizado": venta.status # Aquí verás el 2 si se actualizó
+            "status_actualizado": venta.status, # Aquí verás el 2 si se actualizó
+            "version": venta.version
         }
         
         if venta.tipo_servicio == 3 and saldo_pendiente > 0:
@@ -629,7 +766,7 @@ async def registrar_pago_venta(
 
 
 @router.get("/{id_venta}", response_model=VentaResponse)
-async def obtener_venta(
+def obtener_venta(
     id_venta: int,
     session: Session = Depends(get_session)
 ):
@@ -664,7 +801,7 @@ async def obtener_venta(
 
 
 @router.put("/{id_venta}")
-async def editar_venta(
+def editar_venta(
     id_venta: int,
     venta_request: VentaEditRequest,  # Modelo específico
     session: Session = Depends(get_session)
@@ -677,6 +814,13 @@ async def editar_venta(
                 status_code=404,
                 detail=f"Venta con ID {id_venta} no encontrada"
             )
+        incrementar_version_venta(session, venta, venta_request.version)
+
+        if faltan_precios(venta_request):
+            aplicar_precios(obtener_precios(session), venta_request)
+
+        # Cambian total y fecha: se resta del acumulado con los valores anteriores y se vuelve a sumar
+        pagos = retirar_venta(session, venta)
 
         venta.total = Decimal(str(venta_request.total))
         venta.comentarios = venta_request.comentarios
@@ -694,6 +838,8 @@ async def editar_venta(
 
         # Agregar la venta a la sesión para registrar los cambios
         session.add(venta)
+        acumular_venta(session, venta)
+        acumular_pagos(session, venta, pagos)
 
         # Eliminar detalles existentes
         stmt = delete(DetalleVenta).where(DetalleVenta.id_venta == id_venta)
@@ -701,10 +847,12 @@ async def editar_venta(
 
         # Crear los nuevos detalles
         crear_detalles_venta(venta_request, id_venta, session)
+        evento = registrar_evento_cocina(session, venta, EVENTO_EDITADO)
 
         # Commit
         session.commit()
         session.refresh(venta)
+        publicar_evento_cocina(evento)
 
         return {
             "Mensaje": "Venta actualizada exitosamente",
@@ -712,7 +860,105 @@ async def editar_venta(
             "total": float(venta.total),
             "comentarios": venta.comentarios,
             "items_actualizados": len(venta_request.items),
-            "fecha_hora_actualizada": str(venta.fecha_hora)
+            "fecha_hora_actualizada": str(venta.fecha_hora),
+            "version": venta.version
+        }
+
+    except HTTPException:
+        session.rollback()
+        raise
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al editar la venta: {str(e)}"
+        )
+
+
+@router.patch("/{id_venta}/detalles")
+def editar_detalles_venta(
+    id_venta: int,
+    cambios: VentaCambiosRequest,
+    session: Session = Depends(get_session)
+):
+    """
+    Igual que PUT /pos/{id_venta} pero por diferencias: solo se insertan, actualizan o
+    borran los renglones indicados en vez de reescribir todo el pedido. Requiere la
+    versión con la que se leyó la venta; si otra terminal la cambió, 409.
+    """
+    try:
+        venta = session.get(Venta, id_venta)
+        if not venta:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Venta con ID {id_venta} no encontrada"
+            )
+        incrementar_version_venta(session, venta, cambios.version)
+
+        statement = select(DetalleVenta).where(DetalleVenta.id_venta == id_venta)
+        detalles = {det.id_detalle: det for det in session.exec(statement).all()}
+        ajenos = [i for i in [item.id_detalle for item in cambios.modificar] + cambios.eliminar if i not in detalles]
+        if ajenos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Los detalles {ajenos} no pertenecen a la venta {id_venta}"
+            )
+        if len(detalles) - len(cambios.eliminar) + len(cambios.agregar) == 0:
+            raise HTTPException(status_code=400, detail="La venta debe conservar al menos un item")
+
+        items = cambios.agregar + cambios.modificar
+        if any(item.precio_unitario is None for item in items):
+            cotizacion = cotizar_items(obtener_precios(session), items, solo_faltantes=True)
+            for item, unitario in zip(items, cotizacion.unitarios):
+                item.precio_unitario = unitario
+
+        # Cambian total y fecha: se resta del acumulado con los valores anteriores y se vuelve a sumar
+        pagos = retirar_venta(session, venta)
+
+        for id_detalle in cambios.eliminar:
+            session.delete(detalles.pop(id_detalle))
+        # Solo las columnas que cambian van en el UPDATE; un renglón igual no se escribe
+        for item in cambios.modificar:
+            detalle = detalles[item.id_detalle]
+            for campo, valor in fila_detalle(item, id_venta).items():
+                setattr(detalle, campo, valor)
+            session.add(detalle)
+        insertar_detalles(session, [fila_detalle(item, id_venta) for item in cambios.agregar])
+
+        if cambios.total is not None:
+            venta.total = Decimal(str(cambios.total))
+        else:
+            venta.total = total_renglones(
+                [(det.precio_unitario, det.queso, det.cantidad) for det in detalles.values()]
+                + [(item.precio_unitario, item.queso, item.cantidad) for item in cambios.agregar]
+            )
+        if cambios.comentarios is not None:
+            venta.comentarios = cambios.comentarios
+        venta.fecha_hora = datetime.now()
+
+        # Si la venta está completada (status=2), al editarla vuelve a esperando (status=0)
+        if venta.status == 2:
+            venta.status = 0
+
+        session.add(venta)
+        acumular_venta(session, venta)
+        acumular_pagos(session, venta, pagos)
+        evento = registrar_evento_cocina(session, venta, EVENTO_EDITADO)
+
+        session.commit()
+        session.refresh(venta)
+        publicar_evento_cocina(evento)
+
+        return {
+            "Mensaje": "Venta actualizada exitosamente",
+            "id_venta": venta.id_venta,
+            "total": float(venta.total),
+            "comentarios": venta.comentarios,
+            "items_agregados": len(cambios.agregar),
+            "items_modificados": len(cambios.modificar),
+            "items_eliminados": len(cambios.eliminar),
+            "fecha_hora_actualizada": str(venta.fecha_hora),
+            "version": venta.version
         }
 
     except HTTPException:
@@ -728,8 +974,9 @@ async def editar_venta(
 
 
 @router.delete("/{id_venta}")
-async def eliminar_venta(
+def eliminar_venta(
     id_venta: int,
+    version: Optional[int] = None,
     session: Session = Depends(get_session)
 ):
     venta = session.get(Venta, id_venta)
@@ -737,17 +984,25 @@ async def eliminar_venta(
         raise HTTPException(status_code=404, detail=f"Venta {id_venta} no encontrada")
     
     try:
+        incrementar_version_venta(session, venta, version)
         statement = select(DetalleVenta).where(DetalleVenta.id_venta == id_venta)
         detalles = session.exec(statement).all()
         for detalle in detalles:
             session.delete(detalle)
         
+        evento = registrar_evento_cocina(session, venta, EVENTO_ELIMINADO)
+        retirar_venta(session, venta)
+
         # Eliminar venta
         session.delete(venta)
         session.commit()
+        publicar_evento_cocina(evento)
         
         return {"Message":"Venta eliminada exitosamente"}
     
+    except HTTPException:
+        session.rollback()
+        raise
     except Exception as e:
         session.rollback()
         raise HTTPException(status_code=500, detail=f"Error al eliminar la venta: {str(e)}")
@@ -755,73 +1010,86 @@ async def eliminar_venta(
 
 
 @router.get("/")
-async def listar_ventas(
+def listar_ventas(
     session: Session = Depends(get_session),
     filtro: str = "hoy",
     status: Optional[int] = None,
     id_suc: Optional[int] = None,
+    limite: int = Query(LIMITE_VENTAS_DEFAULT, ge=1, le=LIMITE_VENTAS_MAX),
+    cursor: Optional[str] = None,
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
 ):
+    """
+    Ventas ordenadas por (fecha_hora, id_venta), paginadas por cursor.
+    siguiente_cursor se manda como ?cursor= para pedir la página siguiente.
+    Con formato=ndjson se transmiten todas las ventas desde el cursor, una por línea,
+    resolviéndolas por bloques de `limite`.
+    """
     try:
-        # Construir query base
-        statement = select(Venta).order_by(Venta.fecha_hora.asc())
+        posicion = _decodificar_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
 
-        if filtro == "hoy":
-            hoy_inicio = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            hoy_fin = hoy_inicio + timedelta(days=1)
-            statement = statement.where(
-                Venta.fecha_hora >= hoy_inicio,
-                Venta.fecha_hora < hoy_fin
-            )
+    # Construir query base
+    statement = _filtrar_por_fecha(select(Venta), filtro)
 
-        if status is not None:
-            statement = statement.where(Venta.status == status)
+    if status is not None:
+        statement = statement.where(Venta.status == status)
 
-        if id_suc:
-            statement = statement.where(Venta.id_suc == id_suc)
+    if id_suc:
+        statement = statement.where(Venta.id_suc == id_suc)
 
-        ventas = session.exec(statement).all()
+    statement = statement.order_by(Venta.fecha_hora.asc(), Venta.id_venta.asc())
 
-        ventas_resumidas = []
-        for venta in ventas:
-            # Obtener cliente
-            cliente = session.get(Cliente, venta.id_cliente)
-            nombre_cliente = cliente.nombre if cliente else "Desconocido"
+    if formato == "ndjson":
+        return StreamingResponse(
+            _transmitir_ventas(statement, posicion, limite),
+            media_type="application/x-ndjson"
+        )
 
-            # Obtener sucursal
-            sucursal = session.get(Sucursal, venta.id_suc)
-            nombre_sucursal = sucursal.nombre if sucursal else "Desconocida"
+    try:
+        pagina = statement if posicion is None else _despues_del_cursor(statement, *posicion)
+        ventas = session.exec(pagina.limit(limite + 1)).all()
+        hay_mas = len(ventas) > limite
+        ventas = ventas[:limite]
 
-            # Contar items
-            statement_detalles = select(DetalleVenta).where(DetalleVenta.id_venta == venta.id_venta)
-            detalles = session.exec(statement_detalles).all()
-            total_items = sum(det.cantidad for det in detalles)
-
-            ventas_resumidas.append({
-                "id_venta": venta.id_venta,
-                "fecha_hora": venta.fecha_hora,
-                "cliente": nombre_cliente,
-                "sucursal": nombre_sucursal,
-                "status": venta.status,
-                "total": float(venta.total),
-                "cantidad_items": total_items,
-                "cantidad_productos": len(detalles)
-            })
+        ventas_resumidas = _construir_listado_ventas(session, ventas)
 
         return {
             "ventas": ventas_resumidas,
             "total": len(ventas_resumidas),
             "filtro_aplicado": filtro,
-            "status_filtrado": status
+            "status_filtrado": status,
+            "siguiente_cursor": _codificar_cursor(ventas[-1]) if hay_mas else None
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener ventas: {str(e)}")
 
 
+def _transmitir_ventas(statement, posicion, bloque: int):
+    """Generador NDJSON: una línea por venta, consultando un bloque a la vez"""
+    # Sesión propia: la del Depends se cierra antes de que termine la respuesta
+    with Session(engine) as session:
+        while True:
+            pagina = statement if posicion is None else _despues_del_cursor(statement, *posicion)
+            ventas = session.exec(pagina.limit(bloque)).all()
+            if not ventas:
+                break
+            for venta_resumida in _construir_listado_ventas(session, ventas):
+                yield json.dumps(jsonable_encoder(venta_resumida), ensure_ascii=False) + "\n"
+            if len(ventas) < bloque:
+                break
+            posicion = (ventas[-1].fecha_hora, ventas[-1].id_venta)
+            # Liberar las ventas ya enviadas del identity map
+            session.expunge_all()
+
+
 
 @router.patch("/{id_venta}/toggle-preparacion")
-async def toggle_preparacion(
+def toggle_preparacion(
     id_venta: int,
+    version: Optional[int] = None,
     session: Session = Depends(get_session)
 ):
 
@@ -830,6 +1098,7 @@ async def toggle_preparacion(
         raise HTTPException(status_code=404, detail=f"Venta {id_venta} no encontrada")
     
     try:
+        incrementar_version_venta(session, venta, version)
         if venta.status == 0:
             venta.status = 1
             mensaje = "Pedido marcado como 'Preparando'"
@@ -843,17 +1112,21 @@ async def toggle_preparacion(
             )
         
         session.add(venta)
+        evento = registrar_evento_cocina(session, venta, EVENTO_STATUS)
         session.commit()
         session.refresh(venta)
+        publicar_evento_cocina(evento)
         
         return {
             "message": mensaje,
             "id_venta": venta.id_venta,
             "nuevo_status": venta.status,
-            "status_texto": {0: "Esperando", 1: "Preparando"}[venta.status]
+            "status_texto": {0: "Esperando", 1: "Preparando"}[venta.status],
+            "version": venta.version
         }
     
     except HTTPException:
+        session.rollback()
         raise
     except Exception as e:
         session.rollback()
@@ -862,8 +1135,9 @@ async def toggle_preparacion(
 
 
 @router.patch("/{id_venta}/completar")
-async def completar_pedido(
+def completar_pedido(
     id_venta: int,
+    version: Optional[int] = None,
     session: Session = Depends(get_session)
 ):
 
@@ -872,6 +1146,7 @@ async def completar_pedido(
         raise HTTPException(status_code=404, detail=f"Venta {id_venta} no encontrada")
     
     try:
+        incrementar_version_venta(session, venta, version)
         if venta.status != 1:
             raise HTTPException(
                 status_code=400,
@@ -889,18 +1164,22 @@ async def completar_pedido(
             .values(status=2)
         )
         session.exec(stmt)
+        evento = registrar_evento_cocina(session, venta, EVENTO_COMPLETADO)
 
         session.commit()
         session.refresh(venta)
+        publicar_evento_cocina(evento)
         
         return {
             "message": "Pedido completado exitosamente",
             "id_venta": venta.id_venta,
             "nuevo_status": 2,
-            "status_texto": "Completado"
+            "status_texto": "Completado",
+            "version": venta.version
         }
     
     except HTTPException:
+        session.rollback()
         raise
     except Exception as e:
         session.rollback()
@@ -908,8 +1187,9 @@ async def completar_pedido(
 
 
 @router.patch("/completar-pespecial/{id_pespeciales}")
-async def completar_pedido_y_pespecial_por_id(
+def completar_pedido_y_pespecial_por_id(
     id_pespeciales: int,
+    version: Optional[int] = None,
     session: Session = Depends(get_session)
 ):
     """Completa la venta asociada al `PEspecial` y marca el `PEspecial` con status=2."""
@@ -923,6 +1203,7 @@ async def completar_pedido_y_pespecial_por_id(
         raise HTTPException(status_code=404, detail=f"Venta asociada {id_venta} no encontrada")
 
     try:
+        incrementar_version_venta(session, venta, version)
         # Cambiar el estado de la venta
         venta.status = 2
         session.add(venta)
@@ -938,19 +1219,23 @@ async def completar_pedido_y_pespecial_por_id(
         # Marcar el PEspecial como completado (status=2)
         pedido_especial.status = 2
         session.add(pedido_especial)
+        evento = registrar_evento_cocina(session, venta, EVENTO_COMPLETADO)
 
         session.commit()
         session.refresh(venta)
+        publicar_evento_cocina(evento)
 
         return {
             "message": "Pedido completado y PEspecial actualizado exitosamente",
             "id_pespeciales": id_pespeciales,
             "id_venta": venta.id_venta,
             "nuevo_status": 2,
-            "status_texto": "Completado"
+            "status_texto": "Completado",
+            "version": venta.version
         }
 
     except HTTPException:
+        session.rollback()
         raise
     except Exception as e:
         session.rollback()
@@ -959,9 +1244,10 @@ async def completar_pedido_y_pespecial_por_id(
 
 
 @router.patch("/{id_venta}/cancelar")
-async def cancelar_venta(
+def cancelar_venta(
     id_venta: int,
     motivo_cancelacion: str,
+    version: Optional[int] = None,
     session: Session = Depends(get_session)
 ):
     venta = session.get(Venta, id_venta)
@@ -972,6 +1258,7 @@ async def cancelar_venta(
         )
 
     try:
+        incrementar_version_venta(session, venta, version)
         # Cambiar status de Venta a 5 (cancelado)
         venta.status = 5
         venta.detalles = motivo_cancelacion
@@ -998,7 +1285,9 @@ async def cancelar_venta(
             pe.status = 0
             session.add(pe)
 
+        evento = registrar_evento_cocina(session, venta, EVENTO_CANCELADO)
         session.commit()
+        publicar_evento_cocina(evento)
 
         return {
             "mensaje": "Venta cancelada exitosamente",
@@ -1007,9 +1296,13 @@ async def cancelar_venta(
             "detalles": venta.detalles,
             "detalles_cancelados": len(detalles),
             "domicilios_cancelados": len(pdireccion),
-            "especiales_cancelados": len(pespecial)
+            "especiales_cancelados": len(pespecial),
+            "version": venta.version
         }
 
+    except HTTPException:
+        session.rollback()
+        raise
     except Exception as e:
         session.rollback()
         raise HTTPException(
@@ -1018,154 +1311,154 @@ async def cancelar_venta(
         )
 
 
+def _obtener_ticket_venta(session: Session, id_venta: int):
+    venta = session.get(Venta, id_venta)
+    if not venta:
+        raise HTTPException(status_code=404, detail=f"Venta {id_venta} no encontrada")
+    return obtener_ticket(venta, VISTA_TICKET, lambda: _armar_ticket(session, venta))
+
+
 @router.get("/recrea-ticket/{id_venta}")
-async def recrea_ticket(
+def recrea_ticket(
     id_venta: int,
     session: Session = Depends(get_session),
 ):
     try:
-        from app.models.ventaModel import Venta
-        from app.models.detallesModel import DetalleVenta
-        
-        # Obtener venta
-        venta = session.exec(select(Venta).where(Venta.id_venta == id_venta)).first()
-        if not venta:
-            raise HTTPException(status_code=404, detail=f"Venta {id_venta} no encontrada")
-        
-        # Obtener cliente según el tipo de servicio
-        nombre_cliente = _obtener_nombre_cliente_por_tipo_servicio(session, venta)
-        nombre_sucursal = _get_nombre_sucursal(session, venta.id_suc)
-        
-        # Obtener datos del cliente y dirección según tipo de servicio
-        id_cliente = None
-        telefono_cliente = None
-        direccion_info = {}
-        
-        if venta.tipo_servicio == 2:  # Domicilio
-            # Obtener datos de pDireccion
-            pdireccion = session.exec(
-                select(pDireccion).where(pDireccion.id_venta == id_venta)
-            ).first()
-            
-            if pdireccion:
-                id_cliente = pdireccion.id_clie
-                # Obtener teléfono del cliente
-                cliente = session.get(Cliente, id_cliente)
-                telefono_cliente = cliente.telefono if cliente else None
-                
-                # Obtener datos de Direccion
-                direccion = session.get(Direccion, pdireccion.id_dir)
-                if direccion:
-                    direccion_info = {
-                        "id_dir": direccion.id_dir,
-                        "calle": direccion.calle,
-                        "manzana": direccion.manzana,
-                        "lote": direccion.lote,
-                        "colonia": direccion.colonia,
-                        "referencia": direccion.referencia
-                    }
-        
-        elif venta.tipo_servicio == 3:  # Pedido Especial
-            # Obtener datos de PEspecial
-            pespecial = session.exec(
-                select(PEspecial).where(PEspecial.id_venta == id_venta)
-            ).first()
-            
-            if pespecial:
-                id_cliente = pespecial.id_clie
-                # Obtener teléfono del cliente
-                cliente = session.get(Cliente, id_cliente)
-                telefono_cliente = cliente.telefono if cliente else None
-                
-                # Obtener datos de Direccion
-                direccion = session.get(Direccion, pespecial.id_dir)
-                if direccion:
-                    direccion_info = {
-                        "id_dir": direccion.id_dir,
-                        "calle": direccion.calle,
-                        "manzana": direccion.manzana,
-                        "lote": direccion.lote,
-                        "colonia": direccion.colonia,
-                        "referencia": direccion.referencia,
-                        "fecha_entrega": pespecial.fecha_entrega
-                    }
-        
-        # Obtener detalles de productos
-        statement_detalles = select(DetalleVenta).where(
-            DetalleVenta.id_venta == venta.id_venta,
-            DetalleVenta.status.in_([0, 1, 2])
+        render = _obtener_ticket_venta(session, id_venta)
+        return _responder_ticket(render, render.json, "application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al recrear ticket: {str(e)}"
         )
-        detalles = session.exec(statement_detalles).all()
-        
-        # Procesar productos con información extendida
-        productos = []
-        total_venta = Decimal("0.00")
-        
-        for det in detalles:
-            # Obtener información base del producto
-            producto_info = _procesar_producto_por_tipo(session, det)
-            
-            # Calcular precios desde DetalleVenta
-            precio_base = Decimal(str(det.precio_unitario)) if det.precio_unitario else Decimal("0.00")
-            precio_extra = Decimal(str(det.queso)) if det.queso else Decimal("0.00")
-            precio_total = precio_base + precio_extra
-            
-            # Enriquecer cada producto con precio_base y precio_extra
-            for prod in producto_info:
-                prod["precio_base"] = float(precio_base)
-                prod["precio_extra"] = float(precio_extra)
-                prod["precioUnitario"] = float(precio_total)
-                prod["conQueso"] = bool(det.queso)
-                
-                # Agregar IDs especiales si existen
-                if det.id_paquete:
-                    prod["id_paquete"] = det.id_paquete
-                if det.id_rec:
-                    prod["id_rec"] = det.id_rec
-                if det.id_barr:
-                    prod["id_barr"] = det.id_barr
-                
-                productos.append(prod)
-                total_venta += precio_total * det.cantidad
-        
-        total_items = sum(det.cantidad for det in detalles)
-        
-        respuesta = {
-            "id_venta": venta.id_venta,
-            "fecha_hora": venta.fecha_hora,
-            "cliente": nombre_cliente,
-            "telefono": telefono_cliente,
-            "tipo_servicio": venta.tipo_servicio,
-            "tipo_servicio_texto": {
-                0: "Comer aquí",
-                1: "Para llevar",
-                2: "Domicilio",
-                3: "Pedido Especial"
-            }.get(venta.tipo_servicio, "Desconocido"),
-            "mesa": venta.mesa if venta.tipo_servicio == 0 else None,
-            "sucursal": nombre_sucursal,
-            "status": venta.status,
-            "comentarios": venta.comentarios,
-            "status_texto": {
-                0: "Esperando",
-                1: "Preparando",
-                2: "Completado"
-            }.get(venta.status, "Desconocido"),
-            "cantidad_items": total_items,
-            "cantidad_productos_diferentes": len(detalles),
-            "total_venta": float(total_venta),
-            "productos": productos
-        }
-        
-        # Agregar dirección si existe
-        if direccion_info:
-            respuesta["direccion"] = direccion_info
-        
-        return respuesta    
+
+
+@router.get("/recrea-ticket/{id_venta}/escpos")
+def recrea_ticket_escpos(
+    id_venta: int,
+    session: Session = Depends(get_session),
+):
+    """El mismo ticket en bytes ESC/POS, listo para mandarlo a la impresora."""
+    try:
+        render = _obtener_ticket_venta(session, id_venta)
+        return _responder_ticket(render, render.escpos, "application/octet-stream")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error al recrear ticket: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+def _armar_ticket(session: Session, venta: Venta) -> dict:
+    """Ticket completo de la venta con precios (se guarda por versión de la venta)."""
+    # Cliente, sucursal, dirección y detalles en bloque, una consulta por tabla
+    datos = _cargar_datos_pedidos(session, [venta], status_detalles=[0, 1, 2], con_direcciones=True)
+    domicilio = datos["domicilios"].get(venta.id_venta)
+    pespecial = datos["especiales"].get(venta.id_venta)
+
+    # Obtener cliente según el tipo de servicio
+    nombre_cliente = _nombre_cliente_desde_datos(venta, domicilio, pespecial, datos["clientes"])
+    sucursal = datos["sucursales"].get(venta.id_suc)
+    nombre_sucursal = sucursal.nombre if sucursal else "Desconocida"
+
+    # Obtener datos del cliente y dirección según tipo de servicio
+    id_cliente = None
+    telefono_cliente = None
+    direccion_info = {}
+
+    if venta.tipo_servicio == 2:  # Domicilio
+        pedido = domicilio
+    elif venta.tipo_servicio == 3:  # Pedido Especial
+        pedido = pespecial
+    else:
+        pedido = None
+
+    if pedido:
+        id_cliente = pedido.id_clie
+        cliente = datos["clientes"].get(id_cliente)
+        telefono_cliente = cliente.telefono if cliente else None
+
+        direccion = datos["direcciones"].get(pedido.id_dir)
+        if direccion:
+            direccion_info = {
+                "id_dir": direccion.id_dir,
+                "calle": direccion.calle,
+                "manzana": direccion.manzana,
+                "lote": direccion.lote,
+                "colonia": direccion.colonia,
+                "referencia": direccion.referencia
+            }
+            if pedido is pespecial:
+                direccion_info["fecha_entrega"] = pespecial.fecha_entrega
+
+    detalles = datos["detalles"].get(venta.id_venta, [])
+
+    # Procesar productos con información extendida
+    productos = []
+    total_venta = Decimal("0.00")
+
+    for det in detalles:
+        # Obtener información base del producto
+        producto_info = _procesar_producto_por_tipo(session, det)
+
+        # Calcular precios desde DetalleVenta
+        precio_base = Decimal(str(det.precio_unitario)) if det.precio_unitario else Decimal("0.00")
+        precio_extra = Decimal(str(det.queso)) if det.queso else Decimal("0.00")
+        precio_total = precio_base + precio_extra
+
+        # Enriquecer cada producto con precio_base y precio_extra
+        for prod in producto_info:
+            prod["precio_base"] = float(precio_base)
+            prod["precio_extra"] = float(precio_extra)
+            prod["precioUnitario"] = float(precio_total)
+            prod["conQueso"] = bool(det.queso)
+
+            # Agregar IDs especiales si existen
+            if det.id_paquete:
+                prod["id_paquete"] = det.id_paquete
+            if det.id_rec:
+                prod["id_rec"] = det.id_rec
+            if det.id_barr:
+                prod["id_barr"] = det.id_barr
+
+            productos.append(prod)
+            total_venta += precio_total * det.cantidad
+
+    total_items = sum(det.cantidad for det in detalles)
+
+    respuesta = {
+        "id_venta": venta.id_venta,
+        "fecha_hora": venta.fecha_hora,
+        "cliente": nombre_cliente,
+        "telefono": telefono_cliente,
+        "tipo_servicio": venta.tipo_servicio,
+        "tipo_servicio_texto": {
+            0: "Comer aquí",
+            1: "Para llevar",
+            2: "Domicilio",
+            3: "Pedido Especial"
+        }.get(venta.tipo_servicio, "Desconocido"),
+        "mesa": venta.mesa if venta.tipo_servicio == 0 else None,
+        "sucursal": nombre_sucursal,
+        "status": venta.status,
+        "comentarios": venta.comentarios,
+        "status_texto": {
+            0: "Esperando",
+            1: "Preparando",
+            2: "Completado"
+        }.get(venta.status, "Desconocido"),
+        "cantidad_items": total_items,
+        "cantidad_productos_diferentes": len(detalles),
+        "total_venta": float(total_venta),
+        "productos": productos
+    }
+
+    # Agregar dirección si existe
+    if direccion_info:
+        respuesta["direccion"] = direccion_info
+
+    return respuesta
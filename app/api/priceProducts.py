@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from typing import List
+from fastapi import APIRouter, Depends, Request, Response
+from sqlmodel import Session
+from typing import List, Optional
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
 
@@ -15,298 +15,199 @@ from app.schemas.priceSchema import (PriceCostilla,
                                      PriceRefresco,
                                      PricePaquete,
                                      PriceMagno,
-                                     PricePizza)
+                                     PricePizza,
+                                     MenuCompleto)
 
-from app.models.especialidadModel import especialidad
-from app.models.tamanosPizzasModel import tamanosPizzas
-from app.models.tamanosRefrescosModel import tamanosRefrescos
+from app.api.refactors.menuSnapshot import obtener_menu, MENU_COMPLETO
 
-from app.models.costillasModel import costillas
-from app.models.alitasModel import alitas
-from app.models.hamburguesasModel import hamburguesas
-from app.models.spaguettyModel import spaguetty
-from app.models.papasModel import papas
-from app.models.rectangularModel import rectangular
-from app.models.barraModel import barra
-from app.models.mariscosModel import mariscos
-from app.models.refrescosModel import refrescos
-from app.models.paquetesModel import paquete
-from app.models.magnoModel import magno
-from app.models.pizzasModel import pizzas
 
-from app.models.ventaModel import Ingredientes
+router = APIRouter()
 
 
-router = APIRouter()
+def _elegir_codificacion(request: Request, disponibles) -> Optional[str]:
+    """Preferir br sobre gzip si el cliente los acepta (q > 0)."""
+    aceptadas = set()
+    for parte in request.headers.get("accept-encoding", "").split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        if parametros.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        aceptadas.add(nombre.strip().lower())
+    for codificacion in ("br", "gzip"):
+        if codificacion in disponibles and codificacion in aceptadas:
+            return codificacion
+    return None
+
+
+def _responder_menu(request: Request, session: Session, seccion: str) -> Response:
+    """Servir la sección desde el snapshot del menú; 304 si la terminal ya la tiene."""
+    snapshot = obtener_menu(session)
+    datos = snapshot.secciones[seccion]
+    codificacion = _elegir_codificacion(request, datos.comprimido)
+    # Cada representación lleva su propio ETag
+    etag = datos.etag if codificacion is None else f'"{datos.hash}-{codificacion}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "X-Menu-Version": snapshot.version,
+    }
+    if datos.comprimido:
+        headers["Vary"] = "Accept-Encoding"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etags = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+        if etag in etags or "*" in etags:
+            return Response(status_code=304, headers=headers)
+
+    if codificacion is None:
+        return Response(content=datos.contenido, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = codificacion
+    return Response(content=datos.comprimido[codificacion], media_type="application/json", headers=headers)
+
 
 @router.get("/hamburguesas", response_model=List[priceHamburguesa])
-async def get_price_hamburguesas(
+def get_price_hamburguesas(
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    statement = (
-        select(hamburguesas.id_hamb, hamburguesas.paquete.label("nombre"), hamburguesas.precio)
-        .order_by(hamburguesas.id_hamb)
-    )
-    result = session.exec(statement).all()
-    return [priceHamburguesa(
-        id_hamb=r.id_hamb,
-        nombre=r.nombre,
-        precio=r.precio
-    ) for r in result]
+    return _responder_menu(request, session, "hamburguesas")
 
 
 @router.get("/alitas", response_model=List[PriceAlita])
-async def get_price_alitas(
+def get_price_alitas(
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    statement = (
-        select(alitas.id_alis, alitas.orden.label("nombre"), alitas.precio)
-        .order_by(alitas.id_alis)
-    )
-    result = session.exec(statement).all()
-    return [PriceAlita(
-        id_alis=r.id_alis,
-        nombre=r.nombre,
-        precio=r.precio
-    ) for r in result]
+    return _responder_menu(request, session, "alitas")
 
 
 @router.get("/costillas", response_model=List[PriceCostilla])
-async def get_price_costillas(
+def get_price_costillas(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(costillas.id_cos, costillas.orden.label("nombre"), costillas.precio)
-        .order_by(costillas.id_cos)
-    )
-    result = session.exec(statement).all()
-    return [PriceCostilla(
-        id_cos=r.id_cos,
-        nombre=r.nombre,
-        precio=r.precio
-    ) for r in result]
-    
+    return _responder_menu(request, session, "costillas")
+
 
 @router.get("/spaguetty", response_model=List[PriceSpaghetti])
-async def get_price_spaguetty(
+def get_price_spaguetty(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(spaguetty.id_spag, spaguetty.orden.label("nombre"), spaguetty.precio)
-        .order_by(spaguetty.id_spag)
-    )
-    result = session.exec(statement).all()
-    return [PriceSpaghetti(
-        id_spag=r.id_spag,
-        nombre=r.nombre,
-        precio=r.precio
-    ) for r in result]
-    
+    return _responder_menu(request, session, "spaguetty")
+
+
 @router.get("/papas", response_model=List[PricePapas])
-async def get_price_papas(
+def get_price_papas(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(papas.id_papa, papas.orden.label("nombre"), papas.precio)
-        .order_by(papas.id_papa)
-    )
-    result = session.exec(statement).all()
-    return [PricePapas(
-        id_papa=r.id_papa,
-        nombre=r.nombre,
-        precio=r.precio
-    ) for r in result]
-    
+    return _responder_menu(request, session, "papas")
+
+
 @router.get("/rectangular", response_model=List[PriceRectangular])
-async def get_price_rectangular(
+def get_price_rectangular(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(rectangular.id_rec, especialidad.nombre.label("nombre"), rectangular.precio)
-        .join(especialidad, rectangular.id_esp == especialidad.id_esp)
-        .order_by(especialidad.nombre)
-    )
-    result = session.exec(statement).all()
-    return [PriceRectangular(
-        id_rec=r.id_rec,
-        nombre=r.nombre,
-        precio=r.precio
-    ) for r in result]
-    
+    return _responder_menu(request, session, "rectangular")
+
+
 @router.get("/barra", response_model=List[PriceBarra])
-async def get_price_barra(
+def get_price_barra(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(barra.id_barr, especialidad.nombre.label("nombre"), barra.precio)
-        .join(especialidad, barra.id_especialidad == especialidad.id_esp)
-        .order_by(especialidad.nombre)
-    )
-    result = session.exec(statement).all()
-    return [PriceBarra(
-        id_barr=r.id_barr,
-        nombre=r.nombre,
-        precio=r.precio
-    ) for r in result]
-    
+    return _responder_menu(request, session, "barra")
+
+
 @router.get("/mariscos", response_model=List[PriceMarisco])
-async def get_price_mariscos(
+def get_price_mariscos(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(mariscos.id_maris, mariscos.nombre, tamanosPizzas.precio, tamanosPizzas.tamano)
-        .join(tamanosPizzas, mariscos.id_tamañop == tamanosPizzas.id_tamañop)
-        .order_by(mariscos.id_maris)
-    )
-    result = session.exec(statement).all()
-    return [PriceMarisco(
-        id_maris=r.id_maris,
-        nombre=r.nombre,
-        precio=r.precio,
-        tamano=r.tamano.replace(" Camaron", "").replace("Mar", "")
-    ) for r in result]
+    return _responder_menu(request, session, "mariscos")
+
 
 @router.get("/refrescos", response_model=List[PriceRefresco])
-async def get_price_refrescos(
+def get_price_refrescos(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(refrescos.id_refresco, refrescos.nombre, tamanosRefrescos.precio, tamanosRefrescos.tamano)
-        .join(tamanosRefrescos, refrescos.id_tamano == tamanosRefrescos.id_tamano)
-        .order_by(refrescos.id_refresco)
-        .where(refrescos.nombre != "Jarrito")
-    )
-    result = session.exec(statement).all()
-    return [PriceRefresco(
-        id_refresco=r.id_refresco,
-        nombre=r.nombre,
-        precio=r.precio,
-        tamano=r.tamano
-    ) for r in result]
-    
-    
+    return _responder_menu(request, session, "refrescos")
+
+
 @router.get("/paquetes", response_model=List[PricePaquete])
-async def get_price_paquete1(
+def get_price_paquete1(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(paquete.id_paquete, paquete.nombre, paquete.precio)
-        .order_by(paquete.id_paquete)
-    )
-    result = session.exec(statement).all()
-    return [PricePaquete(
-        id_paquete=r.id_paquete,
-        nombre=r.nombre,
-        precio=r.precio
-    ) for r in result]
+    return _responder_menu(request, session, "paquetes")
 
 
 @router.get("/magno", response_model=List[PriceMagno])
-async def get_price_magno(
+def get_price_magno(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(magno.id_magno, especialidad.nombre.label("nombre"), magno.precio)
-        .join(especialidad, magno.id_especialidad == especialidad.id_esp)
-        .order_by(especialidad.nombre)
-    
-    )
-    result = session.exec(statement).all()
-    return [PriceMagno(
-        id_magno=r.id_magno,
-        nombre=r.nombre,
-        precio=r.precio
-    ) for r in result]
+    return _responder_menu(request, session, "magno")
+
 
 @router.get("/pizzas", response_model=List[PricePizza])
-async def get_price_pizzas(
+def get_price_pizzas(
+    request: Request,
     session: Session = Depends(get_session),
     _: None = Depends(require_permission("ver_venta"))
 ):
-    statement = (
-        select(pizzas.id_pizza, especialidad.nombre.label("nombre"), tamanosPizzas.precio, tamanosPizzas.tamano)
-        .join(especialidad, pizzas.id_esp == especialidad.id_esp)
-        .join(tamanosPizzas, pizzas.id_tamano == tamanosPizzas.id_tamañop)
-        .order_by(especialidad.nombre)
-    
-    )
-    result = session.exec(statement).all()
-    return [PricePizza(
-        id_pizza=r.id_pizza,
-        nombre=r.nombre,
-        precio=r.precio,
-        tamano=r.tamano.replace(" Especial", "")
-    ) for r in result]
-
+    return _responder_menu(request, session, "pizzas")
 
 
 @router.get("/descripciones", response_model=List[dict])
-async def get_descriptions(
+def get_descriptions(
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    statement = select(especialidad.nombre, especialidad.descripcion).order_by(especialidad.id_esp)
-    result = session.exec(statement).all()
-
-    statement2 = select(mariscos.nombre, mariscos.descripcion).order_by(mariscos.id_maris)
-    result2 = session.exec(statement2).all()
+    return _responder_menu(request, session, "descripciones")
 
-    combined_results = [
-        {"nombre": r.nombre, "descripcion": r.descripcion} for r in result
-    ] + [
-        {"nombre": r.nombre, "descripcion": r.descripcion} for r in result2
-    ]
-
-    return combined_results
 
 @router.get("/ingredientes", response_model=List[dict])
-async def get_ingredientes(
+def get_ingredientes(
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    statement = select(Ingredientes).order_by(Ingredientes.id_ingrediente)
-    result = session.exec(statement).all()
-
-    return [
-        {"id_ingrediente": r.id_ingrediente, "nombre": r.ingrediente} for r in result
-    ]
+    return _responder_menu(request, session, "ingredientes")
 
 
 @router.get("/tamanosPizzas", response_model=List[dict])
-async def get_tamanos_pizzas(
+def get_tamanos_pizzas(
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    statement = (
-        select(tamanosPizzas.id_tamañop, tamanosPizzas.tamano, tamanosPizzas.precio)
-        .where(tamanosPizzas.tamano.contains("Especial"))
-        .order_by(tamanosPizzas.id_tamañop)
-    )
-    result = session.exec(statement).all()
-
-    return [
-        {
-            "id_tamañop": r.id_tamañop,
-            "tamano": r.tamano.replace(" Especial", ""),
-            "precio": r.precio
-        }
-        for r in result
-    ]
+    return _responder_menu(request, session, "tamanosPizzas")
 
 
 @router.get("/especialidades", response_model=List[dict])
-async def get_especialidades(
+def get_especialidades(
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    statement = select(especialidad.id_esp, especialidad.nombre, especialidad.descripcion).order_by(especialidad.id_esp)
-    result = session.exec(statement).all()
+    return _responder_menu(request, session, "especialidades")
+
 
-    return [
-        {"id_esp": r.id_esp, "nombre": r.nombre, "descripcion": r.descripcion} for r in result
-    ]
\ No newline at end of file
+@router.get("/menu", response_model=MenuCompleto)
+def get_menu_completo(
+    request: Request,
+    session: Session = Depends(get_session),
+    _: None = Depends(require_permission("ver_venta"))
+):
+    """Todo el menú en una sola respuesta, comprimida si el cliente lo acepta."""
+    return _responder_menu(request, session, MENU_COMPLETO)
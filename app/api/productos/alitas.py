@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, ALITAS
 
 from app.models.alitasModel import alitas as Alita
 from app.schemas.alitasSchema import readAlitasOut, createAlitas
@@ -60,6 +61,7 @@ def updateAlitas(id_alis: int, alitas: createAlitas, session: Session = Depends(
     session.add(alita)
     session.commit()
     session.refresh(alita)
+    invalidar_catalogo(ALITAS, id_alis)
     return {"message": "Alitas actualizadas correctamente"}
 
 
@@ -77,6 +79,7 @@ def createAlitas(
     session.add(alita)
     session.commit()
     session.refresh(alita)
+    invalidar_catalogo(ALITAS, alita.id_alis)
     return {"message": "Alitas registradas correctamente"}
 
 
@@ -91,4 +94,5 @@ def deleteAlitas(
         return {"message": "Alitas no encontradas"}
     session.delete(alita)
     session.commit()
+    invalidar_catalogo(ALITAS, id_alis)
     return {"message": "Alitas eliminadas correctamente"}
\ No newline at end of file
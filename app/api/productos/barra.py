@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, BARRA
 
 from app.models.barraModel import barra
 from app.schemas.barraSchema import readBarraOut, createBarra
@@ -58,6 +59,7 @@ def updateBarra(id_barr: int, barra_data: createBarra, session: Session = Depend
     session.add(barra_item)
     session.commit()
     session.refresh(barra_item)
+    invalidar_catalogo(BARRA, id_barr)
     return {"message": "Producto de barra actualizado correctamente"}
 
 @router.post("/")
@@ -70,6 +72,7 @@ def createBarraItem(barra_data: createBarra, session: Session = Depends(get_sess
     session.add(new_barra)
     session.commit()
     session.refresh(new_barra)
+    invalidar_catalogo(BARRA, new_barra.id_barr)
 
     return {"message": "Producto de barra creado correctamente"}
     
@@ -80,4 +83,5 @@ def deleteBarra(id_barr: int, session: Session = Depends(get_session), _: None =
         return {"message": "Producto de barra no encontrado"}
     session.delete(barra_item)
     session.commit()
+    invalidar_catalogo(BARRA, id_barr)
     return {"message": "Producto de barra eliminado correctamente"}
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, COSTILLAS
 
 from app.models.costillasModel import costillas
 from app.schemas.costillasSchema import readCostillasOut, createCostillas
@@ -60,6 +61,7 @@ def updateCostillas(id_cos: int, costilla_data: createCostillas, session: Sessio
     session.add(costilla)
     session.commit()
     session.refresh(costilla)
+    invalidar_catalogo(COSTILLAS, id_cos)
     
     return {"message": "Costillas actualizadas correctamente"}
 
@@ -74,6 +76,7 @@ def createCostilla(costilla: createCostillas, session: Session = Depends(get_ses
     session.add(cost)
     session.commit()
     session.refresh(cost)
+    invalidar_catalogo(COSTILLAS, cost.id_cos)
     return {"message": "Costilla registrada orrectamente"}
 
 
@@ -84,4 +87,5 @@ def deleteCostillas(id_cos: int, session: Session = Depends(get_session), _: Non
         return {"message": "Costillas no encontradas"}
     session.delete(costilla)
     session.commit()
+    invalidar_catalogo(COSTILLAS, id_cos)
     return {"message": "Costillas eliminadas correctamente"}
@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, ESPECIALIDAD
 
 
 from app.models.especialidadModel import especialidad
@@ -40,6 +41,7 @@ def updateEspecialidad(id_esp: int, especialidad_data: createEspecialidad, sessi
     session.add(especialidad_item)
     session.commit()
     session.refresh(especialidad_item)
+    invalidar_catalogo(ESPECIALIDAD, id_esp)
     
     return {"message": "Especialidad actualizada correctamente"}
 
@@ -53,6 +55,7 @@ def createEspecialidades(especialidad_data: createEspecialidad, session: Session
     session.add(nueva_especialidad)
     session.commit()
     session.refresh(nueva_especialidad)
+    invalidar_catalogo(ESPECIALIDAD, nueva_especialidad.id_esp)
     return {"message": "Especialidad registrada correctamente"}
 
 
@@ -63,5 +66,6 @@ def deleteEspecialidad(id_esp: int, session: Session = Depends(get_session), _:
         return {"message": "Especialidad no encontrada"}
     session.delete(especialidad_item)
     session.commit()
+    invalidar_catalogo(ESPECIALIDAD, id_esp)
     return {"message": "Especialidad eliminada correctamente"}
 
@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, HAMBURGUESA
 
 from app.models.hamburguesasModel import hamburguesas
 from app.schemas.hamburguesasSchema import createHamburguesas, readHamburguesasOut
@@ -56,6 +57,7 @@ def updateHamburguesa(id_hamb: int, hamburguesa_data: createHamburguesas, sessio
     session.add(hamburguesa_item)
     session.commit()
     session.refresh(hamburguesa_item)
+    invalidar_catalogo(HAMBURGUESA, id_hamb)
     
     return {"message": "Hamburguesa actualizada correctamente"}
 
@@ -69,6 +71,7 @@ def createHamburguesa(hamburguesa_data: createHamburguesas, session: Session = D
     session.add(nueva_hamburguesa)
     session.commit()
     session.refresh(nueva_hamburguesa)
+    invalidar_catalogo(HAMBURGUESA, nueva_hamburguesa.id_hamb)
     return {"message": "Hamburguesa registrada correctamente"}
 
 @router.delete("/{id_hamb}")
@@ -79,5 +82,6 @@ def deleteHamburguesa(id_hamb: int, session: Session = Depends(get_session), _:
         return {"message": "Hamburguesa no encontrada"}
     session.delete(hamburguesa_item)
     session.commit()
+    invalidar_catalogo(HAMBURGUESA, id_hamb)
     return {"message": "Hamburguesa eliminada correctamente"}
 
@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, MAGNO
 
 from app.models.magnoModel import magno
 from app.schemas.magnoSchema import readMagnoOut, createMagno
@@ -58,6 +59,7 @@ def updateMagno(id_magno: int, mag: createMagno, session: Session = Depends(get_
     session.add(magno_item)
     session.commit()
     session.refresh(magno_item)
+    invalidar_catalogo(MAGNO, id_magno)
     return {"message": "Magno actualizado correctamente"}
 
 @router.post("/")
@@ -70,6 +72,7 @@ def createMagnos(mag: createMagno, session: Session = Depends(get_session), _: N
     session.add(magno_item)
     session.commit()
     session.refresh(magno_item)
+    invalidar_catalogo(MAGNO, magno_item.id_magno)
     return {"message" : "Magno registrado correctamente"}
 
 @router.delete("/{id_magno}")
@@ -79,4 +82,5 @@ def deleteMagno(id_magno: int, session: Session = Depends(get_session), _: None
         return {"message": "Magno no encontrado"}
     session.delete(magno_item)
     session.commit()
+    invalidar_catalogo(MAGNO, id_magno)
     return {"message": "Magno eliminado correctamente"}
\ No newline at end of file
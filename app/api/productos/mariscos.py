@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, MARISCOS
 
 from app.models.mariscosModel import mariscos
 from app.schemas.mariscosSchema import readMariscosOut, createMariscos
@@ -71,6 +72,7 @@ def update_mariscos(id_maris: int, mariscos_data: createMariscos, session: Sessi
     session.add(marisco)
     session.commit()
     session.refresh(marisco)
+    invalidar_catalogo(MARISCOS, id_maris)
     return {"message": "Mariscos actualizados correctamente"}
 
 @router.post("/")
@@ -84,6 +86,7 @@ def create_mariscos(mariscos_data: createMariscos, session: Session = Depends(ge
     session.add(marisco)
     session.commit()
     session.refresh(marisco)
+    invalidar_catalogo(MARISCOS, marisco.id_maris)
     return {"message": "Mariscos registrados correctamente"}
 
 @router.delete("/{id_maris}")
@@ -93,4 +96,5 @@ def delete_mariscos(id_maris: int, session: Session = Depends(get_session), _: N
         return {"message": "Mariscos no encontrados"}
     session.delete(marisco)
     session.commit()
+    invalidar_catalogo(MARISCOS, id_maris)
     return {"message": "Mariscos eliminados correctamente"}
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, PAPAS
 
 from app.models.papasModel import papas
 from app.schemas.papasSchema import readPapasOut, createPapas
@@ -55,6 +56,7 @@ def updatePapas(id_papa: int, papas_data: createPapas, session: Session = Depend
     session.add(papa)
     session.commit()
     session.refresh(papa)
+    invalidar_catalogo(PAPAS, id_papa)
     return {"message": "Papas actualizadas correctamente"}
 
 @router.post("/")
@@ -67,6 +69,7 @@ def createPapasEndpoint(papas_data: createPapas, session: Session = Depends(get_
     session.add(new_papa)
     session.commit()
     session.refresh(new_papa)
+    invalidar_catalogo(PAPAS, new_papa.id_papa)
     return {"message": "Papas creadas correctamente"}
 
 @router.delete("/{id_papa}")
@@ -76,4 +79,5 @@ def deletePapas(id_papa: int, session: Session = Depends(get_session), _: None =
         return {"message": "Papas no encontradas"}
     session.delete(papa)
     session.commit()
+    invalidar_catalogo(PAPAS, id_papa)
     return {"message": "Papas eliminadas correctamente"}
\ No newline at end of file
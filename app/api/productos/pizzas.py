@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, PIZZA
 
 
 from app.models.pizzasModel import pizzas
@@ -41,6 +42,7 @@ def createNewPizza(pizza: createPizza, session: Session = Depends(get_session),
     session.add(new_pizza)
     session.commit()
     session.refresh(new_pizza)
+    invalidar_catalogo(PIZZA, new_pizza.id_pizza)
     return {"message": "Pizza creada correctamente"}
 
 @router.put("/{id_pizza}")
@@ -54,6 +56,7 @@ def updatePizza(id_pizza: int, pizza: createPizza, session: Session = Depends(ge
     session.add(pizza_item)
     session.commit()
     session.refresh(pizza_item)
+    invalidar_catalogo(PIZZA, id_pizza)
     return {"message": "Pizza actualizada correctamente"}
 
 @router.delete("/{id_pizza}")
@@ -63,6 +66,7 @@ def deletePizza(id_pizza: int, session: Session = Depends(get_session), _: None
         return {"message": "Pizza no encontrada"}
     session.delete(pizza_item)
     session.commit()
+    invalidar_catalogo(PIZZA, id_pizza)
     return {"message": "Pizza eliminada correctamente"}
 
 @router.get("/{id_pizza}", response_model=readPizzasOut)
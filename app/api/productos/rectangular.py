@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, RECTANGULAR
 
 from app.models.rectangularModel import rectangular 
 from app.schemas.rectangularSchema import readRectangularOut, createRectangular
@@ -61,6 +62,7 @@ def updateRectangular(id_rec: int, rectangular_data: createRectangular, session:
     session.add(rectangular_item)
     session.commit()
     session.refresh(rectangular_item)
+    invalidar_catalogo(RECTANGULAR, id_rec)
     return {"message": "Rectangular actualizado correctamente"}
 
 @router.post("/")
@@ -73,6 +75,7 @@ def createRectangulares(rectangular_data: createRectangular, session: Session =
     session.add(new_rectangular)
     session.commit()
     session.refresh(new_rectangular)
+    invalidar_catalogo(RECTANGULAR, new_rectangular.id_rec)
     return {"message": "Rectangular creado correctamente"}
 
 @router.delete("/{id_rec}")
@@ -83,4 +86,5 @@ def deleteRectangular(id_rec: int, session: Session = Depends(get_session), _: N
     
     session.delete(rectangular_item)
     session.commit()
+    invalidar_catalogo(RECTANGULAR, id_rec)
     return {"message": "Rectangular eliminado correctamente"}
\ No newline at end of file
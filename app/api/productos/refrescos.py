@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, REFRESCO
 
 from app.models.refrescosModel import refrescos
 from app.schemas.refrescosSchema import createRefrescos, readRefrescosOut
@@ -57,6 +58,7 @@ def updateRefresco(id_refresco: int, refresco: createRefrescos, session: Session
     session.add(refri)
     session.commit()
     session.refresh(refri)
+    invalidar_catalogo(REFRESCO, id_refresco)
     return {"message": "Refresco actualizado correctamente"}
 
 @router.post("/")
@@ -69,6 +71,7 @@ def createRefresco(refresco: createRefrescos, session: Session = Depends(get_ses
     session.add(refri)
     session.commit()
     session.refresh(refri)
+    invalidar_catalogo(REFRESCO, refri.id_refresco)
     return {"message" : "Refresco registrado correctamente"}
 
 @router.delete("/{id_refresco}")
@@ -78,4 +81,5 @@ def deleteRefresco(id_refresco: int, session: Session = Depends(get_session), _:
         return {"message": "Refresco no encontrado"}
     session.delete(refri)
     session.commit()
+    invalidar_catalogo(REFRESCO, id_refresco)
     return {"message": "Refresco eliminado correctamente"}
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, SPAGUETTY
 
 from app.models.spaguettyModel import spaguetty
 from app.schemas.spaguettySchema import readSpaguettyOut, createSpaguetty
@@ -55,6 +56,7 @@ def updateSpaguetty(id_spag: int, spaguetty_data: createSpaguetty, session: Sess
     session.add(spag)
     session.commit()
     session.refresh(spag)
+    invalidar_catalogo(SPAGUETTY, id_spag)
     return {"message": "Spaguetty actualizado correctamente"}
 
 @router.post("/", response_model=createSpaguetty)
@@ -67,6 +69,7 @@ def createSpaguettyItem(spaguetty_data: createSpaguetty, session: Session = Depe
     session.add(new_spag)
     session.commit()
     session.refresh(new_spag)
+    invalidar_catalogo(SPAGUETTY, new_spag.id_spag)
     return new_spag
 
 @router.delete("/{id_spag}")
@@ -76,4 +79,5 @@ def deleteSpaguetty(id_spag: int, session: Session = Depends(get_session), _: No
         return {"message": "Spaguetty no encontrado"}
     session.delete(spag)
     session.commit()
+    invalidar_catalogo(SPAGUETTY, id_spag)
     return {"message": "Spaguetty eliminado correctamente"}
\ No newline at end of file
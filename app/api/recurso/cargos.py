@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
-from app.core.permissions import require_permission, require_any_permission
+from app.core.permissions import require_permission, require_any_permission, invalidar_permisos_cargo
 
 from app.models.cargoModel import Cargos
 
@@ -255,6 +255,7 @@ def updateCargoConPermisos(
     session.add(permiso)
     session.commit()
     session.refresh(permiso)
+    invalidar_permisos_cargo(id_ca)
     
     return {"Message":"Actualizado exitosamente"}
     
@@ -287,5 +288,6 @@ def deleteCargoConPermisos(
     
     session.delete(cargo)
     session.commit()
+    invalidar_permisos_cargo(id_ca)
     
     return {"message": "Cargo y permisos eliminados correctamente"}
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.dimensionesCache import invalidar_dimensiones
 
 from app.models.sucursalModel import Sucursal
 from app.schemas.sucursalSchema import readSucursal, createSucursal
@@ -50,6 +51,7 @@ def createSucursales(sucursal: createSucursal, session: Session = Depends(get_se
     session.add(statement)
     session.commit()
     session.refresh(statement)
+    invalidar_dimensiones()
     return {"message": "Sucursal creada con exito"}
 
 
@@ -60,6 +62,7 @@ def deleteSucursal(id_suc: int, session: Session = Depends(get_session), _: None
         return {"Message": "Sucursal no encontrada"}
     session.delete(statement)
     session.commit()
+    invalidar_dimensiones()
     return {"Message": "Sucursal Eliminada"}
 
 
@@ -75,4 +78,5 @@ def updateSucursal(sucursal: createSucursal, id_suc: int, session: Session = Dep
     session.add(statement)
     session.commit()
     session.refresh(statement)
+    invalidar_dimensiones()
     return {"Message": "Sucursal actualizada correctamente"}
\ No newline at end of file
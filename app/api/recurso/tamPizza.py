@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, TAMANO_PIZZA
 
 from app.models.tamanosPizzasModel import tamanosPizzas
 from app.schemas.tamanosPizzaSchema import createTamanosPizza, readTamanosPizza
@@ -33,6 +34,7 @@ def createTamanosPizzas(tam_data: createTamanosPizza, session: Session = Depends
     session.add(new_tamano)
     session.commit()
     session.refresh(new_tamano)
+    invalidar_catalogo(TAMANO_PIZZA, new_tamano.id_tamañop)
     return {"message": "Tamaño creado"}
 
 @router.put("/{id_tamanop}")
@@ -45,6 +47,7 @@ def updateTamanosPizzas(id_tamanop: int, tam_data: createTamanosPizza, session:
     session.add(existe)
     session.commit()
     session.refresh(existe)
+    invalidar_catalogo(TAMANO_PIZZA, id_tamanop)
     return {"message": "Tamaño actualizado"}
 
 @router.delete("/{id_tamanop}")
@@ -54,4 +57,5 @@ def deleteTamanosPizzas(id_tamanop: int, session: Session = Depends(get_session)
         raise HTTPException(status_code=404, detail="Tamaño no encontrado")
     session.delete(existe)
     session.commit()
+    invalidar_catalogo(TAMANO_PIZZA, id_tamanop)
     return {"message": "Tamaño eliminado"}
\ No newline at end of file
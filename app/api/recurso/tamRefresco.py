@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from typing import List
 from app.db.session import get_session
 from app.core.permissions import require_permission, require_any_permission
+from app.api.refactors.cachedDef import invalidar_catalogo, TAMANO_REFRESCO
 
 from app.models.tamanosRefrescosModel import tamanosRefrescos
 from app.schemas.tamanosRefrescosSchema import createTamanosRefrescos, readTamanosRefrescos
@@ -33,6 +34,7 @@ def createTamanosRefresco(tam_data: createTamanosRefrescos, session: Session = D
     session.add(new_tamano)
     session.commit()
     session.refresh(new_tamano)
+    invalidar_catalogo(TAMANO_REFRESCO, new_tamano.id_tamano)
     return {"message": "Tamaño creado"}
 
 @router.put("/{id_tamano}")
@@ -45,6 +47,7 @@ def updateTamanosRefrescos(id_tamano: int, tam_data: createTamanosRefrescos, ses
     session.add(existe)
     session.commit()
     session.refresh(existe)
+    invalidar_catalogo(TAMANO_REFRESCO, id_tamano)
     return {"message": "Tamaño actualizado"}
 
 @router.delete("/{id_tamano}")
@@ -54,4 +57,5 @@ def deleteTamanosRefrescos(id_tamano: int, session: Session = Depends(get_sessio
         raise HTTPException(status_code=404, detail="Tamaño no encontrado")
     session.delete(existe)
     session.commit()
+    invalidar_catalogo(TAMANO_REFRESCO, id_tamano)
     return {"message": "Tamaño eliminado"}
\ No newline at end of file
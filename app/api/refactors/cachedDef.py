@@ -1,128 +1,403 @@
 """
 Módulo de funciones cacheadas para reducir consultas a base de datos.
-Utiliza caché manual basado en IDs de productos y objetos con TTL de 5 días.
-Thread-safe para FastAPI async.
+Una sola caché de catálogo (LRU acotada con TTL) con llave (tipo, id) del producto;
+la cantidad y el status del detalle se agregan al armar la respuesta.
+CatalogoPlano es una copia de todo el catálogo en listas indexadas por id, para
+resolver los renglones de la cocina (ver _procesar_producto_por_tipo); incluye los
+nombres de Ingredientes de las pizzas personalizadas y de /prices/ingredientes.
+Los routers de app/api/productos llaman a invalidar_catalogo después de cada escritura,
+lo que también descarta el snapshot del menú de /prices y avisa a los demás workers
+(ver app/core/invalidacion.py), que descartan todo su catálogo. Ingredientes no tiene
+endpoints de escritura: sus nombres se recargan cada INGREDIENTES_TTL.
+Thread-safe para las rutas que FastAPI ejecuta en el threadpool.
 """
-import asyncio
-from typing import Dict, Any, Optional, List, Tuple
-from sqlmodel import Session, select
+import os
 import json
-from datetime import datetime, timedelta
-
-# Importar Lock para thread safety
+import time
 from threading import Lock
+from typing import Dict, Any, Optional, List, Callable
+from sqlmodel import Session, select
+from dotenv import load_dotenv
+
+from app.core.cache import TTLCache
+from app.core.invalidacion import TEMA_CATALOGO, publicar, suscribir
+from app.api.refactors.menuSnapshot import invalidar_menu
+from app.models.especialidadModel import especialidad
+from app.models.tamanosPizzasModel import tamanosPizzas
+from app.models.tamanosRefrescosModel import tamanosRefrescos
+from app.models.pizzasModel import pizzas
+from app.models.hamburguesasModel import hamburguesas
+from app.models.costillasModel import costillas
+from app.models.alitasModel import alitas
+from app.models.spaguettyModel import spaguetty
+from app.models.papasModel import papas
+from app.models.mariscosModel import mariscos
+from app.models.refrescosModel import refrescos
+from app.models.magnoModel import magno
+from app.models.rectangularModel import rectangular
+from app.models.barraModel import barra
+from app.models.ventaModel import Ingredientes
+
+load_dotenv()
+
+CATALOGO_CACHE_TTL = int(os.getenv("CATALOGO_CACHE_TTL", str(5 * 24 * 3600)))
+CATALOGO_CACHE_MAX = int(os.getenv("CATALOGO_CACHE_MAX", "4096"))
+CATALOGO_CACHE_MAX_BYTES = int(os.getenv("CATALOGO_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+# Los ingredientes se editan directo en BD y nadie invalida el catálogo; su índice no
+# puede esperar a CATALOGO_CACHE_TTL
+INGREDIENTES_TTL = int(os.getenv("INGREDIENTES_TTL", "3600"))
+
+
+# ==================== CACHÉ DE CATÁLOGO ====================
+
+# Tipos de entrada del catálogo (primer elemento de la llave)
+ESPECIALIDAD = "especialidad"
+TAMANO_PIZZA = "tamano_pizza"
+TAMANO_REFRESCO = "tamano_refresco"
+INGREDIENTE = "ingrediente"
+PIZZA = "pizza"
+HAMBURGUESA = "hamburguesa"
+COSTILLAS = "costillas"
+ALITAS = "alitas"
+SPAGUETTY = "spaguetty"
+PAPAS = "papas"
+MARISCOS = "mariscos"
+REFRESCO = "refresco"
+MAGNO = "magno"
+RECTANGULAR = "rectangular"
+BARRA = "barra"
+
+# Entradas cuyo nombre se arma con otra tabla del catálogo
+_DEPENDIENTES = {
+    ESPECIALIDAD: (PIZZA, MAGNO, RECTANGULAR, BARRA),
+    TAMANO_PIZZA: (PIZZA, MARISCOS),
+    TAMANO_REFRESCO: (REFRESCO,),
+}
+
+# Marca para productos que no existen (la caché regresa None en un miss)
+_NO_ENCONTRADO = object()
+
+_catalogo = TTLCache(ttl_seconds=CATALOGO_CACHE_TTL, maxsize=CATALOGO_CACHE_MAX,
+                     maxbytes=CATALOGO_CACHE_MAX_BYTES, nombre="catalogo")
+
+# Se incrementa en cada invalidación; una carga que empezó antes no se guarda
+_generacion = 0
+_generacion_lock = Lock()
+
+
+def invalidar_catalogo(tipo: str, id_producto: Optional[int] = None):
+    """
+    Quitar del catálogo un producto (o todo un tipo si no se da id) y las entradas
+    que dependen de él, p. ej. renombrar una especialidad invalida pizzas y magnos.
+    """
+    global _generacion, _plano
+    with _generacion_lock:
+        _generacion += 1
+        _plano = None
+    if id_producto is None:
+        _catalogo.delete_where(lambda key: key[0] == tipo)
+    else:
+        _catalogo.delete((tipo, id_producto))
+    for dependiente in _DEPENDIENTES.get(tipo, ()):
+        _catalogo.delete_where(lambda key, dependiente=dependiente: key[0] == dependiente)
+    # Los precios de /prices salen del mismo catálogo
+    invalidar_menu()
+    publicar(TEMA_CATALOGO)
+
+
+def generacion_catalogo() -> int:
+    """Cambia con cada invalidación; sirve de llave para lo que se arma con nombres del catálogo."""
+    return _generacion
+
+
+def _obtener(session: Session, tipo: str, id_producto: Any, cargar: Callable[[Session, Any], Any]) -> Any:
+    key = (tipo, id_producto)
+    valor = _catalogo.get(key)
+    if valor is None:
+        generacion = _generacion
+        valor = cargar(session, id_producto)
+        if valor is None:
+            valor = _NO_ENCONTRADO
+        if generacion == _generacion:
+            _catalogo.set(key, valor)
+    return None if valor is _NO_ENCONTRADO else valor
+
+
+# ==================== ENTRADAS DEL CATÁLOGO ====================
+
+def _limpiar_tamano(tamano: str) -> str:
+    return tamano.replace(" Especial", "").replace(" Camaron", "").replace(" Mar", "")
+
+
+def _entrada_pizza(session: Session, producto: pizzas) -> Dict[str, Any]:
+    nombre_especialidad = get_especialidad_nombre(session, producto.id_esp)
+    nombre_tamano = get_tamano_pizza_nombre(session, producto.id_tamano)
+    return {
+        "nombre": f"{nombre_especialidad} - {nombre_tamano}",
+        "especialidad": nombre_especialidad,
+        "tamano": nombre_tamano,
+    }
+
+
+def _entrada_mariscos(session: Session, producto: mariscos) -> Dict[str, Any]:
+    if producto.id_tamañop:
+        tamano_marisco = get_tamano_pizza_nombre(session, producto.id_tamañop)
+    else:
+        tamano_marisco = "Tamaño desconocido"
+    return {"nombre": f"{producto.nombre} - {tamano_marisco}", "tamano": tamano_marisco}
 
-# ==================== ESTRUCTURA DE CACHÉ CON TTL Y THREAD SAFETY ====================
-class TTLCache:
-    def __init__(self, ttl_days: int = 5):
-        self.cache: Dict[Any, Tuple[Any, datetime]] = {}
-        self.ttl = timedelta(days=ttl_days)
-        self._lock = Lock()  # Lock para thread safety
-    
-    def get(self, key: Any) -> Optional[Any]:
-        with self._lock:
-            if key in self.cache:
-                value, timestamp = self.cache[key]
-                if datetime.now() - timestamp < self.ttl:
-                    return value
-                else:
-                    # Eliminar entrada expirada
-                    del self.cache[key]
-            return None
-    
-    def set(self, key: Any, value: Any):
-        with self._lock:
-            self.cache[key] = (value, datetime.now())
-    
-    def clear(self):
-        with self._lock:
-            self.cache.clear()
-    
-    def cleanup_expired(self):
-        """Eliminar entradas expiradas manualmente si es necesario"""
-        with self._lock:
-            expired_keys = []
-            now = datetime.now()
-            for key, (value, timestamp) in self.cache.items():
-                if now - timestamp >= self.ttl:
-                    expired_keys.append(key)
-            
-            for key in expired_keys:
-                del self.cache[key]
-
-# ==================== INSTANCIAS DE CACHÉ CON TTL ====================
-_cache_especialidades = TTLCache(ttl_days=5)
-_cache_tamaños_pizzas = TTLCache(ttl_days=5)
-_cache_pizzas = TTLCache(ttl_days=5)
-_cache_hamburguesas = TTLCache(ttl_days=5)
-_cache_costillas = TTLCache(ttl_days=5)
-_cache_alitas = TTLCache(ttl_days=5)
-_cache_spaghetti = TTLCache(ttl_days=5)
-_cache_papas = TTLCache(ttl_days=5)
-_cache_mariscos = TTLCache(ttl_days=5)
-_cache_refrescos = TTLCache(ttl_days=5)
-_cache_magno = TTLCache(ttl_days=5)
-_cache_rectangular = TTLCache(ttl_days=5)
-_cache_barra = TTLCache(ttl_days=5)
+
+def _entrada_refresco(session: Session, producto: refrescos) -> Dict[str, Any]:
+    nombre_tamano = get_tamano_refresco_nombre(session, producto.id_tamano) if producto.id_tamano else None
+    return {"nombre": producto.nombre, "tamano": nombre_tamano}
+
+
+# tipo -> (modelo, columna id, función que arma la entrada a partir del renglón)
+_PRODUCTOS = {
+    PIZZA: (pizzas, pizzas.id_pizza, _entrada_pizza),
+    HAMBURGUESA: (hamburguesas, hamburguesas.id_hamb, lambda s, p: {"nombre": p.paquete}),
+    COSTILLAS: (costillas, costillas.id_cos, lambda s, p: {"nombre": p.orden}),
+    ALITAS: (alitas, alitas.id_alis, lambda s, p: {"nombre": p.orden}),
+    SPAGUETTY: (spaguetty, spaguetty.id_spag, lambda s, p: {"nombre": p.orden}),
+    PAPAS: (papas, papas.id_papa, lambda s, p: {"nombre": p.orden}),
+    MARISCOS: (mariscos, mariscos.id_maris, _entrada_mariscos),
+    REFRESCO: (refrescos, refrescos.id_refresco, _entrada_refresco),
+    MAGNO: (magno, magno.id_magno, lambda s, p: get_especialidad_nombre(s, p.id_especialidad)),
+    RECTANGULAR: (rectangular, rectangular.id_rec, lambda s, p: get_especialidad_nombre(s, p.id_esp)),
+    BARRA: (barra, barra.id_barr, lambda s, p: get_especialidad_nombre(s, p.id_especialidad)),
+}
+
+
+def _entrada_producto(session: Session, tipo: str, id_producto: int) -> Optional[Any]:
+    modelo, _, armar = _PRODUCTOS[tipo]
+
+    def cargar(session: Session, id_producto: int):
+        producto = session.get(modelo, id_producto)
+        return armar(session, producto) if producto else None
+
+    return _obtener(session, tipo, id_producto, cargar)
+
+
+def _cargar_ingredientes(session: Session) -> Dict[int, str]:
+    return {ing.id_ingrediente: ing.ingrediente for ing in session.exec(select(Ingredientes)).all()}
+
+
+def _cargar_catalogo_completo(session: Session) -> Dict[str, Dict[int, Any]]:
+    """Todo el catálogo con una consulta por tabla: tipo -> {id: entrada}. También llena la caché."""
+    entradas: Dict[str, Dict[int, Any]] = {
+        ESPECIALIDAD: {esp.id_esp: esp.nombre for esp in session.exec(select(especialidad)).all()},
+        TAMANO_PIZZA: {tam.id_tamañop: _limpiar_tamano(tam.tamano) for tam in session.exec(select(tamanosPizzas)).all()},
+        TAMANO_REFRESCO: {tam.id_tamano: tam.tamano for tam in session.exec(select(tamanosRefrescos)).all()},
+        INGREDIENTE: _cargar_ingredientes(session),
+    }
+    # Primero las tablas base, así armar() resuelve los nombres desde la caché
+    for tipo in (ESPECIALIDAD, TAMANO_PIZZA, TAMANO_REFRESCO, INGREDIENTE):
+        for id_entrada, valor in entradas[tipo].items():
+            _catalogo.set((tipo, id_entrada), valor)
+
+    for tipo, (modelo, columna_id, armar) in _PRODUCTOS.items():
+        entradas[tipo] = {}
+        for producto in session.exec(select(modelo)).all():
+            id_producto = getattr(producto, columna_id.key)
+            entradas[tipo][id_producto] = armar(session, producto)
+            _catalogo.set((tipo, id_producto), entradas[tipo][id_producto])
+
+    return entradas
+
+
+def precargar_catalogo(session: Session) -> int:
+    """Cargar todo el catálogo con una consulta por tabla. Se llama al arrancar la app."""
+    obtener_catalogo_plano(session)
+    return len(_catalogo)
+
+
+# ==================== CATÁLOGO PLANO ====================
+
+def _tabla_por_id(por_id: Dict[int, Any]) -> List[Any]:
+    ids = [i for i in por_id if isinstance(i, int) and i >= 0]
+    tabla = [None] * (max(ids) + 1 if ids else 0)
+    for id_entrada in ids:
+        tabla[id_entrada] = por_id[id_entrada]
+    return tabla
+
+
+class CatalogoPlano:
+    """
+    El catálogo completo en una lista por tipo, indexada directamente por id
+    (None donde no hay producto). Para resolver los renglones de la cocina sin
+    pasar por el lock ni el LRU de la caché; lo que no esté aquí (ids fuera de
+    rango o que no son enteros) se resuelve con las funciones cacheadas.
+    """
+    __slots__ = ("tablas", "creado", "ingredientes_creado")
+
+    def __init__(self, entradas: Dict[str, Dict[int, Any]]):
+        self.tablas: Dict[str, List[Any]] = {tipo: _tabla_por_id(por_id) for tipo, por_id in entradas.items()}
+        self.creado = self.ingredientes_creado = time.monotonic()
+
+    def entrada(self, session: Session, tipo: str, id_producto: Any) -> Optional[Any]:
+        tabla = self.tablas[tipo]
+        if type(id_producto) is int and 0 <= id_producto < len(tabla):
+            valor = tabla[id_producto]
+            if valor is not None:
+                return valor
+        return _entrada_producto(session, tipo, id_producto)
+
+    def _nombre(self, tipo: str, id_entrada: Any) -> Optional[str]:
+        tabla = self.tablas[tipo]
+        if type(id_entrada) is int and 0 <= id_entrada < len(tabla):
+            return tabla[id_entrada]
+        return None
+
+    def especialidad(self, session: Session, id_esp: Any) -> str:
+        nombre = self._nombre(ESPECIALIDAD, id_esp)
+        return nombre if nombre is not None else get_especialidad_nombre(session, id_esp)
+
+    def tamano_pizza(self, session: Session, id_tamano: Any) -> str:
+        nombre = self._nombre(TAMANO_PIZZA, id_tamano)
+        return nombre if nombre is not None else get_tamano_pizza_nombre(session, id_tamano)
+
+    def ingrediente(self, session: Session, id_ingrediente: Any) -> str:
+        nombre = self._nombre(INGREDIENTE, id_ingrediente)
+        return nombre if nombre is not None else get_ingrediente_nombre(session, id_ingrediente)
+
+    def ingredientes(self) -> List[tuple]:
+        """(id, nombre) de todos los ingredientes, ordenados por id."""
+        return [(i, nombre) for i, nombre in enumerate(self.tablas[INGREDIENTE]) if nombre is not None]
+
+
+_plano: Optional[CatalogoPlano] = None
+_plano_lock = Lock()
+
+
+def _refrescar_ingredientes(session: Session, plano: CatalogoPlano):
+    """Recargar solo los nombres de ingredientes del plano vigente (una consulta)."""
+    global _generacion
+    ingredientes = _cargar_ingredientes(session)
+    tabla = _tabla_por_id(ingredientes)
+    if tabla != plano.tablas[INGREDIENTE]:
+        _catalogo.delete_where(lambda key: key[0] == INGREDIENTE)
+        for id_ingrediente, nombre in ingredientes.items():
+            _catalogo.set((INGREDIENTE, id_ingrediente), nombre)
+        plano.tablas[INGREDIENTE] = tabla
+        # Tickets y /prices/ingredientes se armaron con los nombres anteriores
+        with _generacion_lock:
+            _generacion += 1
+        invalidar_menu()
+    plano.ingredientes_creado = time.monotonic()
+
+
+def obtener_catalogo_plano(session: Session) -> CatalogoPlano:
+    """Catálogo plano vigente; se arma en la primera petición después de invalidar."""
+    global _plano
+    plano = _plano
+    ahora = time.monotonic()
+    if (plano is not None and ahora - plano.creado < CATALOGO_CACHE_TTL
+            and ahora - plano.ingredientes_creado < INGREDIENTES_TTL):
+        return plano
+    with _plano_lock:
+        plano = _plano
+        if plano is not None and time.monotonic() - plano.creado < CATALOGO_CACHE_TTL:
+            if time.monotonic() - plano.ingredientes_creado >= INGREDIENTES_TTL:
+                _refrescar_ingredientes(session, plano)
+            return plano
+        generacion = _generacion
+        plano = CatalogoPlano(_cargar_catalogo_completo(session))
+        # Si hubo una invalidación mientras se cargaba se usa pero no se publica
+        if generacion == _generacion:
+            _plano = plano
+        return plano
 
 
 # ==================== FUNCIONES DE CACHÉ PARA LOOKUPS ====================
 
 def get_especialidad_nombre(session: Session, id_esp: int) -> str:
     """Obtiene el nombre de una especialidad con caché y TTL."""
-    cached_value = _cache_especialidades.get(id_esp)
-    if cached_value is not None:
-        return cached_value
-    
-    from app.models.especialidadModel import especialidad
-    esp = session.get(especialidad, id_esp)
-    result = esp.nombre if esp else f"Especialidad #{id_esp}"
-    _cache_especialidades.set(id_esp, result)
-    return result
+    nombre = _obtener(session, ESPECIALIDAD, id_esp, lambda s, i: getattr(s.get(especialidad, i), "nombre", None))
+    return nombre if nombre is not None else f"Especialidad #{id_esp}"
 
 
 def get_tamano_pizza_nombre(session: Session, id_tamano: int) -> str:
     """Obtiene el nombre de un tamaño de pizza con caché y TTL."""
-    cached_value = _cache_tamaños_pizzas.get(id_tamano)
-    if cached_value is not None:
-        return cached_value
-    
-    from app.models.tamanosPizzasModel import tamanosPizzas
-    tamano_obj = session.get(tamanosPizzas, id_tamano)
-    result = tamano_obj.tamano.replace(" Especial", "").replace(" Camaron", "").replace(" Mar", "") if tamano_obj else f"Tamaño #{id_tamano}"
-    _cache_tamaños_pizzas.set(id_tamano, result)
-    return result
+    def cargar(session: Session, id_tamano: int) -> Optional[str]:
+        tamano_obj = session.get(tamanosPizzas, id_tamano)
+        return _limpiar_tamano(tamano_obj.tamano) if tamano_obj else None
+
+    nombre = _obtener(session, TAMANO_PIZZA, id_tamano, cargar)
+    return nombre if nombre is not None else f"Tamaño #{id_tamano}"
+
+
+def get_ingrediente_nombre(session: Session, id_ingrediente: int) -> str:
+    """Obtiene el nombre de un ingrediente con caché y TTL."""
+    nombre = _obtener(session, INGREDIENTE, id_ingrediente,
+                      lambda s, i: getattr(s.get(Ingredientes, i), "ingrediente", None))
+    return nombre if nombre is not None else f"Ingrediente #{id_ingrediente}"
+
+
+def get_tamano_refresco_nombre(session: Session, id_tamano: int) -> Optional[str]:
+    """Obtiene el nombre de un tamaño de refresco con caché y TTL."""
+    return _obtener(session, TAMANO_REFRESCO, id_tamano, lambda s, i: getattr(s.get(tamanosRefrescos, i), "tamano", None))
 
 
 # ==================== FUNCIONES CACHEADAS DE PROCESAMIENTO ====================
 
+def _producto_individual(entrada: Dict[str, Any], tipo: str, det_cantidad: int, det_status: str) -> Dict[str, Any]:
+    """Mismo formato para todos los productos individuales, venga o no de la caché."""
+    producto = {
+        "cantidad": det_cantidad,
+        "nombre": entrada["nombre"],
+        "tipo": tipo,
+        "status": det_status,
+        "es_personalizado": False,
+        "detalles_ingredientes": None,
+        "tamano": entrada.get("tamano"),
+    }
+    if "especialidad" in entrada:
+        producto["especialidad"] = entrada["especialidad"]
+    return producto
+
+
+def _producto_lista(nombres: List[str], tipo: str, det_cantidad: int, det_status: str) -> List[Dict[str, Any]]:
+    if not nombres:
+        return []
+    return [{
+        "cantidad": det_cantidad,
+        "nombre": tipo,
+        "tipo": tipo,
+        "especialidades": nombres,
+        "status": det_status,
+        "es_personalizado": False,
+        "detalles_ingredientes": None,
+        "tamano": None
+    }]
+
+
+def _parsear_lista_ids(data: Any) -> List[Any]:
+    try:
+        lista_ids = json.loads(data) if isinstance(data, str) else data
+    except (json.JSONDecodeError, TypeError):
+        lista_ids = data
+    return lista_ids if isinstance(lista_ids, list) else [lista_ids]
+
+
 def procesar_producto_personalizado_cached(
-    session: Session, 
+    session: Session,
     det_cantidad: int,
     det_ingredientes: Dict[str, Any],
-    det_status: str
+    det_status: str,
+    plano: Optional[CatalogoPlano] = None
 ) -> Dict[str, Any]:
     """Procesar productos personalizados con ingredientes - versión cacheada."""
-    from app.models.ventaModel import Ingredientes
-    from app.models.tamanosPizzasModel import tamanosPizzas
-    
     try:
         ingredientes_data = det_ingredientes
         tamano_id = ingredientes_data.get("tamano")
         ids_ingredientes = ingredientes_data.get("ingredientes", [])
-        
-        # Obtener el nombre del tamaño (con caché)
-        nombre_tamano = get_tamano_pizza_nombre(session, tamano_id)
-        
-        # Obtener nombres de los ingredientes
-        nombres_ingredientes = []
-        for id_ing in ids_ingredientes:
-            ingrediente = session.get(Ingredientes, id_ing)
-            if ingrediente:
-                nombres_ingredientes.append(ingrediente.ingrediente)
-            else:
-                nombres_ingredientes.append(f"Ingrediente #{id_ing}")
-        
+
+        # Nombres del tamaño y de los ingredientes desde el catálogo, sin consultas
+        if plano is None:
+            plano = obtener_catalogo_plano(session)
+        nombre_tamano = plano.tamano_pizza(session, tamano_id)
+        nombres_ingredientes = [plano.ingrediente(session, id_ing) for id_ing in ids_ingredientes]
+
         return {
             "cantidad": det_cantidad,
             "nombre": f"Pizza Personalizada - {nombre_tamano}",
@@ -151,616 +426,84 @@ def procesar_producto_personalizado_cached(
 
 def procesar_pizza_cached(session: Session, det_cantidad: int, id_pizza: int, det_status: str) -> Optional[Dict[str, Any]]:
     """Procesar pizza con caché y TTL."""
-    # Creamos una clave compuesta para incluir la cantidad y el status
-    cache_key = (id_pizza, det_cantidad, det_status)
-    cached_value = _cache_pizzas.get(cache_key)
-    if cached_value is not None:
-        if cached_value is None:  # Caso especial para productos no encontrados
-            return None
-        # Devolvemos una copia para evitar modificaciones accidentales
-        cached = cached_value.copy()
-        cached.update({
-            "cantidad": det_cantidad,
-            "status": det_status,
-            "tipo": "Pizza"
-            
-        })
-        return cached
-    
-    from app.models.pizzasModel import pizzas
-    
-    producto = session.get(pizzas, id_pizza)
-    if not producto:
-        _cache_pizzas.set(cache_key, None)
-        return None
-    
-    try:
-        nombre_especialidad = get_especialidad_nombre(session, producto.id_esp)
-        nombre_tamano = get_tamano_pizza_nombre(session, producto.id_tamano)
-    except:
-        nombre_especialidad = f"Especialidad #{producto.id_esp}"
-        nombre_tamano = f"Tamaño #{producto.id_tamano}"
-    
-    result = {
-        "nombre": f"{nombre_especialidad} - {nombre_tamano}",
-        "especialidad": nombre_especialidad
-    }
-    
-    _cache_pizzas.set(cache_key, result)
-    
-    return {
-        "cantidad": det_cantidad,
-        "nombre": result["nombre"],
-        "status": det_status,
-        "es_personalizado": False,
-        "detalles_ingredientes": None,
-    }
+    entrada = _entrada_producto(session, PIZZA, id_pizza)
+    return _producto_individual(entrada, "Pizza", det_cantidad, det_status) if entrada else None
 
 
 def procesar_hamburguesa_cached(session: Session, det_cantidad: int, id_hamb: int, det_status: str) -> Optional[Dict[str, Any]]:
     """Procesar hamburguesa con caché y TTL."""
-    cache_key = (id_hamb, det_cantidad, det_status)
-    cached_value = _cache_hamburguesas.get(cache_key)
-    if cached_value is not None:
-        if cached_value is None:
-            return None
-        cached = cached_value.copy()
-        cached.update({
-            "cantidad": det_cantidad,
-            "status": det_status,
-            "tipo": "Hamburguesa"
-        })
-        return cached
-    
-    from app.models.hamburguesasModel import hamburguesas
-    
-    producto = session.get(hamburguesas, id_hamb)
-    if not producto:
-        _cache_hamburguesas.set(cache_key, None)
-        return None
-    
-    result = {"nombre": producto.paquete}
-    _cache_hamburguesas.set(cache_key, result)
-    
-    return {
-        "cantidad": det_cantidad,
-        "nombre": result["nombre"],
-        "status": det_status,
-        "es_personalizado": False,
-        "detalles_ingredientes": None,
-        "tamano": None
-    }
+    entrada = _entrada_producto(session, HAMBURGUESA, id_hamb)
+    return _producto_individual(entrada, "Hamburguesa", det_cantidad, det_status) if entrada else None
 
 
 def procesar_costilla_cached(session: Session, det_cantidad: int, id_cos: int, det_status: str) -> Optional[Dict[str, Any]]:
     """Procesar costilla con caché y TTL."""
-    cache_key = (id_cos, det_cantidad, det_status)
-    cached_value = _cache_costillas.get(cache_key)
-    if cached_value is not None:
-        if cached_value is None:
-            return None
-        cached = cached_value.copy()
-        cached.update({
-            "cantidad": det_cantidad,
-            "status": det_status,
-            "tipo": "Costillas"
-        })
-        return cached
-    
-    from app.models.costillasModel import costillas
-    
-    producto = session.get(costillas, id_cos)
-    if not producto:
-        _cache_costillas.set(cache_key, None)
-        return None
-    
-    result = {"nombre": producto.orden}
-    _cache_costillas.set(cache_key, result)
-    
-    return {
-        "cantidad": det_cantidad,
-        "nombre": result["nombre"],
-        "status": det_status,
-        "es_personalizado": False,
-        "detalles_ingredientes": None,
-        "tamano": None
-    }
+    entrada = _entrada_producto(session, COSTILLAS, id_cos)
+    return _producto_individual(entrada, "Costillas", det_cantidad, det_status) if entrada else None
 
 
 def procesar_alitas_cached(session: Session, det_cantidad: int, id_alis: int, det_status: str) -> Optional[Dict[str, Any]]:
     """Procesar alitas con caché y TTL."""
-    cache_key = (id_alis, det_cantidad, det_status)
-    cached_value = _cache_alitas.get(cache_key)
-    if cached_value is not None:
-        if cached_value is None:
-            return None
-        cached = cached_value.copy()
-        cached.update({
-            "cantidad": det_cantidad,
-            "status": det_status,
-            "tipo": "Alitas"
-        })
-        return cached
-    
-    from app.models.alitasModel import alitas
-    
-    producto = session.get(alitas, id_alis)
-    if not producto:
-        _cache_alitas.set(cache_key, None)
-        return None
-    
-    result = {"nombre": producto.orden}
-    _cache_alitas.set(cache_key, result)
-    
-    return {
-        "cantidad": det_cantidad,
-        "nombre": result["nombre"],
-        "status": det_status,
-        "es_personalizado": False,
-        "detalles_ingredientes": None,
-        "tamano": None
-    }
+    entrada = _entrada_producto(session, ALITAS, id_alis)
+    return _producto_individual(entrada, "Alitas", det_cantidad, det_status) if entrada else None
 
 
 def procesar_spaghetti_cached(session: Session, det_cantidad: int, id_spag: int, det_status: str) -> Optional[Dict[str, Any]]:
     """Procesar spaghetti con caché y TTL."""
-    cache_key = (id_spag, det_cantidad, det_status)
-    cached_value = _cache_spaghetti.get(cache_key)
-    if cached_value is not None:
-        if cached_value is None:
-            return None
-        cached = cached_value.copy()
-        cached.update({
-            "cantidad": det_cantidad,
-            "status": det_status,
-            "tipo": "Spaghetti"
-        })
-        return cached
-    
-    from app.models.spaguettyModel import spaguetty
-    
-    producto = session.get(spaguetty, id_spag)
-    if not producto:
-        _cache_spaghetti.set(cache_key, None)
-        return None
-    
-    result = {"nombre": producto.orden}
-    _cache_spaghetti.set(cache_key, result)
-    
-    return {
-        "cantidad": det_cantidad,
-        "nombre": result["nombre"],
-        "status": det_status,
-        "es_personalizado": False,
-        "detalles_ingredientes": None,
-        "tamano": None
-    }
+    entrada = _entrada_producto(session, SPAGUETTY, id_spag)
+    return _producto_individual(entrada, "Spaghetti", det_cantidad, det_status) if entrada else None
 
 
 def procesar_papas_cached(session: Session, det_cantidad: int, id_papa: int, det_status: str) -> Optional[Dict[str, Any]]:
     """Procesar papas con caché y TTL."""
-    cache_key = (id_papa, det_cantidad, det_status)
-    cached_value = _cache_papas.get(cache_key)
-    if cached_value is not None:
-        if cached_value is None:
-            return None
-        cached = cached_value.copy()
-        cached.update({
-            "cantidad": det_cantidad,
-            "status": det_status,
-            "tipo": "Papas"
-        })
-        return cached
-    
-    from app.models.papasModel import papas
-    
-    producto = session.get(papas, id_papa)
-    if not producto:
-        _cache_papas.set(cache_key, None)
-        return None
-    
-    result = {"nombre": producto.orden}
-    _cache_papas.set(cache_key, result)
-    
-    return {
-        "cantidad": det_cantidad,
-        "nombre": result["nombre"],
-        "status": det_status,
-        "es_personalizado": False,
-        "detalles_ingredientes": None,
-        "tamano": None
-    }
+    entrada = _entrada_producto(session, PAPAS, id_papa)
+    return _producto_individual(entrada, "Papas", det_cantidad, det_status) if entrada else None
 
 
 def procesar_mariscos_cached(session: Session, det_cantidad: int, id_maris: int, det_status: str) -> Optional[Dict[str, Any]]:
     """Procesar mariscos con caché y TTL."""
-    cache_key = (id_maris, det_cantidad, det_status)
-    cached_value = _cache_mariscos.get(cache_key)
-    if cached_value is not None:
-        if cached_value is None:
-            return None
-        cached = cached_value.copy()
-        cached.update({
-            "cantidad": det_cantidad,
-            "status": det_status,
-            "tipo": "Mariscos"
-        })
-        return cached
-    
-    from app.models.mariscosModel import mariscos
-    
-    producto = session.get(mariscos, id_maris)
-    if not producto:
-        _cache_mariscos.set(cache_key, None)
-        return None
-    
-    try:
-        # Usar cache para obtener el nombre del tamaño
-        tamano_marisco = None
-        if hasattr(producto, 'id_tamañop') and producto.id_tamañop:
-            tamano_marisco = get_tamano_pizza_nombre(session, producto.id_tamañop)
-        else:
-            tamano_marisco = "Tamaño desconocido"
-        
-        nombre_producto = f"{producto.nombre} - {tamano_marisco}"
-    except:
-        nombre_producto = producto.nombre
-        tamano_marisco = "Tamaño desconocido"
-    
-    result = {"nombre": nombre_producto, "tamano": tamano_marisco}
-    _cache_mariscos.set(cache_key, result)
-    
-    return {
-        "cantidad": det_cantidad,
-        "nombre": result["nombre"],
-        "status": det_status,
-        "es_personalizado": False,
-        "detalles_ingredientes": None,
-    }
+    entrada = _entrada_producto(session, MARISCOS, id_maris)
+    return _producto_individual(entrada, "Mariscos", det_cantidad, det_status) if entrada else None
 
 
 def procesar_refresco_cached(session: Session, det_cantidad: int, id_refresco: int, det_status: str) -> Optional[Dict[str, Any]]:
     """Procesar refresco con caché y TTL."""
-    cache_key = (id_refresco, det_cantidad, det_status)
-    cached_value = _cache_refrescos.get(cache_key)
-    if cached_value is not None:
-        if cached_value is None:
-            return None
-        cached = cached_value.copy()
-        cached.update({
-            "cantidad": det_cantidad,
-            "status": det_status,
-            "tipo": "Refresco"
-        })
-        return cached
-    
-    from app.models.refrescosModel import refrescos
-    from app.models.tamanosRefrescosModel import tamanosRefrescos
-    
-    producto = session.get(refrescos, id_refresco)
-    if not producto:
-        _cache_refrescos.set(cache_key, None)
-        return None
-    
-    # Obtener el tamaño del refresco
-    nombre_tamano = None
-    if producto.id_tamano:
-        tamano_obj = session.get(tamanosRefrescos, producto.id_tamano)
-        nombre_tamano = tamano_obj.tamano if tamano_obj else None
-    
-    result = {"nombre": producto.nombre, "tamano": nombre_tamano}
-    _cache_refrescos.set(cache_key, result)
-    
-    return {
-        "cantidad": det_cantidad,
-        "nombre": result["nombre"],
-        "status": det_status,
-        "es_personalizado": False,
-        "detalles_ingredientes": None,
-        "tamano": result["tamano"]
-    }
+    entrada = _entrada_producto(session, REFRESCO, id_refresco)
+    return _producto_individual(entrada, "Refresco", det_cantidad, det_status) if entrada else None
 
 
-def procesar_magno_cached(session: Session, det_cantidad: int, id_magno_data: Any, det_status: str) -> List[Dict[str, Any]]:
+def _nombres_lista(session: Session, tipo: str, data: Any) -> List[str]:
+    nombres = []
+    for id_producto in _parsear_lista_ids(data):
+        nombre = _entrada_producto(session, tipo, id_producto)
+        if nombre is not None:
+            nombres.append(nombre)
+    return nombres
 
-    from app.models.magnoModel import magno
-    
-    try:
-        lista_ids = json.loads(id_magno_data) if isinstance(id_magno_data, str) else id_magno_data
-    except:
-        lista_ids = id_magno_data if isinstance(id_magno_data, list) else [id_magno_data]
-    
-    cache_key = (tuple(sorted(lista_ids)) if isinstance(lista_ids, list) else id_magno_data, det_cantidad, det_status)
-    cached_value = _cache_magno.get(cache_key)
-    if cached_value is not None:
-        result = []
-        for item in cached_value:
-            new_item = item.copy()
-            new_item.update({
-                "cantidad": det_cantidad,
-                "status": det_status,
-                "tipo": "Magno"
-            })
-            result.append(new_item)
-        return result
-    
-    nombres_magno = []
-    for id_mag in lista_ids:
-        producto = session.get(magno, id_mag)
-        if producto:
-            try:
-                nombre_especialidad = get_especialidad_nombre(session, producto.id_especialidad)
-            except:
-                nombre_especialidad = f"Especialidad #{producto.id_especialidad}"
-            nombres_magno.append(nombre_especialidad)
-    
-    result = []
-    if nombres_magno:
-        result = [{
-            "cantidad": det_cantidad,
-            "nombre": "Magno",
-            "especialidades": nombres_magno,
-            "status": det_status,
-            "es_personalizado": False,
-            "detalles_ingredientes": None,
-            "tamano": None
-        }]
-    
-    _cache_magno.set(cache_key, result)
-    return result
+
+def procesar_magno_cached(session: Session, det_cantidad: int, id_magno_data: Any, det_status: str) -> List[Dict[str, Any]]:
+    """Procesar magno con caché y TTL."""
+    return _producto_lista(_nombres_lista(session, MAGNO, id_magno_data), "Magno", det_cantidad, det_status)
 
 
 def procesar_rectangular_cached(session: Session, det_cantidad: int, id_rec_data: Any, det_status: str) -> List[Dict[str, Any]]:
     """Procesar rectangular con caché y TTL."""
-    from app.models.rectangularModel import rectangular
-    
-    try:
-        lista_ids = json.loads(id_rec_data) if isinstance(id_rec_data, str) else id_rec_data
-    except:
-        lista_ids = id_rec_data if isinstance(id_rec_data, list) else [id_rec_data]
-    
-    cache_key = (tuple(sorted(lista_ids)) if isinstance(lista_ids, list) else id_rec_data, det_cantidad, det_status)
-    cached_value = _cache_rectangular.get(cache_key)
-    if cached_value is not None:
-        result = []
-        for item in cached_value:
-            new_item = item.copy()
-            new_item.update({
-                "cantidad": det_cantidad,
-                "status": det_status,
-                "tipo": "Rectangular"
-            })
-            result.append(new_item)
-        return result
-    
-    nombres_rect = []
-    for id_rec in lista_ids:
-        producto = session.get(rectangular, id_rec)
-        if producto:
-            try:
-                nombre_especialidad = get_especialidad_nombre(session, producto.id_esp)
-            except:
-                nombre_especialidad = f"Especialidad #{producto.id_esp}"
-            nombres_rect.append(nombre_especialidad)
-    
-    result = []
-    if nombres_rect:
-        result = [{
-            "cantidad": det_cantidad,
-            "nombre": "Rectangular",
-            "especialidades": nombres_rect,
-            "status": det_status,
-            "es_personalizado": False,
-            "detalles_ingredientes": None,
-            "tamano": None
-        }]
-    
-    _cache_rectangular.set(cache_key, result)
-    return result
+    return _producto_lista(_nombres_lista(session, RECTANGULAR, id_rec_data), "Rectangular", det_cantidad, det_status)
 
 
 def procesar_barra_cached(session: Session, det_cantidad: int, id_barr_data: Any, det_status: str) -> List[Dict[str, Any]]:
     """Procesar barra con caché y TTL."""
-    from app.models.barraModel import barra
-    
-    try:
-        lista_ids = json.loads(id_barr_data) if isinstance(id_barr_data, str) else id_barr_data
-    except:
-        lista_ids = id_barr_data if isinstance(id_barr_data, list) else [id_barr_data]
-    
-    cache_key = (tuple(sorted(lista_ids)) if isinstance(lista_ids, list) else id_barr_data, det_cantidad, det_status)
-    cached_value = _cache_barra.get(cache_key)
-    if cached_value is not None:
-        result = []
-        for item in cached_value:
-            new_item = item.copy()
-            new_item.update({
-                "cantidad": det_cantidad,
-                "status": det_status,
-                "tipo": "Barra"
-            })
-            result.append(new_item)
-        return result
-    
-    nombres_barr = []
-    for id_barr in lista_ids:
-        producto = session.get(barra, id_barr)
-        if producto:
-            try:
-                nombre_especialidad = get_especialidad_nombre(session, producto.id_especialidad)
-            except:
-                nombre_especialidad = f"Especialidad #{producto.id_especialidad}"
-            nombres_barr.append(nombre_especialidad)
-    
-    result = []
-    if nombres_barr:
-        result = [{
-            "cantidad": det_cantidad,
-            "nombre": "Barra",
-            "especialidades": nombres_barr,
-            "status": det_status,
-            "es_personalizado": False,
-            "detalles_ingredientes": None,
-            "tamano": None
-        }]
-    
-    _cache_barra.set(cache_key, result)
-    return result
-
-
-def procesar_paquetes_tipo_1_3_cached(session: Session, det_cantidad: int, id_paquete: int, detalle_paquete: str, det_status: str) -> List[Dict[str, Any]]:
-    """Procesar paquetes tipo 1 y 3 con caché y TTL."""
-    cache_key = (id_paquete, detalle_paquete, det_cantidad, det_status)
-    cached_value = _cache_pizzas.get(cache_key)  # Reutilizamos el caché temporalmente
-    if cached_value is not None:
-        result = []
-        for item in cached_value:
-            new_item = item.copy()
-            new_item.update({
-                "cantidad": det_cantidad,
-                "status": det_status,
-                "tipo": f"Paquete {id_paquete}"
-            })
-            result.append(new_item)
-        return result
-    
-    productos = []
-    if detalle_paquete:
-        ids_pizzas = detalle_paquete.split(",")
-        
-        for id_pizza_str in ids_pizzas:
-            try:
-                id_pizza = int(id_pizza_str.strip())
-                
-                # Usar función cacheada para pizza
-                pizza_result = procesar_pizza_cached(session, 1, id_pizza, det_status)
-                if pizza_result:
-                    pizza_result["tipo"] = f"Paquete {id_paquete} - Pizza"
-                    productos.append(pizza_result)
-                else:
-                    productos.append({
-                        "cantidad": 1,
-                        "nombre": f"Error al cargar pizza #{id_pizza}",
-                        "status": det_status,
-                        "es_personalizado": False,
-                        "detalles_ingredientes": None,
-                        "tamano": None
-                    })
-            
-            except (ValueError, AttributeError) as e:
-                productos.append({
-                    "cantidad": 1,
-                    "nombre": f"Error al cargar pizza del paquete",
-                    "status": det_status,
-                    "es_personalizado": False,
-                    "detalles_ingredientes": None,
-                    "tamano": None
-                })
-    else:
-        productos.append({
-            "cantidad": det_cantidad,
-            "nombre": f"Paquete {id_paquete} - Sin detalle",
-            "status": det_status,
-            "es_personalizado": False,
-            "detalles_ingredientes": None,
-            "tamano": None
-        })
-    
-    # Guardar en caché la combinación completa
-    _cache_pizzas.set(cache_key, productos)
-    return productos
-
-
-def procesar_paquetes_tipo_2_cached(session: Session, det_cantidad: int, id_paquete: int, id_refresco: Optional[int], id_pizza: Optional[int], id_alis: Optional[int], id_hamb: Optional[int], det_status: str) -> List[Dict[str, Any]]:
-    """Procesar paquete tipo 2 con caché y TTL."""
-    cache_key = (id_paquete, id_refresco, id_pizza, id_alis, id_hamb, det_cantidad, det_status)
-    temp_cache = TTLCache(ttl_days=5)
-    cached_value = temp_cache.get(cache_key)
-    if cached_value is not None:
-        result = []
-        for item in cached_value:
-            new_item = item.copy()
-            new_item.update({
-                "cantidad": det_cantidad,
-                "status": det_status,
-                "tipo": f"Paquete {id_paquete}"
-            })
-            result.append(new_item)
-        return result
-    
-    productos = []
-    
-    # Refresco
-    if id_refresco:
-        refresco_result = procesar_refresco_cached(session, 1, id_refresco, det_status)
-        if refresco_result:
-            refresco_result["tipo"] = f"Paquete {id_paquete} - Refresco"
-            productos.append(refresco_result)
-    
-    # Pizza
-    if id_pizza:
-        pizza_result = procesar_pizza_cached(session, 1, id_pizza, det_status)
-        if pizza_result:
-            pizza_result["tipo"] = f"Paquete {id_paquete} - Pizza"
-            productos.append(pizza_result)
-    
-    # Alitas o Hamburguesa
-    if id_alis:
-        alita_result = procesar_alitas_cached(session, 1, id_alis, det_status)
-        if alita_result:
-            alita_result["tipo"] = f"Paquete {id_paquete} - Alitas"
-            productos.append(alita_result)
-    elif id_hamb:
-        hamb_result = procesar_hamburguesa_cached(session, 1, id_hamb, det_status)
-        if hamb_result:
-            hamb_result["tipo"] = f"Paquete {id_paquete} - Hamburguesa"
-            productos.append(hamb_result)
-    
-    temp_cache.set(cache_key, productos)
-    return productos
-
-
-def clear_all_caches():
-    """Limpia todos los cachés. Útil para testing o invalidación forzada."""
-    _cache_especialidades.clear()
-    _cache_tamaños_pizzas.clear()
-    _cache_pizzas.clear()
-    _cache_hamburguesas.clear()
-    _cache_costillas.clear()
-    _cache_alitas.clear()
-    _cache_spaghetti.clear()
-    _cache_papas.clear()
-    _cache_mariscos.clear()
-    _cache_refrescos.clear()
-    _cache_magno.clear()
-    _cache_rectangular.clear()
-    _cache_barra.clear()
-
-
-def cleanup_expired_caches():
-    """Limpiar manualmente todas las entradas expiradas"""
-    for cache in [
-        _cache_especialidades, _cache_tamaños_pizzas, _cache_pizzas,
-        _cache_hamburguesas, _cache_costillas, _cache_alitas, _cache_spaghetti,
-        _cache_papas, _cache_mariscos, _cache_refrescos, _cache_magno,
-        _cache_rectangular, _cache_barra
-    ]:
-        cache.cleanup_expired()
-
-
-
-def _construir_productos_desde_cache(
-    info_paquete: Dict[str, Any],
-    cantidad_detalle: int,
-    status_detalle: str
-) -> List[Dict[str, Any]]:
-    """Construye la lista de productos a partir de la info cacheada, ajustando cantidad y status."""
-    productos = []
-    for prod in info_paquete.get('productos', []):
-        # Hacemos una copia para no alterar el objeto cacheado
-        item = prod.copy()
-        # Ajustamos cantidad y status con los del detalle actual
-        item['cantidad'] = cantidad_detalle * item.get('cantidad', 1)
-        item['status'] = status_detalle
-        productos.append(item)
-    return productos
\ No newline at end of file
+    return _producto_lista(_nombres_lista(session, BARRA, id_barr_data), "Barra", det_cantidad, det_status)
+
+
+def _descartar_catalogo():
+    global _generacion, _plano
+    with _generacion_lock:
+        _generacion += 1
+        _plano = None
+    _catalogo.clear()
+    invalidar_menu()
+
+
+# Otro worker cambió el catálogo: no se sabe qué producto, se descarta todo
+suscribir(TEMA_CATALOGO, _descartar_catalogo)
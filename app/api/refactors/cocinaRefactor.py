@@ -0,0 +1,349 @@
+"""
+Canal de eventos para las pantallas de cocina.
+Cada escritura del POS incrementa Venta.version (compare-and-swap, ver
+incrementar_version_venta) y PVersion de la sucursal dentro de su transacción, deja el
+cambio en la bitácora CambiosCocina (de ahí sale /pos/pedidos-cocina/cambios) y, después
+del commit, avisa con publicar_evento_cocina.
+Los WebSocket de una sucursal pueden estar en cualquier worker de uvicorn: en cada
+worker un VigiaCocina lee la bitácora y entrega los cambios a sus conexiones, así
+llegan igual sin importar qué worker atendió la escritura.
+"""
+import asyncio
+import logging
+import os
+import time
+from threading import Event, Lock, Thread
+from typing import Dict, Any, Optional, Set, Tuple
+from fastapi import HTTPException
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select, update, delete
+from dotenv import load_dotenv
+
+from app.core.invalidacion import TEMA_COCINA, aplicar_invalidaciones, publicar, suscribir
+from app.db.session import engine
+from app.models.ventaModel import Venta, PVersion, CambioCocina
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Versiones que se conservan en la bitácora por sucursal; una tablet más atrasada recarga todo
+CAMBIOS_COCINA_MAX = int(os.getenv("CAMBIOS_COCINA_MAX", "5000"))
+# Cada cuántas versiones se borra lo que ya salió de la bitácora
+_PODA_CADA = 500
+# Cada cuánto revisa el vigía los avisos de otros workers (con mmap es leer unos enteros)
+COCINA_AVISOS_MS = int(os.getenv("COCINA_AVISOS_MS", "50"))
+# Cada cuánto revisa PVersion aunque no le avisen: respaldo si un aviso se pierde o si
+# hay varios workers con CACHE_INVALIDACION=local
+COCINA_SONDEO_SEGUNDOS = float(os.getenv("COCINA_SONDEO_SEGUNDOS", "2"))
+
+
+# Eventos que se publican a cocina
+EVENTO_CREADO = "creado"
+EVENTO_EDITADO = "editado"
+EVENTO_STATUS = "status"
+EVENTO_COMPLETADO = "completado"
+EVENTO_CANCELADO = "cancelado"
+EVENTO_ELIMINADO = "eliminado"
+
+# Máximo de eventos pendientes por conexión antes de pedirle al cliente que resincronice
+MAX_EVENTOS_PENDIENTES = 100
+
+
+class CanalCocina:
+    """
+    Suscripciones por sucursal de este worker y la última versión de la bitácora que ya
+    se les entregó. Se puede publicar desde cualquier hilo.
+    """
+
+    def __init__(self, max_pendientes: int = MAX_EVENTOS_PENDIENTES):
+        self._suscriptores: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        # id_suc -> versión entregada; None hasta que la primera conexión lee la suya
+        self._versiones: Dict[int, Optional[int]] = {}
+        self._max_pendientes = max_pendientes
+        self._lock = Lock()
+
+    def suscribir(self, id_suc: int) -> asyncio.Queue:
+        """Registrar una conexión. Debe llamarse desde el event loop de la conexión."""
+        cola = asyncio.Queue(maxsize=self._max_pendientes)
+        with self._lock:
+            self._suscriptores.setdefault(id_suc, set()).add((asyncio.get_running_loop(), cola))
+            self._versiones.setdefault(id_suc, None)
+        return cola
+
+    def iniciar_version(self, id_suc: int, version: int):
+        """
+        Versión que la conexión leyó después de suscribirse. Si la sucursal ya tenía
+        conexiones se conserva la suya: lo que se entregue de ahí en adelante también
+        le llega a la nueva (cuando mucho repite cambios que ya trae su versión).
+        """
+        with self._lock:
+            if id_suc in self._versiones and self._versiones[id_suc] is None:
+                self._versiones[id_suc] = version
+
+    def versiones(self) -> Dict[int, int]:
+        """Sucursales con conexiones y la versión hasta la que ya se les entregó."""
+        with self._lock:
+            return {id_suc: v for id_suc, v in self._versiones.items() if v is not None}
+
+    def avanzar(self, id_suc: int, desde: int, hasta: int):
+        with self._lock:
+            if self._versiones.get(id_suc) == desde:
+                self._versiones[id_suc] = hasta
+
+    def desuscribir(self, id_suc: int, cola: asyncio.Queue):
+        with self._lock:
+            suscriptores = self._suscriptores.get(id_suc)
+            if not suscriptores:
+                return
+            for entrada in [e for e in suscriptores if e[1] is cola]:
+                suscriptores.discard(entrada)
+            if not suscriptores:
+                del self._suscriptores[id_suc]
+                self._versiones.pop(id_suc, None)
+
+    def total_suscriptores(self, id_suc: Optional[int] = None) -> int:
+        with self._lock:
+            if id_suc is not None:
+                return len(self._suscriptores.get(id_suc, ()))
+            return sum(len(s) for s in self._suscriptores.values())
+
+    def publicar(self, evento: Dict[str, Any]):
+        """Entregar el evento a todas las conexiones de la sucursal del evento."""
+        with self._lock:
+            destinos = list(self._suscriptores.get(evento["id_suc"], ()))
+        for loop, cola in destinos:
+            try:
+                loop.call_soon_threadsafe(_encolar, cola, evento)
+            except RuntimeError:
+                # El loop ya se cerró; la conexión se limpia al desconectarse
+                pass
+
+
+def _encolar(cola: asyncio.Queue, evento: Dict[str, Any]):
+    """Si el cliente va muy atrasado se descartan sus pendientes y se le pide resincronizar."""
+    try:
+        cola.put_nowait(evento)
+    except asyncio.QueueFull:
+        while not cola.empty():
+            cola.get_nowait()
+        cola.put_nowait({
+            "evento": "resincronizar",
+            "id_suc": evento["id_suc"],
+            "version": evento["version"]
+        })
+
+
+canal_cocina = CanalCocina()
+
+
+def obtener_version_sucursal(session: Session, id_suc: int) -> Optional[int]:
+    return session.exec(select(PVersion.version).where(PVersion.id_suc == id_suc)).first()
+
+
+def incrementar_version_sucursal(session: Session, id_suc: int) -> int:
+    """
+    Incrementa PVersion de la sucursal con un upsert atómico (INSERT ... ON DUPLICATE KEY
+    UPDATE version = version + 1), así dos primeras escrituras de la misma sucursal no
+    chocan al insertar. El renglón queda bloqueado hasta el commit de la transacción
+    que lo llamó.
+    """
+    tabla = PVersion.__table__
+    if session.get_bind().dialect.name == "mysql":
+        statement = mysql_insert(tabla).values(id_suc=id_suc, version=1)
+        statement = statement.on_duplicate_key_update(version=tabla.c.version + 1)
+    else:
+        # SQLite, para los scripts de benchmark y pruebas locales
+        statement = sqlite_insert(tabla).values(id_suc=id_suc, version=1)
+        statement = statement.on_conflict_do_update(index_elements=[tabla.c.id_suc],
+                                                    set_={"version": tabla.c.version + 1})
+    session.exec(statement)
+    return obtener_version_sucursal(session, id_suc)
+
+
+def incrementar_version_venta(session: Session, venta: Venta, esperada: Optional[int] = None):
+    """
+    Compare-and-swap de Venta.version: UPDATE ... SET version = version + 1 WHERE
+    id_venta = ? AND version = <la que se leyó>. Si otra terminal escribió la venta después
+    de leerla, o `esperada` (la versión con la que el cliente armó el cambio) ya no es la
+    vigente, responde 409 y la transacción no debe confirmarse.
+    En MySQL el UPDATE deja bloqueado el renglón hasta el commit, así dos escrituras a la
+    misma venta se serializan y la segunda falla en vez de pisar a la primera.
+    Se llama una vez por escritura, antes de modificar la venta.
+    """
+    leida = venta.version
+    if esperada is not None and esperada != leida:
+        _conflicto_version(venta.id_venta, leida)
+    resultado = session.exec(
+        update(Venta)
+        .where(Venta.id_venta == venta.id_venta, Venta.version == leida)
+        .values(version=leida + 1)
+    )
+    if resultado.rowcount == 0:
+        _conflicto_version(venta.id_venta, session.exec(select(Venta.version).where(Venta.id_venta == venta.id_venta)).first())
+
+
+def _conflicto_version(id_venta: int, actual: Optional[int]):
+    raise HTTPException(
+        status_code=409,
+        detail=f"La venta {id_venta} cambió en otra terminal (versión actual {actual}); vuelve a cargarla",
+        headers={"X-Venta-Version": str(actual)} if actual is not None else None
+    )
+
+
+def registrar_evento_cocina(session: Session, venta: Venta, evento: str) -> Dict[str, Any]:
+    """
+    Incrementa la versión de la sucursal dentro de la transacción actual y regresa el
+    evento que se debe publicar una vez hecho el commit. La versión de la venta la
+    incrementa antes quien llama, con incrementar_version_venta.
+    """
+    version = incrementar_version_sucursal(session, venta.id_suc)
+    # Mismo commit que PVersion: la bitácora no tiene huecos ni versiones que no existan
+    session.add(CambioCocina(id_suc=venta.id_suc, version=version, id_venta=venta.id_venta, evento=evento))
+    if version % _PODA_CADA == 0:
+        session.exec(
+            delete(CambioCocina)
+            .where(CambioCocina.id_suc == venta.id_suc, CambioCocina.version <= version - CAMBIOS_COCINA_MAX)
+        )
+    return {
+        "evento": evento,
+        "id_suc": venta.id_suc,
+        "id_venta": venta.id_venta,
+        "version": version,
+    }
+
+
+def leer_cambios_cocina(session: Session, id_suc: int, desde: int) -> Optional[Tuple[int, Dict[int, str]]]:
+    """
+    Ventas de la sucursal que cambiaron después de la versión `desde`:
+    (última versión, id_venta -> último evento). None si la bitácora ya no cubre `desde`
+    (se podó, o es de antes de que existiera) y hay que recargar la lista completa.
+    """
+    actual = obtener_version_sucursal(session, id_suc)
+    if actual is None or desde > actual:
+        return None
+    cambios = session.exec(
+        select(CambioCocina.version, CambioCocina.id_venta, CambioCocina.evento)
+        .where(CambioCocina.id_suc == id_suc, CambioCocina.version > desde)
+        .order_by(CambioCocina.version)
+    ).all()
+    # Las versiones son consecutivas; si falta la siguiente a `desde` hay un hueco
+    if (cambios and cambios[0].version != desde + 1) or (not cambios and actual > desde):
+        return None
+    eventos = {}
+    for cambio in cambios:
+        eventos[cambio.id_venta] = cambio.evento
+    return (cambios[-1].version if cambios else desde), eventos
+
+
+class VigiaCocina:
+    """
+    Hilo de fondo (uno por worker) que entrega a los WebSocket de este proceso lo que
+    entró a la bitácora después de la versión que ya se les mandó. Despierta al momento
+    con las escrituras de este worker (despertar), con el aviso TEMA_COCINA de los
+    demás, que revisa cada COCINA_AVISOS_MS, y cada COCINA_SONDEO_SEGUNDOS por si un
+    aviso no llegó. Al leer de la bitácora los eventos salen en orden de versión y una
+    escritura nunca se entrega dos veces.
+    """
+
+    def __init__(self, canal: CanalCocina, avisos_ms: int, sondeo: float):
+        self._canal = canal
+        self.avisos = avisos_ms / 1000
+        self.sondeo = sondeo
+        self._pendiente = Event()
+        self._detener = Event()
+        self._hilo: Optional[Thread] = None
+        self._lock = Lock()
+
+    def despertar(self):
+        self._pendiente.set()
+
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = Thread(target=self._correr, name="vigia-cocina", daemon=True)
+            self._hilo.start()
+
+    def detener(self, timeout: Optional[float] = 5):
+        self._detener.set()
+        self._pendiente.set()
+        with self._lock:
+            if self._hilo is not None:
+                self._hilo.join(timeout)
+                self._hilo = None
+
+    def _correr(self):
+        ultimo_sondeo = 0.0
+        while not self._detener.is_set():
+            self._pendiente.wait(self.avisos)
+            # Un worker que solo tiene WebSocket no recibe peticiones HTTP que apliquen los avisos
+            aplicar_invalidaciones()
+            if not self._pendiente.is_set() and time.monotonic() - ultimo_sondeo < self.sondeo:
+                continue
+            # Limpiar antes de leer: un aviso que llegue durante la revisión provoca otra
+            self._pendiente.clear()
+            ultimo_sondeo = time.monotonic()
+            try:
+                self.revisar()
+            except Exception:
+                logger.exception("Error al entregar los cambios de cocina")
+
+    def revisar(self):
+        versiones = self._canal.versiones()
+        if not versiones:
+            return
+        with Session(engine) as session:
+            actuales = dict(session.exec(
+                select(PVersion.id_suc, PVersion.version).where(PVersion.id_suc.in_(list(versiones)))
+            ).all())
+            for id_suc, desde in versiones.items():
+                if actuales.get(id_suc) not in (None, desde):
+                    self._entregar(session, id_suc, desde, actuales[id_suc])
+
+    def _entregar(self, session: Session, id_suc: int, desde: int, actual: int):
+        cambios = leer_cambios_cocina(session, id_suc, desde)
+        if cambios is None:
+            # La bitácora ya no cubre lo que falta: que las tablets recarguen la lista
+            self._canal.publicar({"evento": "resincronizar", "id_suc": id_suc, "version": actual})
+            self._canal.avanzar(id_suc, desde, actual)
+            return
+        version, eventos = cambios
+
+        # Los pedidos que siguen abiertos van con el mismo formato de /pos/pedidos-cocina
+        # para que la tablet no tenga que recargar la lista
+        from app.api.refactors.getsRefactor import _construir_pedidos_cocina
+
+        abiertas = session.exec(
+            select(Venta).where(Venta.id_venta.in_(list(eventos)), Venta.status.in_([0, 1]))
+            .order_by(Venta.fecha_hora.asc())
+        ).all()
+        pedidos = {pedido["id_venta"]: pedido for pedido in _construir_pedidos_cocina(session, abiertas)}
+        for id_venta, evento in eventos.items():
+            mensaje = {"evento": evento, "id_suc": id_suc, "id_venta": id_venta, "version": version,
+                       "abierto": id_venta in pedidos}
+            if id_venta in pedidos:
+                mensaje["pedido"] = pedidos[id_venta]
+            self._canal.publicar(mensaje)
+        self._canal.avanzar(id_suc, desde, version)
+
+
+vigia_cocina = VigiaCocina(canal_cocina, COCINA_AVISOS_MS, COCINA_SONDEO_SEGUNDOS)
+
+# Otro worker escribió en la bitácora
+suscribir(TEMA_COCINA, vigia_cocina.despertar)
+
+
+def publicar_evento_cocina(evento: Dict[str, Any]):
+    """
+    Avisar después del commit: el vigía de este worker revisa al momento y el de los
+    demás con el aviso TEMA_COCINA. Un error al avisar nunca debe tumbar la escritura
+    que ya se confirmó; en el peor caso el cambio llega con el siguiente sondeo.
+    """
+    try:
+        vigia_cocina.despertar()
+        publicar(TEMA_COCINA)
+    except Exception:
+        logger.exception("No se pudo avisar el evento de cocina %s", evento)
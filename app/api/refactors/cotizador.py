@@ -0,0 +1,148 @@
+"""
+Cálculo de precios de venta en el servidor.
+IndicePrecios guarda en memoria el precio (en centavos) de cada producto por el mismo
+campo con el que llega en ItemVentaRequest; se arma junto con el snapshot del menú
+(ver menuSnapshot.obtener_precios), así se invalida con él y cobra exactamente lo que
+muestra /prices. cotizar_items recorre el carrito completo con puras búsquedas en
+diccionarios y aritmética entera, sin consultas.
+
+Reglas de cobro por renglón (precio unitario, antes de queso):
+- pizza_mitad e ingredientes: precio del tamaño (TamanosPizza).
+- id_paquete: precio del paquete, sin importar su contenido.
+- id_pizza, id_maris: precio de su tamaño; id_refresco: precio de su tamaño de refresco;
+  hamburguesas, costillas, alitas, spaguetty y papas: su precio.
+- id_magno, id_rec, id_barr (pizza dividida): el precio de la parte más cara.
+- Si un renglón trae varios productos individuales se suman, igual que la cocina
+  los muestra como productos separados.
+queso es un extra por unidad: subtotal = (precio_unitario + queso) * cantidad.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+# Campos de ItemVentaRequest que se cobran uno a uno
+CAMPOS_INDIVIDUALES = ("id_pizza", "id_hamb", "id_cos", "id_alis", "id_spag", "id_papa", "id_maris", "id_refresco")
+# Listas de especialidades de una misma pizza
+CAMPOS_DIVIDIDOS = ("id_magno", "id_rec", "id_barr")
+# Índice de precios de TamanosPizza (pizza_mitad e ingredientes)
+TAMANO = "tamano"
+PAQUETE = "id_paquete"
+
+
+def a_centavos(precio) -> int:
+    return int((Decimal(str(precio)) * 100).to_integral_value())
+
+
+def de_centavos(centavos: int) -> Decimal:
+    return Decimal(centavos).scaleb(-2)
+
+
+class IndicePrecios:
+    """campo -> {id: centavos}. Inmutable una vez armado."""
+    __slots__ = ("precios",)
+
+    def __init__(self, precios: Dict[str, Dict[int, int]]):
+        self.precios = precios
+
+    def precio(self, campo: str, id_producto: Optional[int]) -> Optional[int]:
+        return self.precios.get(campo, {}).get(id_producto)
+
+
+class Cotizacion:
+    __slots__ = ("unitarios", "subtotales", "total")
+
+    def __init__(self, unitarios: List[Decimal], subtotales: List[Decimal], total: Decimal):
+        self.unitarios = unitarios
+        self.subtotales = subtotales
+        self.total = total
+
+
+def _centavos_item(indice: IndicePrecios, item, errores: List[str], posicion: int) -> int:
+    """Precio unitario del renglón en centavos; agrega a errores lo que no tenga precio."""
+    def buscar(campo: str, id_producto) -> int:
+        centavos = indice.precio(campo, id_producto)
+        if centavos is None:
+            errores.append(f"Item {posicion}: {campo} {id_producto} no tiene precio")
+            return 0
+        return centavos
+
+    # Mismo orden que _procesar_producto_por_tipo: mitad, personalizada y paquete son exclusivos
+    if item.pizza_mitad:
+        return buscar(TAMANO, item.pizza_mitad.tamano)
+    if item.ingredientes:
+        return buscar(TAMANO, item.ingredientes.tamano)
+    if item.id_paquete:
+        return buscar(PAQUETE, item.id_paquete.id_paquete)
+
+    centavos = 0
+    encontrado = False
+    for campo in CAMPOS_INDIVIDUALES:
+        id_producto = getattr(item, campo)
+        if id_producto:
+            centavos += buscar(campo, id_producto)
+            encontrado = True
+    for campo in CAMPOS_DIVIDIDOS:
+        ids = getattr(item, campo)
+        if ids:
+            centavos += max(buscar(campo, id_producto) for id_producto in ids)
+            encontrado = True
+
+    if not encontrado:
+        errores.append(f"Item {posicion}: no especifica ningún producto")
+    return centavos
+
+
+def cotizar_items(indice: IndicePrecios, items: Iterable, solo_faltantes: bool = False) -> Cotizacion:
+    """
+    Precio unitario, subtotal y total del carrito. Con solo_faltantes=True se respeta el
+    precio_unitario que ya traiga el item y solo se calculan los que vienen vacíos.
+    Lanza 400 con todos los items sin precio a la vez.
+    """
+    errores: List[str] = []
+    unitarios_centavos = []
+    total_centavos = 0
+    subtotales_centavos = []
+    for posicion, item in enumerate(items, 1):
+        if solo_faltantes and item.precio_unitario is not None:
+            unitario = a_centavos(item.precio_unitario)
+        else:
+            unitario = _centavos_item(indice, item, errores, posicion)
+        subtotal = (unitario + (item.queso or 0) * 100) * item.cantidad
+        unitarios_centavos.append(unitario)
+        subtotales_centavos.append(subtotal)
+        total_centavos += subtotal
+
+    if errores:
+        raise HTTPException(status_code=400, detail=errores)
+
+    return Cotizacion(
+        [de_centavos(c) for c in unitarios_centavos],
+        [de_centavos(c) for c in subtotales_centavos],
+        de_centavos(total_centavos),
+    )
+
+
+def aplicar_precios(indice: IndicePrecios, venta_request) -> Cotizacion:
+    """
+    Completar precio_unitario de los items y total de la venta cuando el POS no los manda.
+    Los valores que sí manda se conservan.
+    """
+    cotizacion = cotizar_items(indice, venta_request.items, solo_faltantes=True)
+    for item, unitario in zip(venta_request.items, cotizacion.unitarios):
+        if item.precio_unitario is None:
+            item.precio_unitario = unitario
+    if venta_request.total is None:
+        venta_request.total = cotizacion.total
+    return cotizacion
+
+
+def total_renglones(renglones: Iterable[Tuple[Decimal, Optional[int], int]]) -> Decimal:
+    """Total de renglones (precio_unitario, queso, cantidad) ya guardados, con la misma regla que cotizar_items."""
+    return de_centavos(sum((a_centavos(unitario) + (queso or 0) * 100) * cantidad
+                           for unitario, queso, cantidad in renglones))
+
+
+def faltan_precios(venta_request) -> bool:
+    """True si hay que cotizar algo (así no se toca el índice cuando el POS manda todo)."""
+    return venta_request.total is None or any(item.precio_unitario is None for item in venta_request.items)
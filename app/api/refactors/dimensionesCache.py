@@ -0,0 +1,101 @@
+"""
+Sucursales y métodos de pago en memoria para todo el proceso.
+Son tablas de unos cuantos renglones que casi no cambian; se cargan una vez (al arrancar
+o en la primera petición) y los listados, la validación de ventas y los reportes de
+corte/caja resuelven nombres desde aquí en vez de consultar o hacer join.
+Las escrituras de app/api/recurso/sucursales.py llaman a invalidar_dimensiones, que
+también avisa a los demás workers. DIMENSIONES_TTL cubre cambios hechos directo en BD
+(MetodosPago no tiene endpoints de escritura).
+"""
+import os
+import time
+from threading import Lock
+from typing import Any, Dict, Optional
+from sqlmodel import Session, select
+from dotenv import load_dotenv
+
+from app.core.invalidacion import TEMA_DIMENSIONES, publicar, suscribir
+from app.models.sucursalModel import Sucursal
+from app.models.pagosModel import MetodosPago
+
+load_dotenv()
+
+DIMENSIONES_TTL = int(os.getenv("DIMENSIONES_TTL", "3600"))
+
+
+class Dimensiones:
+    """
+    Copia de las tablas; los renglones son de solo lectura (Row con acceso por atributo)
+    y no dependen de la sesión que los cargó.
+    """
+    __slots__ = ("creado", "sucursales", "metodos_pago")
+
+    def __init__(self, sucursales: Dict[int, Any], metodos_pago: Dict[int, Any]):
+        self.creado = time.monotonic()
+        # id_suc -> (id_suc, nombre, direccion, telefono), en orden de id
+        self.sucursales = sucursales
+        # id_metpago -> (id_metpago, metodo)
+        self.metodos_pago = metodos_pago
+
+    def nombre_sucursal(self, id_suc: int) -> str:
+        sucursal = self.sucursales.get(id_suc)
+        return sucursal.nombre if sucursal else "Desconocida"
+
+    def metodo_pago(self, id_metpago: int) -> Optional[str]:
+        metodo = self.metodos_pago.get(id_metpago)
+        return metodo.metodo if metodo else None
+
+
+_dimensiones: Optional[Dimensiones] = None
+# Se incrementa al invalidar; una carga que empezó antes no se publica
+_generacion = 0
+_lock = Lock()
+_cargar_lock = Lock()
+
+
+def cargar_dimensiones(session: Session) -> Dimensiones:
+    global _dimensiones
+    generacion = _generacion
+    sucursales = session.exec(
+        select(Sucursal.id_suc, Sucursal.nombre, Sucursal.direccion, Sucursal.telefono).order_by(Sucursal.id_suc)
+    ).all()
+    metodos = session.exec(
+        select(MetodosPago.id_metpago, MetodosPago.metodo).order_by(MetodosPago.id_metpago)
+    ).all()
+    dimensiones = Dimensiones({s.id_suc: s for s in sucursales}, {m.id_metpago: m for m in metodos})
+    with _lock:
+        if generacion == _generacion:
+            _dimensiones = dimensiones
+    return dimensiones
+
+
+def _vigente(dimensiones: Optional[Dimensiones]) -> bool:
+    return dimensiones is not None and time.monotonic() - dimensiones.creado < DIMENSIONES_TTL
+
+
+def obtener_dimensiones(session: Session) -> Dimensiones:
+    dimensiones = _dimensiones
+    if _vigente(dimensiones):
+        return dimensiones
+    with _cargar_lock:
+        dimensiones = _dimensiones
+        if _vigente(dimensiones):
+            return dimensiones
+        return cargar_dimensiones(session)
+
+
+def _descartar_dimensiones():
+    global _dimensiones, _generacion
+    with _lock:
+        _generacion += 1
+        _dimensiones = None
+
+
+# Otro worker cambió una sucursal
+suscribir(TEMA_DIMENSIONES, _descartar_dimensiones)
+
+
+def invalidar_dimensiones():
+    """Llamar después de crear, modificar o eliminar una sucursal."""
+    _descartar_dimensiones()
+    publicar(TEMA_DIMENSIONES)
@@ -1,77 +1,36 @@
-from typing import List, Dict, Any, Optional
-from sqlmodel import Session, select
+from typing import List, Dict, Any, Optional, Tuple
+from sqlmodel import Session, select, func, or_, and_
 from datetime import datetime, timedelta
+import base64
+import binascii
 import json
 
 from app.models.ventaModel import Venta
+from app.api.refactors.dimensionesCache import obtener_dimensiones
 from app.api.refactors.cachedDef import (
     procesar_producto_personalizado_cached,
-    procesar_pizza_cached,
-    procesar_hamburguesa_cached,
-    procesar_costilla_cached,
-    procesar_alitas_cached,
-    procesar_spaghetti_cached,
-    procesar_papas_cached,
-    procesar_mariscos_cached,
-    procesar_refresco_cached,
-    procesar_magno_cached,
-    procesar_rectangular_cached,
-    procesar_barra_cached,
-    get_especialidad_nombre,
-    get_tamano_pizza_nombre
+    obtener_catalogo_plano,
+    CatalogoPlano,
+    _producto_individual,
+    _producto_lista,
+    _parsear_lista_ids,
+    PIZZA,
+    HAMBURGUESA,
+    COSTILLAS,
+    ALITAS,
+    SPAGUETTY,
+    PAPAS,
+    MARISCOS,
+    REFRESCO,
+    MAGNO,
+    RECTANGULAR,
+    BARRA
 )
 
 # Funciones auxiliares comunes
-def _get_cliente_nombre(session: Session, id_cliente: int) -> str:
-    """Obtener nombre completo del cliente"""
-    from app.models.clienteModel import Cliente
-    cliente = session.get(Cliente, id_cliente)
-    return f"{cliente.nombre} {cliente.apellido}" if cliente else "Desconocido"
-
-
-def _get_direccion_detalle(session: Session, id_direccion: int) -> str:
-    """Obtener detalle de la dirección"""
-    from app.models.DireccionesModel import Direccion
-    direccion = session.get(Direccion, id_direccion)
-    if direccion:
-        return f"{direccion.calle} {direccion.manzana}, {direccion.lote}, {direccion.colonia}, {direccion.referencia}"
-    return "Desconocida"
-
-
-def _get_nombre_sucursal(session: Session, id_sucursal: int) -> str:
-    """Obtener nombre de la sucursal"""
-    from app.models.sucursalModel import Sucursal
-    sucursal = session.get(Sucursal, id_sucursal)
-    return sucursal.nombre if sucursal else "Desconocida"
-
-
-def _calcular_totales_venta(session: Session, id_venta: int) -> tuple[float, float, float]:
-    """Calcular total venta, anticipo y saldo pendiente"""
-    from app.models.ventaModel import Venta
-    from app.models.pagosModel import Pago
-    from app.models.detallesModel import DetalleVenta
-    
-    # Total de la venta
-    venta = session.get(Venta, id_venta)
-    total_venta = float(venta.total) if venta else 0.0
-    
-    # Anticipo (suma de pagos)
-    statement_pagos = select(Pago).where(Pago.id_venta == id_venta)
-    pagos = session.exec(statement_pagos).all()
-    anticipo = sum(float(pago.monto) for pago in pagos)
-    
-    # Saldo pendiente
-    saldo_pendiente = total_venta - anticipo
-    
-    return total_venta, anticipo, saldo_pendiente
-
-
-def _contar_productos_venta(session: Session, id_venta: int) -> int:
-    """Contar cantidad total de productos en una venta"""
-    from app.models.detallesModel import DetalleVenta
-    statement_detalles = select(DetalleVenta).where(DetalleVenta.id_venta == id_venta)
-    detalles = session.exec(statement_detalles).all()
-    return sum(detalle.cantidad for detalle in detalles)
+def _formatear_direccion(direccion) -> str:
+    """Dirección en una línea, como se muestra en cocina y pedidos especiales"""
+    return f"{direccion.calle} {direccion.manzana}, {direccion.lote}, {direccion.colonia}, {direccion.referencia}"
 
 
 def _filtrar_por_fecha(statement, filtro: str) -> Any:
@@ -97,12 +56,8 @@ def _filtrar_por_fecha(statement, filtro: str) -> Any:
     return statement
 
 
-def _obtener_nombre_cliente_por_tipo_servicio(session: Session, venta) -> str:
-    """Obtener nombre del cliente basado en el tipo de servicio"""
-    from app.models.pDireccionModel import pDireccion
-    from app.models.clienteModel import Cliente
-    from app.models.pEspecialModel import PEspecial
-    
+def _nombre_cliente_desde_datos(venta, domicilio, pes, clientes: Dict[int, Any]) -> str:
+    """Resolver el nombre del cliente con los registros ya cargados (sin consultas)"""
     if venta.tipo_servicio == 0:  # Comer aquí
         mesa_num = venta.mesa if venta.mesa else "S/N"
         nombre_base = venta.nombreClie if venta.nombreClie else "Sin nombre"
@@ -112,202 +67,352 @@ def _obtener_nombre_cliente_por_tipo_servicio(session: Session, venta) -> str:
         return venta.nombreClie if venta.nombreClie else "Para llevar"
     
     elif venta.tipo_servicio == 2:  # Domicilio
-        statement_domicilio = select(pDireccion).where(pDireccion.id_venta == venta.id_venta)
-        domicilio = session.exec(statement_domicilio).first()
         if domicilio and domicilio.id_clie:
-            cliente = session.get(Cliente, domicilio.id_clie)
+            cliente = clientes.get(domicilio.id_clie)
             return cliente.nombre if cliente else "Cliente sin nombre"
         return venta.nombreClie if venta.nombreClie else "Domicilio sin cliente"
     
     elif venta.tipo_servicio == 3:  # Pedido Especial
-        statement_pespecial = select(PEspecial).where(PEspecial.id_venta == venta.id_venta)
-        pes = session.exec(statement_pespecial).first()
         if not pes:
             return "Sin información - Especial"
         if not pes.fecha_entrega or pes.fecha_entrega.date() != datetime.now().date():
             return "Sin información - Especial"
         
-        cliente = session.get(Cliente, pes.id_clie) if pes.id_clie else None
+        cliente = clientes.get(pes.id_clie) if pes.id_clie else None
         return f"{cliente.nombre} {cliente.apellido} - Especial" if cliente else "Sin nombre - Especial"
     
     return "Sin información"
 
 
-def _procesar_pizza_mitad(session: Session, det) -> Optional[Dict[str, Any]]:
-    """Procesar pizza mitad"""
-    try:
-        mitad_data = det.pizza_mitad
-        if isinstance(mitad_data, str):
-            mitad_data = json.loads(mitad_data)
-            
-        tamano_id = mitad_data.get("tamano")
-        ids_ingredientes = mitad_data.get("ingredientes", [])
-        
-        # Obtener nombres
-        nombre_tamano = get_tamano_pizza_nombre(session, tamano_id)
-        
-        nombres_especialidades = []
-        for id_esp in ids_ingredientes:
-            nombres_especialidades.append(get_especialidad_nombre(session, id_esp))
-            
-        return {
-            "cantidad": det.cantidad,
-            "nombre": f"Pizza Mitad - {nombre_tamano}",
-            "tipo": "Pizza Mitad",
-            "status": det.status,
-            "es_personalizado": True,
-            "tamano": nombre_tamano,
-            "detalles_ingredientes": {
-                "tamano": nombre_tamano,
-                "tamano_id": tamano_id,
-                "especialidades": nombres_especialidades,
-                "cantidad_especialidades": len(nombres_especialidades)
-            }
-        }
-    except Exception as e:
-        return {
-            "cantidad": det.cantidad,
-            "nombre": "Pizza Mitad - Error",
-            "tipo": "Pizza Mitad", 
-            "status": det.status,
-            "es_personalizado": True,
-            "detalles_ingredientes": {"error": str(e)}
-        }
-
-
-def _procesar_producto_personalizado(session: Session, det) -> Dict[str, Any]:
-    """Procesar productos personalizados con ingredientes (versión cacheada)"""
-    return procesar_producto_personalizado_cached(
-        session, det.cantidad, det.ingredientes, det.status
-    )
-
-
-def _procesar_producto_por_tipo(session: Session, det) -> List[Dict[str, Any]]:
-    """Procesar diferentes tipos de productos en un detalle de venta"""
-    productos = []
-    
-    # Pizza mitad
-    if det.pizza_mitad:
-        producto_info = _procesar_pizza_mitad(session, det)
-        if producto_info:
-            productos.append(producto_info)
-        return productos
-
-    if det.ingredientes:
-        producto_info = _procesar_producto_personalizado(session, det)
-        productos.append(producto_info)
-        return productos  # No procesar otros tipos si es personalizado
-    
-    # Procesar paquete si existe
-    if det.id_paquete:
-        productos.extend(_procesar_paquete(session, det))
-        return productos  # Un detalle es O paquete O producto individual
-    
-    # Procesar diferentes tipos de productos individuales
-    if det.id_pizza:
-        producto_info = _procesar_pizza(session, det)
-        if producto_info:
-            productos.append(producto_info)
+def _cargar_datos_pedidos(session: Session, ventas, status_detalles: Optional[List[int]] = None,
+                          con_detalles: bool = True, con_direcciones: bool = False) -> Dict[str, Dict]:
+    """
+    Cargar en bloque todo lo que necesitan los listados de pedidos (y el detalle o ticket
+    de una sola venta). Hace un número constante de consultas (una por tabla con IN) sin
+    importar cuántas ventas haya; cada cliente, dirección o sucursal se lee una sola vez.
+    Con con_detalles=False se omiten los detalles; con con_direcciones=True se cargan las
+    direcciones de domicilios y pedidos especiales.
+    """
+    from app.models.detallesModel import DetalleVenta
+    from app.models.pDireccionModel import pDireccion
+    from app.models.pEspecialModel import PEspecial
+    from app.models.clienteModel import Cliente
+    from app.models.DireccionesModel import Direccion
     
-    if det.id_hamb:
-        producto_info = _procesar_hamburguesa(session, det)
-        if producto_info:
-            productos.append(producto_info)
+    datos = {
+        "detalles": {},
+        "domicilios": {},
+        "especiales": {},
+        "clientes": {},
+        "direcciones": {},
+        "sucursales": {},
+    }
+    if not ventas:
+        return datos
     
-    if det.id_cos:
-        producto_info = _procesar_costilla(session, det)
-        if producto_info:
-            productos.append(producto_info)
+    ids_venta = [venta.id_venta for venta in ventas]
     
-    if det.id_alis:
-        producto_info = _procesar_alitas(session, det)
-        if producto_info:
-            productos.append(producto_info)
+    # Detalles de todas las ventas
+    if con_detalles:
+        statement_detalles = select(DetalleVenta).where(DetalleVenta.id_venta.in_(ids_venta))
+        if status_detalles is not None:
+            statement_detalles = statement_detalles.where(DetalleVenta.status.in_(status_detalles))
+        for det in session.exec(statement_detalles.order_by(DetalleVenta.id_detalle)).all():
+            datos["detalles"].setdefault(det.id_venta, []).append(det)
     
-    if det.id_spag:
-        producto_info = _procesar_spaghetti(session, det)
-        if producto_info:
-            productos.append(producto_info)
+    # Domicilios y pedidos especiales (se conserva el primero por venta)
+    ids_domicilio = [venta.id_venta for venta in ventas if venta.tipo_servicio == 2]
+    if ids_domicilio:
+        statement_domicilio = (
+            select(pDireccion)
+            .where(pDireccion.id_venta.in_(ids_domicilio))
+            .order_by(pDireccion.id_pdomicilio)
+        )
+        for domicilio in session.exec(statement_domicilio).all():
+            datos["domicilios"].setdefault(domicilio.id_venta, domicilio)
     
-    if det.id_papa:
-        producto_info = _procesar_papas(session, det)
-        if producto_info:
-            productos.append(producto_info)
+    ids_especial = [venta.id_venta for venta in ventas if venta.tipo_servicio == 3]
+    if ids_especial:
+        statement_pespecial = (
+            select(PEspecial)
+            .where(PEspecial.id_venta.in_(ids_especial))
+            .order_by(PEspecial.id_pespeciales)
+        )
+        for pes in session.exec(statement_pespecial).all():
+            datos["especiales"].setdefault(pes.id_venta, pes)
     
-    if det.id_maris:
-        producto_info = _procesar_mariscos(session, det)
-        if producto_info:
-            productos.append(producto_info)
+    # Clientes referenciados por domicilios y pedidos especiales
+    ids_cliente = {d.id_clie for d in datos["domicilios"].values() if d.id_clie}
+    ids_cliente |= {p.id_clie for p in datos["especiales"].values() if p.id_clie}
+    if ids_cliente:
+        clientes = session.exec(select(Cliente).where(Cliente.id_clie.in_(ids_cliente))).all()
+        datos["clientes"] = {cliente.id_clie: cliente for cliente in clientes}
     
-    if det.id_refresco:
-        producto_info = _procesar_refresco(session, det)
-        if producto_info:
-            productos.append(producto_info)
+    # Direcciones de domicilios y pedidos especiales
+    if con_direcciones:
+        ids_direccion = {d.id_dir for d in datos["domicilios"].values() if d.id_dir}
+        ids_direccion |= {p.id_dir for p in datos["especiales"].values() if p.id_dir}
+        if ids_direccion:
+            direcciones = session.exec(select(Direccion).where(Direccion.id_dir.in_(ids_direccion))).all()
+            datos["direcciones"] = {direccion.id_dir: direccion for direccion in direcciones}
     
-    if det.id_magno:
-        productos.extend(_procesar_magno(session, det))
+    # Sucursales (de la caché de dimensiones, sin consulta)
+    datos["sucursales"] = obtener_dimensiones(session).sucursales
     
-    if det.id_rec:
-        productos.extend(_procesar_rectangular(session, det))
+    return datos
+
+
+def _construir_pedidos_cocina(session: Session, ventas) -> List[Dict[str, Any]]:
+    """Construir el listado de cocina a partir de los datos cargados en bloque"""
+    datos = _cargar_datos_pedidos(session, ventas, status_detalles=[0, 1, 2])
+    plano = obtener_catalogo_plano(session)
     
-    if det.id_barr:
-        productos.extend(_procesar_barra(session, det))
+    pedidos_cocina = []
+    for venta in ventas:
+        nombre_cliente = _nombre_cliente_desde_datos(
+            venta,
+            datos["domicilios"].get(venta.id_venta),
+            datos["especiales"].get(venta.id_venta),
+            datos["clientes"]
+        )
+        sucursal = datos["sucursales"].get(venta.id_suc)
+        nombre_sucursal = sucursal.nombre if sucursal else "Desconocida"
+        
+        detalles = datos["detalles"].get(venta.id_venta, [])
+        
+        # Procesar productos
+        productos = []
+        for det in detalles:
+            productos.extend(_procesar_producto_por_tipo(session, det, plano))
+        
+        total_items = sum(det.cantidad for det in detalles)
+        
+        pedidos_cocina.append({
+            "id_venta": venta.id_venta,
+            "fecha_hora": venta.fecha_hora,
+            "cliente": nombre_cliente,
+            "tipo_servicio": venta.tipo_servicio,
+            "tipo_servicio_texto": {
+                0: "Comer aquí",
+                1: "Para llevar",
+                2: "Domicilio",
+                3: "Pedido Especial"
+            }.get(venta.tipo_servicio, "Desconocido"),
+            "mesa": venta.mesa if venta.tipo_servicio == 0 else None,
+            "sucursal": nombre_sucursal,
+            "status": venta.status,
+            "version": venta.version,
+            "comentarios": venta.comentarios,
+            "status_texto": {
+                0: "Preparando",
+                1: "Entregado",
+                2: "Completado"
+            }.get(venta.status, "Desconocido"),
+            "cantidad_items": total_items,
+            "cantidad_productos_diferentes": len(detalles),
+            "productos": productos
+        })
     
-    return productos
+    return pedidos_cocina
 
 
-def _procesar_pizza(session: Session, det) -> Optional[Dict[str, Any]]:
-    pizza = procesar_pizza_cached(session, det.cantidad, det.id_pizza, det.status)
-    # Agregar campo con_queso: True si det.queso tiene valor, False si es None o 0
-    if pizza is not None:
-        pizza["con_queso"] = bool(det.queso)
-    return pizza
+def _codificar_cursor(venta) -> str:
+    """Cursor opaco con la posición (fecha_hora, id_venta) de la última venta entregada"""
+    crudo = f"{venta.fecha_hora.isoformat()}|{venta.id_venta}"
+    return base64.urlsafe_b64encode(crudo.encode()).decode()
 
 
-def _procesar_hamburguesa(session: Session, det) -> Optional[Dict[str, Any]]:
-    return procesar_hamburguesa_cached(session, det.cantidad, det.id_hamb, det.status)
+def _decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Regresa (fecha_hora, id_venta); ValueError si el cursor no es válido"""
+    try:
+        fecha, id_venta = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(fecha), int(id_venta)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
 
 
-def _procesar_costilla(session: Session, det) -> Optional[Dict[str, Any]]:
-    return procesar_costilla_cached(session, det.cantidad, det.id_cos, det.status)
+def _despues_del_cursor(statement, fecha_hora: datetime, id_venta: int):
+    """Keyset sobre (fecha_hora, id_venta): las ventas posteriores a la posición del cursor"""
+    return statement.where(or_(
+        Venta.fecha_hora > fecha_hora,
+        and_(Venta.fecha_hora == fecha_hora, Venta.id_venta > id_venta)
+    ))
 
 
-def _procesar_alitas(session: Session, det) -> Optional[Dict[str, Any]]:
-    return procesar_alitas_cached(session, det.cantidad, det.id_alis, det.status)
+def _construir_listado_ventas(session: Session, ventas) -> List[Dict[str, Any]]:
+    """Resumen de cada venta para el listado general, con consultas en bloque por página"""
+    from app.models.detallesModel import DetalleVenta
 
+    datos = _cargar_datos_pedidos(session, ventas, con_detalles=False)
 
-def _procesar_spaghetti(session: Session, det) -> Optional[Dict[str, Any]]:
-    return procesar_spaghetti_cached(session, det.cantidad, det.id_spag, det.status)
+    conteos = {}
+    if ventas:
+        statement_conteos = (
+            select(DetalleVenta.id_venta, func.sum(DetalleVenta.cantidad), func.count(DetalleVenta.id_detalle))
+            .where(DetalleVenta.id_venta.in_([venta.id_venta for venta in ventas]))
+            .group_by(DetalleVenta.id_venta)
+        )
+        conteos = {id_venta: (int(items or 0), productos) for id_venta, items, productos in session.exec(statement_conteos).all()}
+
+    ventas_resumidas = []
+    for venta in ventas:
+        nombre_cliente = _nombre_cliente_desde_datos(
+            venta,
+            datos["domicilios"].get(venta.id_venta),
+            datos["especiales"].get(venta.id_venta),
+            datos["clientes"]
+        )
+        sucursal = datos["sucursales"].get(venta.id_suc)
+        total_items, total_productos = conteos.get(venta.id_venta, (0, 0))
 
+        ventas_resumidas.append({
+            "id_venta": venta.id_venta,
+            "fecha_hora": venta.fecha_hora,
+            "cliente": nombre_cliente,
+            "sucursal": sucursal.nombre if sucursal else "Desconocida",
+            "status": venta.status,
+            "total": float(venta.total),
+            "cantidad_items": total_items,
+            "cantidad_productos": total_productos
+        })
 
-def _procesar_papas(session: Session, det) -> Optional[Dict[str, Any]]:
-    return procesar_papas_cached(session, det.cantidad, det.id_papa, det.status)
+    return ventas_resumidas
 
 
-def _procesar_mariscos(session: Session, det) -> Optional[Dict[str, Any]]:
-    return procesar_mariscos_cached(session, det.cantidad, det.id_maris, det.status)
+# ==================== PEDIDOS ESPECIALES ====================
 
+def _entrega_pedido_especial():
+    """Fecha por la que se ordenan los pedidos especiales; los que no tienen entrega van por su creación"""
+    from app.models.pEspecialModel import PEspecial
+    return func.coalesce(PEspecial.fecha_entrega, PEspecial.fecha_creacion)
 
-def _procesar_refresco(session: Session, det) -> Optional[Dict[str, Any]]:
-    return procesar_refresco_cached(session, det.cantidad, det.id_refresco, det.status)
 
+def _consulta_pedidos_especiales(id_suc: int, status: int):
+    """
+    Pedidos especiales con cliente, dirección, total, anticipo y cantidad de productos
+    en una sola consulta, ordenados por (fecha de entrega, id_pespeciales).
+    """
+    from app.models.pEspecialModel import PEspecial
+    from app.models.clienteModel import Cliente
+    from app.models.DireccionesModel import Direccion
+    from app.models.pagosModel import Pago
+    from app.models.detallesModel import DetalleVenta
 
-def _procesar_magno(session: Session, det) -> List[Dict[str, Any]]:
-    return procesar_magno_cached(session, det.cantidad, det.id_magno, det.status)
+    anticipo = (
+        select(func.coalesce(func.sum(Pago.monto), 0))
+        .where(Pago.id_venta == PEspecial.id_venta)
+        .correlate(PEspecial)
+        .scalar_subquery()
+    )
+    cantidad_productos = (
+        select(func.coalesce(func.sum(DetalleVenta.cantidad), 0))
+        .where(DetalleVenta.id_venta == PEspecial.id_venta)
+        .correlate(PEspecial)
+        .scalar_subquery()
+    )
+    entrega = _entrega_pedido_especial()
+    return (
+        select(PEspecial, Venta.total, Cliente.nombre, Cliente.apellido, Direccion,
+               anticipo, cantidad_productos, entrega)
+        .join(Venta, PEspecial.id_venta == Venta.id_venta)
+        .outerjoin(Cliente, PEspecial.id_clie == Cliente.id_clie)
+        .outerjoin(Direccion, PEspecial.id_dir == Direccion.id_dir)
+        .where(Venta.id_suc == id_suc, PEspecial.status == status)
+        .order_by(entrega.asc(), PEspecial.id_pespeciales.asc())
+    )
 
 
-def _procesar_rectangular(session: Session, det) -> List[Dict[str, Any]]:
-    return procesar_rectangular_cached(session, det.cantidad, det.id_rec, det.status)
+def _despues_del_cursor_especial(statement, fecha_entrega: datetime, id_pespeciales: int):
+    """Keyset sobre (fecha de entrega, id_pespeciales)"""
+    from app.models.pEspecialModel import PEspecial
+    entrega = _entrega_pedido_especial()
+    return statement.where(or_(
+        entrega > fecha_entrega,
+        and_(entrega == fecha_entrega, PEspecial.id_pespeciales > id_pespeciales)
+    ))
+
+
+def _codificar_cursor_especial(fila) -> str:
+    """Mismo formato que _codificar_cursor, con la posición del último pedido especial entregado"""
+    pedido, entrega = fila[0], fila[-1]
+    crudo = f"{entrega.isoformat()}|{pedido.id_pespeciales}"
+    return base64.urlsafe_b64encode(crudo.encode()).decode()
+
+
+def _construir_pedidos_especiales(filas) -> List[Dict[str, Any]]:
+    """Armar la respuesta de /pos/ver-pedidos-especiales con las filas de _consulta_pedidos_especiales"""
+    resultados = []
+    for pedido, total, nombre, apellido, direccion, anticipo, cantidad_productos, _ in filas:
+        total_venta = float(total)
+        anticipo = float(anticipo)
+        resultados.append({
+            "id_pespeciales": pedido.id_pespeciales,
+            "id_venta": pedido.id_venta,
+            "cliente_nombre": f"{nombre} {apellido}" if nombre is not None else "Desconocido",
+            "direccion_detalles": _formatear_direccion(direccion) if direccion else "Desconocida",
+            "fecha_creacion": pedido.fecha_creacion,
+            "fecha_entrega": pedido.fecha_entrega,
+            "total_venta": total_venta,
+            "anticipo": anticipo,
+            "saldo_pendiente": total_venta - anticipo,
+            "cantidad_productos": int(cantidad_productos)
+        })
+    return resultados
+
+
+# ==================== RESOLUCIÓN DE PRODUCTOS ====================
+# Cada renglón de DetalleVenta se clasifica una vez con las tablas de abajo y los
+# nombres salen de las listas del catálogo plano (índice = id del producto).
+
+def _resolver_pizza_mitad(session: Session, plano: CatalogoPlano, det) -> List[Dict[str, Any]]:
+    try:
+        mitad_data = det.pizza_mitad
+        if isinstance(mitad_data, str):
+            mitad_data = json.loads(mitad_data)
+            
+        tamano_id = mitad_data.get("tamano")
+        ids_ingredientes = mitad_data.get("ingredientes", [])
+        
+        # Obtener nombres
+        nombre_tamano = plano.tamano_pizza(session, tamano_id)
+        nombres_especialidades = [plano.especialidad(session, id_esp) for id_esp in ids_ingredientes]
+            
+        return [{
+            "cantidad": det.cantidad,
+            "nombre": f"Pizza Mitad - {nombre_tamano}",
+            "tipo": "Pizza Mitad",
+            "status": det.status,
+            "es_personalizado": True,
+            "tamano": nombre_tamano,
+            "detalles_ingredientes": {
+                "tamano": nombre_tamano,
+                "tamano_id": tamano_id,
+                "especialidades": nombres_especialidades,
+                "cantidad_especialidades": len(nombres_especialidades)
+            }
+        }]
+    except Exception as e:
+        return [{
+            "cantidad": det.cantidad,
+            "nombre": "Pizza Mitad - Error",
+            "tipo": "Pizza Mitad", 
+            "status": det.status,
+            "es_personalizado": True,
+            "detalles_ingredientes": {"error": str(e)}
+        }]
 
 
-def _procesar_barra(session: Session, det) -> List[Dict[str, Any]]:
-    return procesar_barra_cached(session, det.cantidad, det.id_barr, det.status)
+def _resolver_personalizado(session: Session, plano: CatalogoPlano, det) -> List[Dict[str, Any]]:
+    """Productos personalizados con ingredientes (versión cacheada)"""
+    return [procesar_producto_personalizado_cached(session, det.cantidad, det.ingredientes, det.status, plano)]
 
 
-def _procesar_paquete(session: Session, det) -> List[Dict[str, Any]]:
-    if not det.id_paquete:
-        return []
-    
+def _nombre_en_paquete(session: Session, plano: CatalogoPlano, tipo: str, id_producto, respaldo: str) -> str:
+    entrada = plano.entrada(session, tipo, id_producto)
+    return entrada["nombre"] if entrada else f"{respaldo} #{id_producto}"
+
+
+def _resolver_paquete(session: Session, plano: CatalogoPlano, det) -> List[Dict[str, Any]]:
     try:
         if isinstance(det.id_paquete, str):
             paquete_data = json.loads(det.id_paquete)
@@ -323,76 +428,97 @@ def _procesar_paquete(session: Session, det) -> List[Dict[str, Any]]:
         "paquete": id_paquete_numero
     }
 
-    productos_internos = {}
-
-    # Procesar Pizzas
+    # Pizzas: id_pizzas puede ser lista o string
     id_pizzas = paquete_data.get('id_pizzas', [])
     if id_pizzas:
-        # id_pizzas puede ser lista o string
         if isinstance(id_pizzas, str):
             try:
                 id_pizzas = json.loads(id_pizzas)
             except:
                 id_pizzas = [id_pizzas]
 
-        nombres_pizzas = []
-        for pid in id_pizzas:
-            from app.models.pizzasModel import pizzas
-            pizza_db = session.get(pizzas, pid)
-            if pizza_db:
-                # Obtener el nombre de la especialidad y del tamaño
-                nombre_especialidad = get_especialidad_nombre(session, pizza_db.id_esp)
-                nombre_tamano = get_tamano_pizza_nombre(session, pizza_db.id_tamano)
-                # Formatear el nombre de la pizza como "Especialidad - Tamaño"
-                nombre_pizza = f"{nombre_especialidad} - {nombre_tamano}"
-                nombres_pizzas.append(nombre_pizza)
-            else:
-                nombres_pizzas.append(f"Pizza #{pid}")
-
+        # Nombre "Especialidad - Tamaño" desde el catálogo
+        nombres_pizzas = [_nombre_en_paquete(session, plano, PIZZA, pid, "Pizza") for pid in id_pizzas]
         if nombres_pizzas:
-            productos_internos["pizzas"] = nombres_pizzas
-
-    # Procesar Refresco
-    id_refresco = paquete_data.get('id_refresco')
-    if id_refresco:
-        from app.models.refrescosModel import refrescos  # Ajusta la importación
-        refresco_db = session.get(refrescos, id_refresco)
-        if refresco_db:
-            productos_internos["refresco"] = refresco_db.nombre
-        else:
-            productos_internos["refresco"] = f"Refresco #{id_refresco}"
-
-    # Procesar Hamburguesa
-    id_hamb = paquete_data.get('id_hamb')
-    if id_hamb:
-        from app.models.hamburguesasModel import hamburguesas  # Ajusta la importación
-        hamb_db = session.get(hamburguesas, id_hamb)
-        if hamb_db:
-            productos_internos["hamburguesa"] = hamb_db.paquete
-        else:
-            productos_internos["hamburguesa"] = f"Hamburguesa #{id_hamb}"
-
-    # Procesar Alitas
-    id_alis = paquete_data.get('id_alis')
-    if id_alis:
-        from app.models.alitasModel import alitas  # Ajusta la importación
-        alita_db = session.get(alitas, id_alis)
-        if alita_db:
-            productos_internos["alitas"] = alita_db.orden
-        else:
-            productos_internos["alitas"] = f"Alitas #{id_alis}"
+            detalles_paquete["pizzas"] = nombres_pizzas
 
-    # Agregar todos los productos internos al detalle
-    detalles_paquete.update(productos_internos)
+    # Refresco, hamburguesa y alitas
+    for llave, tipo, respaldo in _CONTENIDO_PAQUETE:
+        id_producto = paquete_data.get(llave)
+        if id_producto:
+            detalles_paquete[respaldo.lower()] = _nombre_en_paquete(session, plano, tipo, id_producto, respaldo)
 
     # Crear el producto único del paquete
-    producto_paquete = {
+    return [{
         "cantidad": det.cantidad,
         "nombre": f"Paquete {id_paquete_numero}",
         "tipo": "Paquete",
         "status": det.status,
         "es_personalizado": False,
         "detalles_ingredientes": detalles_paquete
-    }
+    }]
+
+
+# Llave dentro del JSON del paquete -> (tipo del catálogo, nombre en el detalle)
+_CONTENIDO_PAQUETE = (
+    ("id_refresco", REFRESCO, "Refresco"),
+    ("id_hamb", HAMBURGUESA, "Hamburguesa"),
+    ("id_alis", ALITAS, "Alitas"),
+)
+
+# Columnas que definen el renglón completo, en orden de prioridad
+_EXCLUSIVOS = (
+    ("pizza_mitad", _resolver_pizza_mitad),
+    ("ingredientes", _resolver_personalizado),
+    ("id_paquete", _resolver_paquete),
+)
+
+# Columnas de productos individuales: (columna, tipo del catálogo, etiqueta)
+_INDIVIDUALES = (
+    ("id_pizza", PIZZA, "Pizza"),
+    ("id_hamb", HAMBURGUESA, "Hamburguesa"),
+    ("id_cos", COSTILLAS, "Costillas"),
+    ("id_alis", ALITAS, "Alitas"),
+    ("id_spag", SPAGUETTY, "Spaghetti"),
+    ("id_papa", PAPAS, "Papas"),
+    ("id_maris", MARISCOS, "Mariscos"),
+    ("id_refresco", REFRESCO, "Refresco"),
+)
 
-    return [producto_paquete]
\ No newline at end of file
+# Columnas con lista de especialidades de una misma pizza
+_LISTAS = (
+    ("id_magno", MAGNO, "Magno"),
+    ("id_rec", RECTANGULAR, "Rectangular"),
+    ("id_barr", BARRA, "Barra"),
+)
+
+
+def _procesar_producto_por_tipo(session: Session, det, plano: Optional[CatalogoPlano] = None) -> List[Dict[str, Any]]:
+    """Procesar diferentes tipos de productos en un detalle de venta"""
+    if plano is None:
+        plano = obtener_catalogo_plano(session)
+
+    # Pizza mitad, personalizada y paquete son excluyentes
+    for columna, resolver in _EXCLUSIVOS:
+        if getattr(det, columna):
+            return resolver(session, plano, det)
+
+    productos = []
+    for columna, tipo, etiqueta in _INDIVIDUALES:
+        id_producto = getattr(det, columna)
+        if id_producto:
+            entrada = plano.entrada(session, tipo, id_producto)
+            if entrada:
+                producto = _producto_individual(entrada, etiqueta, det.cantidad, det.status)
+                if tipo == PIZZA:
+                    # con_queso: True si det.queso tiene valor, False si es None o 0
+                    producto["con_queso"] = bool(det.queso)
+                productos.append(producto)
+
+    for columna, tipo, etiqueta in _LISTAS:
+        ids = getattr(det, columna)
+        if ids:
+            nombres = [plano.entrada(session, tipo, id_producto) for id_producto in _parsear_lista_ids(ids)]
+            productos.extend(_producto_lista([n for n in nombres if n is not None], etiqueta, det.cantidad, det.status))
+
+    return productos
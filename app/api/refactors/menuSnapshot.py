@@ -0,0 +1,381 @@
+"""
+Snapshot inmutable del menú para los endpoints de /prices.
+Se construye una vez (al arrancar o en la primera petición) con las mismas consultas
+que tenían los endpoints y se guarda ya serializado a JSON, con un ETag por sección.
+También lleva el índice de precios que usa el cotizador de ventas.
+Las escrituras al catálogo lo invalidan (ver invalidar_catalogo en cachedDef) y la
+siguiente petición lo reconstruye. MENU_SNAPSHOT_TTL cubre cambios hechos directo en BD.
+"""
+import os
+import gzip
+import json
+import time
+import hashlib
+from threading import Lock
+from typing import Dict, List, Optional, Any
+from pydantic import TypeAdapter
+from sqlmodel import Session, select
+from dotenv import load_dotenv
+
+from app.schemas.priceSchema import (PriceCostilla,
+                                     PriceAlita,
+                                     priceHamburguesa,
+                                     PriceSpaghetti,
+                                     PricePapas,
+                                     PriceRectangular,
+                                     PriceBarra,
+                                     PriceMarisco,
+                                     PriceRefresco,
+                                     PricePaquete,
+                                     PriceMagno,
+                                     PricePizza)
+
+from app.models.especialidadModel import especialidad
+from app.models.tamanosPizzasModel import tamanosPizzas
+from app.models.tamanosRefrescosModel import tamanosRefrescos
+from app.models.costillasModel import costillas
+from app.models.alitasModel import alitas
+from app.models.hamburguesasModel import hamburguesas
+from app.models.spaguettyModel import spaguetty
+from app.models.papasModel import papas
+from app.models.rectangularModel import rectangular
+from app.models.barraModel import barra
+from app.models.mariscosModel import mariscos
+from app.models.refrescosModel import refrescos
+from app.models.paquetesModel import paquete
+from app.models.magnoModel import magno
+from app.models.pizzasModel import pizzas
+from app.api.refactors.cotizador import IndicePrecios, TAMANO, a_centavos
+
+try:
+    import brotli
+except ImportError:  # opcional; sin él /prices/menu solo ofrece gzip
+    brotli = None
+
+load_dotenv()
+
+MENU_SNAPSHOT_TTL = int(os.getenv("MENU_SNAPSHOT_TTL", "600"))
+
+
+class SeccionMenu:
+    """Una sección del menú ya serializada; contenido, etag y versiones comprimidas no cambian."""
+    __slots__ = ("contenido", "hash", "etag", "comprimido")
+
+    def __init__(self, contenido: bytes, comprimir: bool = False):
+        self.contenido = contenido
+        self.hash = hashlib.sha1(contenido).hexdigest()[:20]
+        self.etag = f'"{self.hash}"'
+        # codificación -> cuerpo comprimido
+        self.comprimido: Dict[str, bytes] = {}
+        if comprimir:
+            self.comprimido["gzip"] = gzip.compress(contenido, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.comprimido["br"] = brotli.compress(contenido)
+
+
+class MenuSnapshot:
+    """version es el hash del contenido (el mismo del cuerpo de /prices/menu): igual en todos los workers."""
+    __slots__ = ("version", "creado", "secciones", "precios")
+
+    def __init__(self, version: str, secciones: Dict[str, SeccionMenu], precios: IndicePrecios):
+        self.version = version
+        self.creado = time.monotonic()
+        self.secciones = secciones
+        self.precios = precios
+
+
+_adaptador = TypeAdapter(Any)
+
+
+def _serializar(datos: Any) -> bytes:
+    # Igual que response_model + JSONResponse: Decimal como texto y JSON compacto
+    return json.dumps(
+        _adaptador.dump_python(datos, mode="json"),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+# ==================== CONSULTAS DEL MENÚ ====================
+
+def _hamburguesas(session: Session) -> List[priceHamburguesa]:
+    statement = (
+        select(hamburguesas.id_hamb, hamburguesas.paquete.label("nombre"), hamburguesas.precio)
+        .order_by(hamburguesas.id_hamb)
+    )
+    return [priceHamburguesa(id_hamb=r.id_hamb, nombre=r.nombre, precio=r.precio) for r in session.exec(statement).all()]
+
+
+def _alitas(session: Session) -> List[PriceAlita]:
+    statement = (
+        select(alitas.id_alis, alitas.orden.label("nombre"), alitas.precio)
+        .order_by(alitas.id_alis)
+    )
+    return [PriceAlita(id_alis=r.id_alis, nombre=r.nombre, precio=r.precio) for r in session.exec(statement).all()]
+
+
+def _costillas(session: Session) -> List[PriceCostilla]:
+    statement = (
+        select(costillas.id_cos, costillas.orden.label("nombre"), costillas.precio)
+        .order_by(costillas.id_cos)
+    )
+    return [PriceCostilla(id_cos=r.id_cos, nombre=r.nombre, precio=r.precio) for r in session.exec(statement).all()]
+
+
+def _spaguetty(session: Session) -> List[PriceSpaghetti]:
+    statement = (
+        select(spaguetty.id_spag, spaguetty.orden.label("nombre"), spaguetty.precio)
+        .order_by(spaguetty.id_spag)
+    )
+    return [PriceSpaghetti(id_spag=r.id_spag, nombre=r.nombre, precio=r.precio) for r in session.exec(statement).all()]
+
+
+def _papas(session: Session) -> List[PricePapas]:
+    statement = (
+        select(papas.id_papa, papas.orden.label("nombre"), papas.precio)
+        .order_by(papas.id_papa)
+    )
+    return [PricePapas(id_papa=r.id_papa, nombre=r.nombre, precio=r.precio) for r in session.exec(statement).all()]
+
+
+def _rectangular(session: Session) -> List[PriceRectangular]:
+    statement = (
+        select(rectangular.id_rec, especialidad.nombre.label("nombre"), rectangular.precio)
+        .join(especialidad, rectangular.id_esp == especialidad.id_esp)
+        .order_by(especialidad.nombre)
+    )
+    return [PriceRectangular(id_rec=r.id_rec, nombre=r.nombre, precio=r.precio) for r in session.exec(statement).all()]
+
+
+def _barra(session: Session) -> List[PriceBarra]:
+    statement = (
+        select(barra.id_barr, especialidad.nombre.label("nombre"), barra.precio)
+        .join(especialidad, barra.id_especialidad == especialidad.id_esp)
+        .order_by(especialidad.nombre)
+    )
+    return [PriceBarra(id_barr=r.id_barr, nombre=r.nombre, precio=r.precio) for r in session.exec(statement).all()]
+
+
+def _mariscos(session: Session) -> List[PriceMarisco]:
+    statement = (
+        select(mariscos.id_maris, mariscos.nombre, tamanosPizzas.precio, tamanosPizzas.tamano)
+        .join(tamanosPizzas, mariscos.id_tamañop == tamanosPizzas.id_tamañop)
+        .order_by(mariscos.id_maris)
+    )
+    return [PriceMarisco(
+        id_maris=r.id_maris,
+        nombre=r.nombre,
+        precio=r.precio,
+        tamano=r.tamano.replace(" Camaron", "").replace("Mar", "")
+    ) for r in session.exec(statement).all()]
+
+
+def _refrescos(session: Session) -> List[PriceRefresco]:
+    statement = (
+        select(refrescos.id_refresco, refrescos.nombre, tamanosRefrescos.precio, tamanosRefrescos.tamano)
+        .join(tamanosRefrescos, refrescos.id_tamano == tamanosRefrescos.id_tamano)
+        .order_by(refrescos.id_refresco)
+        .where(refrescos.nombre != "Jarrito")
+    )
+    return [PriceRefresco(
+        id_refresco=r.id_refresco,
+        nombre=r.nombre,
+        precio=r.precio,
+        tamano=r.tamano
+    ) for r in session.exec(statement).all()]
+
+
+def _paquetes(session: Session) -> List[PricePaquete]:
+    statement = (
+        select(paquete.id_paquete, paquete.nombre, paquete.precio)
+        .order_by(paquete.id_paquete)
+    )
+    return [PricePaquete(id_paquete=r.id_paquete, nombre=r.nombre, precio=r.precio) for r in session.exec(statement).all()]
+
+
+def _magno(session: Session) -> List[PriceMagno]:
+    statement = (
+        select(magno.id_magno, especialidad.nombre.label("nombre"), magno.precio)
+        .join(especialidad, magno.id_especialidad == especialidad.id_esp)
+        .order_by(especialidad.nombre)
+    )
+    return [PriceMagno(id_magno=r.id_magno, nombre=r.nombre, precio=r.precio) for r in session.exec(statement).all()]
+
+
+def _pizzas(session: Session) -> List[PricePizza]:
+    statement = (
+        select(pizzas.id_pizza, especialidad.nombre.label("nombre"), tamanosPizzas.precio, tamanosPizzas.tamano)
+        .join(especialidad, pizzas.id_esp == especialidad.id_esp)
+        .join(tamanosPizzas, pizzas.id_tamano == tamanosPizzas.id_tamañop)
+        .order_by(especialidad.nombre)
+    )
+    return [PricePizza(
+        id_pizza=r.id_pizza,
+        nombre=r.nombre,
+        precio=r.precio,
+        tamano=r.tamano.replace(" Especial", "")
+    ) for r in session.exec(statement).all()]
+
+
+def _descripciones(session: Session) -> List[dict]:
+    result = session.exec(select(especialidad.nombre, especialidad.descripcion).order_by(especialidad.id_esp)).all()
+    result2 = session.exec(select(mariscos.nombre, mariscos.descripcion).order_by(mariscos.id_maris)).all()
+    return [
+        {"nombre": r.nombre, "descripcion": r.descripcion} for r in result
+    ] + [
+        {"nombre": r.nombre, "descripcion": r.descripcion} for r in result2
+    ]
+
+
+def _ingredientes(session: Session) -> List[dict]:
+    # Mismo índice que usa la cocina para las pizzas personalizadas
+    from app.api.refactors.cachedDef import obtener_catalogo_plano
+    return [{"id_ingrediente": i, "nombre": nombre} for i, nombre in obtener_catalogo_plano(session).ingredientes()]
+
+
+def _tamanos_pizzas(session: Session) -> List[dict]:
+    statement = (
+        select(tamanosPizzas.id_tamañop, tamanosPizzas.tamano, tamanosPizzas.precio)
+        .where(tamanosPizzas.tamano.contains("Especial"))
+        .order_by(tamanosPizzas.id_tamañop)
+    )
+    return [
+        {"id_tamañop": r.id_tamañop, "tamano": r.tamano.replace(" Especial", ""), "precio": r.precio}
+        for r in session.exec(statement).all()
+    ]
+
+
+def _especialidades(session: Session) -> List[dict]:
+    statement = select(especialidad.id_esp, especialidad.nombre, especialidad.descripcion).order_by(especialidad.id_esp)
+    return [
+        {"id_esp": r.id_esp, "nombre": r.nombre, "descripcion": r.descripcion} for r in session.exec(statement).all()
+    ]
+
+
+# sección -> consulta; el nombre de la sección es la ruta bajo /prices.
+# El orden es el de los campos de MenuCompleto.
+SECCIONES_MENU = {
+    "hamburguesas": _hamburguesas,
+    "alitas": _alitas,
+    "costillas": _costillas,
+    "spaguetty": _spaguetty,
+    "papas": _papas,
+    "rectangular": _rectangular,
+    "barra": _barra,
+    "mariscos": _mariscos,
+    "refrescos": _refrescos,
+    "paquetes": _paquetes,
+    "magno": _magno,
+    "pizzas": _pizzas,
+    "descripciones": _descripciones,
+    "ingredientes": _ingredientes,
+    "tamanosPizzas": _tamanos_pizzas,
+    "especialidades": _especialidades,
+}
+
+
+# Sección con todo el menú en un solo cuerpo, para /prices/menu
+MENU_COMPLETO = "menu"
+
+# campo de ItemVentaRequest -> (sección del menú, atributo con el id)
+_PRECIOS_POR_CAMPO = {
+    "id_hamb": ("hamburguesas", "id_hamb"),
+    "id_alis": ("alitas", "id_alis"),
+    "id_cos": ("costillas", "id_cos"),
+    "id_spag": ("spaguetty", "id_spag"),
+    "id_papa": ("papas", "id_papa"),
+    "id_rec": ("rectangular", "id_rec"),
+    "id_barr": ("barra", "id_barr"),
+    "id_maris": ("mariscos", "id_maris"),
+    "id_refresco": ("refrescos", "id_refresco"),
+    "id_paquete": ("paquetes", "id_paquete"),
+    "id_magno": ("magno", "id_magno"),
+    "id_pizza": ("pizzas", "id_pizza"),
+}
+
+
+def _version_menu(secciones: Dict[str, SeccionMenu]) -> str:
+    """
+    Hash de las secciones: no cambia si el menú no cambió, aunque el snapshot se haya
+    reconstruido o lo haya armado otro worker.
+    """
+    return hashlib.sha1("".join(secciones[nombre].hash for nombre in SECCIONES_MENU).encode()).hexdigest()[:20]
+
+
+def _menu_completo(secciones: Dict[str, SeccionMenu], version: str) -> SeccionMenu:
+    """Armar el menú completo pegando los bytes ya serializados de cada sección."""
+    partes = [b'{"version":"' + version.encode() + b'"']
+    for nombre in SECCIONES_MENU:
+        partes.append(b',"' + nombre.encode() + b'":' + secciones[nombre].contenido)
+    partes.append(b"}")
+    return SeccionMenu(b"".join(partes), comprimir=True)
+
+
+# ==================== SNAPSHOT VIGENTE ====================
+
+_snapshot: Optional[MenuSnapshot] = None
+# Se incrementa al invalidar; un snapshot que empezó a construirse antes no se publica
+_generacion = 0
+_lock = Lock()
+_construir_lock = Lock()
+
+
+def _indice_precios(session: Session, datos: Dict[str, List[Any]]) -> IndicePrecios:
+    """Índice para el cotizador con los mismos registros que se serializaron."""
+    precios = {
+        campo: {getattr(r, atributo): a_centavos(r.precio) for r in datos[seccion]}
+        for campo, (seccion, atributo) in _PRECIOS_POR_CAMPO.items()
+    }
+    # Todos los tamaños (la sección tamanosPizzas solo publica los "Especial")
+    precios[TAMANO] = {
+        r.id_tamañop: a_centavos(r.precio)
+        for r in session.exec(select(tamanosPizzas.id_tamañop, tamanosPizzas.precio)).all()
+    }
+    return IndicePrecios(precios)
+
+
+def construir_menu(session: Session) -> MenuSnapshot:
+    """Ejecutar todas las consultas del menú y publicar el snapshot nuevo."""
+    global _snapshot
+    generacion = _generacion
+    datos = {nombre: consulta(session) for nombre, consulta in SECCIONES_MENU.items()}
+    secciones = {nombre: SeccionMenu(_serializar(registros)) for nombre, registros in datos.items()}
+    version = _version_menu(secciones)
+    secciones[MENU_COMPLETO] = _menu_completo(secciones, version)
+    precios = _indice_precios(session, datos)
+    snapshot = MenuSnapshot(version, secciones, precios)
+    with _lock:
+        if generacion == _generacion:
+            _snapshot = snapshot
+        return snapshot
+
+
+def invalidar_menu():
+    """Descartar el snapshot; la siguiente petición a /prices lo reconstruye."""
+    global _snapshot, _generacion
+    with _lock:
+        _generacion += 1
+        _snapshot = None
+
+
+def _vigente(snapshot: Optional[MenuSnapshot]) -> bool:
+    return snapshot is not None and time.monotonic() - snapshot.creado < MENU_SNAPSHOT_TTL
+
+
+def obtener_menu(session: Session) -> MenuSnapshot:
+    snapshot = _snapshot
+    if _vigente(snapshot):
+        return snapshot
+    # Un solo hilo reconstruye; los demás esperan y usan el resultado
+    with _construir_lock:
+        snapshot = _snapshot
+        if _vigente(snapshot):
+            return snapshot
+        return construir_menu(session)
+
+
+def obtener_precios(session: Session) -> IndicePrecios:
+    """Índice de precios del snapshot vigente (ver cotizador)."""
+    return obtener_menu(session).precios
@@ -1,5 +1,5 @@
 from fastapi import HTTPException
-from sqlmodel import Session
+from sqlmodel import Session, select, false
 from decimal import Decimal
 from datetime import datetime
 
@@ -9,8 +9,9 @@ from app.models.pEspecialModel import PEspecial
 from app.models.pagosModel import Pago
 from app.models.detallesModel import DetalleVenta
 from app.models.clienteModel import Cliente
-from app.models.sucursalModel import Sucursal
 from app.models.DireccionesModel import Direccion
+from app.api.refactors.resumenRefactor import acumular_pagos
+from app.api.refactors.dimensionesCache import obtener_dimensiones
 
 
 
@@ -31,6 +32,15 @@ def validar_pagos_tipo_servicio(venta_request):
                 status_code=400,
                 detail=f"Debe especificar al menos un método de pago cuando el tipo de servicio es {venta_request.tipo_servicio}"
             )
+        # Para llevar: los pagos deben sumar el total (si el total lo calculó el servidor
+        # el esquema no pudo validarlo)
+        if venta_request.tipo_servicio == 1:
+            total_pagos = sum(Decimal(str(p.monto)) for p in venta_request.pagos)
+            if abs(total_pagos - venta_request.total) > Decimal('0.01'):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"La suma de los pagos ({total_pagos}) debe ser igual al total de la venta ({venta_request.total})"
+                )
     # Para domicilio, validar que los pagos sumen el total
     elif venta_request.tipo_servicio == 2:
         if not venta_request.pagos or len(venta_request.pagos) == 0:
@@ -46,8 +56,28 @@ def validar_pagos_tipo_servicio(venta_request):
                 detail=f"El total de los pagos ({total_pagos}) debe ser igual al total de la venta ({venta_request.total})"
             )
 
-def validar_cliente_direccion(venta_request, session: Session):
-    """Valida cliente y dirección para tipos de servicio que los requieren"""
+def precargar_referencias_venta(venta_request, session: Session):
+    """
+    Carga cliente y dirección de la venta en una sola consulta (la sucursal sale de la
+    caché de dimensiones) y regresa la tupla (cliente, direccion) para pasarla a
+    validar_cliente_direccion. Si la venta no lleva cliente o este no existe regresa
+    None y la validación consulta por su cuenta.
+    """
+    if venta_request.tipo_servicio not in [2, 3] or not venta_request.id_cliente:
+        return None
+    statement = (
+        select(Cliente, Direccion)
+        .select_from(Cliente)
+        .outerjoin(Direccion, Direccion.id_dir == venta_request.id_direccion if venta_request.id_direccion else false())
+        .where(Cliente.id_clie == venta_request.id_cliente)
+    )
+    return session.exec(statement).first()
+
+def validar_cliente_direccion(venta_request, session: Session, referencias=None):
+    """
+    Valida cliente y dirección para tipos de servicio que los requieren. referencias es
+    lo que regresa precargar_referencias_venta; si no viene se consultan aquí.
+    """
     if venta_request.tipo_servicio not in [2, 3]:
         return None, None
     
@@ -57,7 +87,7 @@ def validar_cliente_direccion(venta_request, session: Session):
             detail=f"Debe especificar el id_cliente cuando el tipo de servicio es {venta_request.tipo_servicio}"
         )
 
-    cliente = session.get(Cliente, venta_request.id_cliente)
+    cliente, direccion = referencias if referencias else (session.get(Cliente, venta_request.id_cliente), None)
     if not cliente:
         raise HTTPException(
             status_code=404,
@@ -70,7 +100,8 @@ def validar_cliente_direccion(venta_request, session: Session):
             detail=f"Debe especificar el id_direccion cuando el tipo de servicio es {venta_request.tipo_servicio}"
         )
 
-    direccion = session.get(Direccion, venta_request.id_direccion)
+    if not referencias:
+        direccion = session.get(Direccion, venta_request.id_direccion)
     if not direccion:
         raise HTTPException(
             status_code=404,
@@ -158,7 +189,7 @@ def validar_mesa(venta_request):
 
 def validar_sucursal(venta_request, session: Session):
     """Valida que la sucursal exista"""
-    sucursal = session.get(Sucursal, venta_request.id_suc)
+    sucursal = obtener_dimensiones(session).sucursales.get(venta_request.id_suc)
     if not sucursal:
         raise HTTPException(
             status_code=404,
@@ -201,15 +232,12 @@ def crear_registro_domicilio(venta_request, id_venta, session: Session):
     # Registrar solo pagos de transferencia (id_metpago == 1)
     # Tarjeta (id_metpago == 2) y Efectivo (id_metpago == 3) son solo instrucciones, no se registran
     if venta_request.pagos:
-        for pago in venta_request.pagos:
-            if pago.id_metpago == 1:  # Solo Transferencia
-                nuevo_pago = Pago(
-                    id_venta=id_venta,
-                    id_metpago=pago.id_metpago,
-                    monto=Decimal(str(pago.monto)),
-                    referencia=pago.referencia
-                )
-                session.add(nuevo_pago)
+        nuevos_pagos = [
+            _fila_pago(id_venta, pago)
+            for pago in venta_request.pagos
+            if pago.id_metpago == 1  # Solo Transferencia
+        ]
+        insertar_pagos(session, session.get(Venta, id_venta), nuevos_pagos)
 
 def crear_pedido_especial(venta_request, id_venta, session: Session):
     """Crea el registro de pedido especial"""
@@ -225,109 +253,116 @@ def crear_pedido_especial(venta_request, id_venta, session: Session):
     )
     session.add(nuevo_pedido_especial)
 
+def _fila_pago(id_venta, pago_request) -> dict:
+    return {
+        "id_venta": id_venta,
+        "id_metpago": pago_request.id_metpago,
+        "monto": Decimal(str(pago_request.monto)),
+        "referencia": pago_request.referencia
+    }
+
+def insertar_pagos(session: Session, venta: Venta, filas_pago):
+    """Inserta los pagos en un solo executemany y los suma al acumulado diario"""
+    if not filas_pago:
+        return
+    session.execute(Pago.__table__.insert(), filas_pago)
+    acumular_pagos(session, venta, [Pago(**fila) for fila in filas_pago])
+
 def crear_pagos(venta_request, id_venta, session: Session):
     """Crea los registros de pago para tipos de servicio que los requieren"""
     pagos_creados = []
+    nuevos_pagos = []
     
     if not venta_request.pagos:
         return pagos_creados
     
-    # Para domicilio (tipo_servicio 2): solo registrar transferencias (id_metpago == 3)
-    if venta_request.tipo_servicio == 2:
-        for pago_request in venta_request.pagos:
-            if pago_request.id_metpago == 3:  # Solo transferencia
-                nuevo_pago = Pago(
-                    id_venta=id_venta,
-                    id_metpago=pago_request.id_metpago,
-                    monto=Decimal(str(pago_request.monto)),
-                    referencia=pago_request.referencia
-                )
-                session.add(nuevo_pago)
-                
-                pago_info = {
-                    "id_metpago": pago_request.id_metpago,
-                    "monto": float(pago_request.monto)
-                }
-                if pago_request.referencia:
-                    pago_info["referencia"] = pago_request.referencia
-                
-                pagos_creados.append(pago_info)
-    
-    # Para para llevar (1) y pedido especial (3): registrar todos los pagos
-    elif venta_request.tipo_servicio in [1, 3]:
-        for pago_request in venta_request.pagos:
-            nuevo_pago = Pago(
-                id_venta=id_venta,
-                id_metpago=pago_request.id_metpago,
-                monto=Decimal(str(pago_request.monto)),
-                referencia=pago_request.referencia
-            )
-            session.add(nuevo_pago)
-            
-            pago_info = {
-                "id_metpago": pago_request.id_metpago,
-                "monto": float(pago_request.monto)
-            }
-            if pago_request.referencia:
-                pago_info["referencia"] = pago_request.referencia
-            
-            pagos_creados.append(pago_info)
+    for pago_request in venta_request.pagos:
+        # Para domicilio (tipo_servicio 2): solo registrar transferencias (id_metpago == 3)
+        # Para para llevar (1) y pedido especial (3): registrar todos los pagos
+        if venta_request.tipo_servicio == 2:
+            if pago_request.id_metpago != 3:
+                continue
+        elif venta_request.tipo_servicio not in [1, 3]:
+            continue
+        
+        nuevos_pagos.append(_fila_pago(id_venta, pago_request))
+        
+        pago_info = {
+            "id_metpago": pago_request.id_metpago,
+            "monto": float(pago_request.monto)
+        }
+        if pago_request.referencia:
+            pago_info["referencia"] = pago_request.referencia
+        
+        pagos_creados.append(pago_info)
     
+    insertar_pagos(session, session.get(Venta, id_venta), nuevos_pagos)
     return pagos_creados
 
-def crear_detalles_venta(venta_request, id_venta, session: Session):
-    """Crea los detalles de la venta (items)"""
-    for item in venta_request.items:
-        ingredientes_json = None
-        if item.ingredientes:
-            ingredientes_json = {
-                "tamano": item.ingredientes.tamano,
-                "ingredientes": item.ingredientes.ingredientes
-            }
-            
-        pizza_mitad_json = None
-        if item.pizza_mitad:
-            pizza_mitad_json = {
-                "tamano": item.pizza_mitad.tamano,
-                "ingredientes": item.pizza_mitad.ingredientes
-            }
-        id_paquete_json = None
-        if item.id_paquete:
-            # El modelo ContenidoPaquete ya validó la estructura
-            id_paquete_json = {
-                "id_paquete": item.id_paquete.id_paquete,
-                "id_pizzas": item.id_paquete.id_pizzas,
-                "id_refresco": item.id_paquete.id_refresco
-            }
-            
-            # Solo agregar los campos opcionales si tienen valor
-            if item.id_paquete.id_alis is not None:
-                id_paquete_json["id_alis"] = item.id_paquete.id_alis
-            if item.id_paquete.id_hamb is not None:
-                id_paquete_json["id_hamb"] = item.id_paquete.id_hamb
+def fila_detalle(item, id_venta) -> dict:
+    """
+    Renglón de DetalleVenta para un ItemVentaRequest. Todas las filas llevan las mismas
+    columnas para que vayan en un solo executemany.
+    """
+    ingredientes_json = None
+    if item.ingredientes:
+        ingredientes_json = {
+            "tamano": item.ingredientes.tamano,
+            "ingredientes": item.ingredientes.ingredientes
+        }
         
-        nuevo_detalle = DetalleVenta(
-            id_venta=id_venta,
-            cantidad=item.cantidad,
-            precio_unitario=Decimal(str(item.precio_unitario)),
-            id_hamb=item.id_hamb,
-            id_cos=item.id_cos,
-            id_alis=item.id_alis,
-            id_spag=item.id_spag,
-            id_papa=item.id_papa,
-            id_rec=item.id_rec,
-            id_barr=item.id_barr,
-            id_maris=item.id_maris,
-            id_refresco=item.id_refresco,
-            id_paquete=id_paquete_json,  # JSON con toda la info del paquete
-            id_magno=item.id_magno,
-            id_pizza=item.id_pizza,
-            pizza_mitad=pizza_mitad_json,
-            ingredientes=ingredientes_json,
-            queso=item.queso,
-            status=item.status if hasattr(item, 'status') and item.status is not None else 1
-        )
-        session.add(nuevo_detalle)
+    pizza_mitad_json = None
+    if item.pizza_mitad:
+        pizza_mitad_json = {
+            "tamano": item.pizza_mitad.tamano,
+            "ingredientes": item.pizza_mitad.ingredientes
+        }
+    id_paquete_json = None
+    if item.id_paquete:
+        # El modelo ContenidoPaquete ya validó la estructura
+        id_paquete_json = {
+            "id_paquete": item.id_paquete.id_paquete,
+            "id_pizzas": item.id_paquete.id_pizzas,
+            "id_refresco": item.id_paquete.id_refresco
+        }
+        
+        # Solo agregar los campos opcionales si tienen valor
+        if item.id_paquete.id_alis is not None:
+            id_paquete_json["id_alis"] = item.id_paquete.id_alis
+        if item.id_paquete.id_hamb is not None:
+            id_paquete_json["id_hamb"] = item.id_paquete.id_hamb
+    
+    return {
+        "id_venta": id_venta,
+        "cantidad": item.cantidad,
+        "precio_unitario": Decimal(str(item.precio_unitario)),
+        "id_hamb": item.id_hamb,
+        "id_cos": item.id_cos,
+        "id_alis": item.id_alis,
+        "id_spag": item.id_spag,
+        "id_papa": item.id_papa,
+        "id_rec": item.id_rec,
+        "id_barr": item.id_barr,
+        "id_maris": item.id_maris,
+        "id_refresco": item.id_refresco,
+        "id_paquete": id_paquete_json,  # JSON con toda la info del paquete
+        "id_magno": item.id_magno,
+        "id_pizza": item.id_pizza,
+        "pizza_mitad": pizza_mitad_json,
+        "ingredientes": ingredientes_json,
+        "queso": item.queso,
+        "status": item.status if hasattr(item, 'status') and item.status is not None else 1
+    }
+
+
+def insertar_detalles(session: Session, filas_detalle):
+    if filas_detalle:
+        session.execute(DetalleVenta.__table__.insert(), filas_detalle)
+
+
+def crear_detalles_venta(venta_request, id_venta, session: Session):
+    """Crea los detalles de la venta (items) con un solo INSERT executemany"""
+    insertar_detalles(session, [fila_detalle(item, id_venta) for item in venta_request.items])
 
 def construir_respuesta(venta_request, nueva_venta, pagos_creados, detalles_domicilio):
     """Construye la respuesta del endpoint según el tipo de servicio"""
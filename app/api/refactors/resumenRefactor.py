@@ -0,0 +1,146 @@
+"""
+Mantenimiento del acumulado diario de ventas (ResumenVentaDia).
+Cada escritura de ventas/pagos suma o resta su parte con un upsert dentro de la
+misma transacción, así los reportes de corte y caja leen pocas filas sin importar
+cuánto histórico haya. reconstruir_resumen rehace el acumulado desde Venta y Pago.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Date, delete
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select, func
+
+from app.models.ventaModel import Venta
+from app.models.pagosModel import Pago
+from app.models.resumenVentaModel import ResumenVentaDia
+
+# id_metpago reservado para el conteo y total de las ventas
+METPAGO_VENTAS = 0
+
+_Llave = Tuple[date, int, int, int]
+
+
+def _llave(venta: Venta, id_metpago: int) -> _Llave:
+    return (venta.fecha_hora.date(), venta.id_suc, venta.id_caja or 0, id_metpago)
+
+
+def _acumular(session: Session, filas: Dict[_Llave, Tuple[int, Decimal]]):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE num = num + x, monto = monto + y. Las filas van
+    ordenadas por llave primaria: InnoDB las bloquea en ese orden, y dos transacciones
+    del mismo día y caja con los pagos en distinto orden se bloquearían mutuamente.
+    """
+    if not filas:
+        return
+    tabla = ResumenVentaDia.__table__
+    valores = [
+        {"fecha": fecha, "id_suc": id_suc, "id_caja": id_caja, "id_metpago": id_metpago, "num": num, "monto": monto}
+        for (fecha, id_suc, id_caja, id_metpago), (num, monto) in sorted(filas.items())
+    ]
+    if session.get_bind().dialect.name == "mysql":
+        statement = mysql_insert(tabla).values(valores)
+        statement = statement.on_duplicate_key_update(
+            num=tabla.c.num + statement.inserted.num,
+            monto=tabla.c.monto + statement.inserted.monto,
+        )
+    else:
+        # SQLite, para el script de benchmark y pruebas locales
+        statement = sqlite_insert(tabla).values(valores)
+        statement = statement.on_conflict_do_update(
+            index_elements=[c for c in tabla.primary_key.columns],
+            set_={"num": tabla.c.num + statement.excluded.num, "monto": tabla.c.monto + statement.excluded.monto},
+        )
+    session.exec(statement)
+
+
+def acumular_venta(session: Session, venta: Venta, signo: int = 1):
+    """Sumar (o restar con signo=-1) la venta al conteo y total del día."""
+    _acumular(session, {_llave(venta, METPAGO_VENTAS): (signo, signo * Decimal(venta.total))})
+
+
+def acumular_pagos(session: Session, venta: Venta, pagos: Iterable[Pago], signo: int = 1):
+    """Sumar (o restar con signo=-1) los pagos de la venta por método."""
+    filas: Dict[_Llave, Tuple[int, Decimal]] = {}
+    for pago in pagos:
+        llave = _llave(venta, pago.id_metpago)
+        num, monto = filas.get(llave, (0, Decimal("0")))
+        filas[llave] = (num + signo, monto + signo * Decimal(pago.monto))
+    _acumular(session, filas)
+
+
+def retirar_venta(session: Session, venta: Venta):
+    """Restar la venta y todos sus pagos, p. ej. antes de editarla o eliminarla."""
+    pagos = session.exec(select(Pago).where(Pago.id_venta == venta.id_venta)).all()
+    acumular_venta(session, venta, signo=-1)
+    acumular_pagos(session, venta, pagos, signo=-1)
+    return pagos
+
+
+def reconstruir_resumen(session: Session, desde: Optional[date] = None, hasta: Optional[date] = None) -> int:
+    """
+    Rehacer el acumulado desde Venta y Pago para [desde, hasta) (todo si no se dan),
+    un mes a la vez para no cargar el histórico completo en memoria. No hace commit.
+    """
+    if desde is None or hasta is None:
+        minimo, maximo = session.exec(select(func.min(Venta.fecha_hora), func.max(Venta.fecha_hora))).one()
+        if minimo is None:
+            session.exec(delete(ResumenVentaDia))
+            return 0
+        desde = desde or minimo.date()
+        hasta = hasta or maximo.date() + timedelta(days=1)
+
+    filas_escritas = 0
+    inicio = desde
+    while inicio < hasta:
+        siguiente = date(inicio.year + 1, 1, 1) if inicio.month == 12 else date(inicio.year, inicio.month + 1, 1)
+        fin = min(siguiente, hasta)
+        filas_escritas += _reconstruir_rango(session, inicio, fin)
+        inicio = fin
+    return filas_escritas
+
+
+def _reconstruir_rango(session: Session, inicio: date, fin: date) -> int:
+    session.exec(delete(ResumenVentaDia).where(ResumenVentaDia.fecha >= inicio, ResumenVentaDia.fecha < fin))
+
+    rango = (
+        Venta.fecha_hora >= datetime.combine(inicio, datetime.min.time()),
+        Venta.fecha_hora < datetime.combine(fin, datetime.min.time()),
+    )
+    fecha = func.date(Venta.fecha_hora, type_=Date)
+    id_caja = func.coalesce(Venta.id_caja, 0)
+
+    filas: Dict[_Llave, Tuple[int, Decimal]] = defaultdict(lambda: (0, Decimal("0")))
+    ventas = session.exec(
+        select(fecha, Venta.id_suc, id_caja, func.count(Venta.id_venta), func.sum(Venta.total))
+        .where(*rango)
+        .group_by(fecha, Venta.id_suc, id_caja)
+    ).all()
+    for dia, id_suc, caja, num, monto in ventas:
+        filas[(dia, id_suc, caja, METPAGO_VENTAS)] = (num, Decimal(monto or 0))
+
+    pagos = session.exec(
+        select(fecha, Venta.id_suc, id_caja, Pago.id_metpago, func.count(Pago.id_pago), func.sum(Pago.monto))
+        .join(Venta, Pago.id_venta == Venta.id_venta)
+        .where(*rango)
+        .group_by(fecha, Venta.id_suc, id_caja, Pago.id_metpago)
+    ).all()
+    for dia, id_suc, caja, id_metpago, num, monto in pagos:
+        filas[(dia, id_suc, caja, id_metpago)] = (num, Decimal(monto or 0))
+
+    _acumular(session, dict(filas))
+    return len(filas)
+
+
+def resumen_pendiente(session: Session) -> bool:
+    """
+    True si el acumulado está vacío y ya hay ventas: falta correr
+    scripts/reconstruir_resumen_ventas.py. Solo lee; no se reconstruye al arrancar para
+    que varios workers no compitan borrando e insertando el mismo rango.
+    """
+    if session.exec(select(ResumenVentaDia.fecha).limit(1)).first() is not None:
+        return False
+    return session.exec(select(Venta.id_venta).limit(1)).first() is not None
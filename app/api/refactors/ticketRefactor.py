@@ -0,0 +1,167 @@
+"""
+Caché de tickets ya armados para reimpresiones y para abrir un pedido en cocina.
+La llave es (vista, id_venta, Venta.version, generación del catálogo): cada escritura del
+POS sobre la venta incrementa su versión (ver cocinaRefactor.incrementar_version_venta)
+y renombrar un producto cambia la generación, así que una entrada vieja nunca se sirve;
+solo deja de pedirse y sale por LRU o TTL.
+Nombres de cliente, dirección y sucursal no tienen versión; el TTL acota cuánto puede
+tardar en verse un cambio en ellos. En pedidos especiales el nombre depende de si se
+entregan hoy, así que su llave lleva también la fecha.
+Se guarda el JSON ya serializado (los mismos bytes que regresaba FastAPI) y, para el
+ticket, su versión ESC/POS lista para mandar a la impresora.
+"""
+import os
+import textwrap
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.cache import TTLCache
+from app.api.refactors.cachedDef import generacion_catalogo
+from app.models.ventaModel import Venta
+
+load_dotenv()
+
+TICKET_CACHE_TTL = int(os.getenv("TICKET_CACHE_TTL", "900"))
+TICKET_CACHE_MAX = int(os.getenv("TICKET_CACHE_MAX", "512"))
+TICKET_CACHE_MAX_BYTES = int(os.getenv("TICKET_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# Caracteres por renglón: 42 en impresoras de 80 mm con fuente A, 32 en las de 58 mm
+TICKET_ANCHO = int(os.getenv("TICKET_ANCHO", "42"))
+
+# Vistas que se guardan por venta
+VISTA_COCINA = "cocina"
+VISTA_TICKET = "ticket"
+
+
+class TicketRenderizado:
+    """Una vista de la venta ya serializada; no cambia una vez creada."""
+    __slots__ = ("version", "json", "escpos")
+
+    def __init__(self, version: int, json: bytes, escpos: Optional[bytes] = None):
+        self.version = version
+        self.json = json
+        self.escpos = escpos
+
+
+_tickets = TTLCache(ttl_seconds=TICKET_CACHE_TTL, maxsize=TICKET_CACHE_MAX,
+                    maxbytes=TICKET_CACHE_MAX_BYTES, nombre="tickets")
+
+
+def obtener_ticket(venta: Venta, vista: str, construir: Callable[[], Dict[str, Any]]) -> TicketRenderizado:
+    """
+    Vista de la venta desde la caché; si su versión no está, se arma con construir()
+    y se guarda. venta debe venir recién leída para que su versión sea la vigente.
+    """
+    # El nombre de un pedido especial cambia a medianoche (ver _nombre_cliente_desde_datos)
+    dia = datetime.now().date() if venta.tipo_servicio == 3 else None
+    key = (vista, venta.id_venta, venta.version, generacion_catalogo(), dia)
+    render = _tickets.get(key)
+    if render is None:
+        datos = construir()
+        escpos = ticket_escpos(datos) if vista == VISTA_TICKET else None
+        render = TicketRenderizado(venta.version, _serializar(datos), escpos)
+        _tickets.set(key, render)
+    return render
+
+
+def _serializar(datos: Dict[str, Any]) -> bytes:
+    # Igual que regresar el dict desde el endpoint: jsonable_encoder + JSONResponse
+    return JSONResponse(jsonable_encoder(datos)).body
+
+
+# ==================== ESC/POS ====================
+
+ESC = b"\x1b"
+GS = b"\x1d"
+_INICIAR = ESC + b"@"
+_PAGINA_850 = ESC + b"t\x02"
+_IZQUIERDA = ESC + b"a\x00"
+_CENTRO = ESC + b"a\x01"
+_NEGRITA = ESC + b"E\x01"
+_SIN_NEGRITA = ESC + b"E\x00"
+_DOBLE = GS + b"!\x11"
+_NORMAL = GS + b"!\x00"
+# Avanzar el papel y corte parcial
+_CORTE = GS + b"V\x42\x03"
+
+
+def _texto(texto: str) -> bytes:
+    return texto.encode("cp850", errors="replace")
+
+
+def _renglon(izquierda: str, derecha: str, ancho: int) -> bytes:
+    """Texto a la izquierda e importe alineado a la derecha en un solo renglón."""
+    espacio = max(ancho - len(derecha) - 1, 1)
+    return _texto(f"{izquierda[:espacio]:<{espacio}} {derecha}\n")
+
+
+def _parrafo(texto: str, ancho: int, sangria: str = "") -> bytes:
+    lineas = textwrap.wrap(texto, ancho, initial_indent=sangria, subsequent_indent=sangria) or [""]
+    return _texto("\n".join(lineas) + "\n")
+
+
+def _dinero(valor: Any) -> str:
+    return f"${float(valor or 0):,.2f}"
+
+
+def _fecha(valor: Any) -> str:
+    if isinstance(valor, datetime):
+        return valor.strftime("%d/%m/%Y %H:%M")
+    return str(valor) if valor else ""
+
+
+def _subrenglones(producto: Dict[str, Any]) -> List[str]:
+    """Lo que la cocina necesita leer debajo del producto."""
+    lineas = list(producto.get("especialidades") or [])
+    detalles = producto.get("detalles_ingredientes") or {}
+    if isinstance(detalles, dict):
+        lineas += detalles.get("ingredientes") or []
+        lineas += detalles.get("especialidades") or []
+        lineas += detalles.get("pizzas") or []
+        for llave in ("refresco", "hamburguesa", "alitas"):
+            if detalles.get(llave):
+                lineas.append(detalles[llave])
+    if producto.get("conQueso"):
+        lineas.append("Con queso")
+    return [str(linea) for linea in lineas]
+
+
+def ticket_escpos(ticket: Dict[str, Any], ancho: int = TICKET_ANCHO) -> bytes:
+    """El ticket de /pos/recrea-ticket como bytes ESC/POS (página de códigos 850)."""
+    separador = _texto("-" * ancho + "\n")
+    salida = [_INICIAR, _PAGINA_850, _CENTRO, _NEGRITA, _texto(f"{ticket.get('sucursal') or ''}\n"), _SIN_NEGRITA,
+              _DOBLE, _texto(f"Pedido #{ticket['id_venta']}\n"), _NORMAL,
+              _texto(f"{_fecha(ticket.get('fecha_hora'))}\n{ticket.get('tipo_servicio_texto', '')}\n"), _IZQUIERDA]
+
+    encabezado = []
+    if ticket.get("mesa") is not None:
+        encabezado.append(f"Mesa: {ticket['mesa']}")
+    if ticket.get("cliente"):
+        encabezado.append(f"Cliente: {ticket['cliente']}")
+    if ticket.get("telefono"):
+        encabezado.append(f"Tel: {ticket['telefono']}")
+    direccion = ticket.get("direccion") or {}
+    if direccion:
+        partes = [direccion.get("calle"), direccion.get("manzana") and f"Mz {direccion['manzana']}",
+                  direccion.get("lote") and f"Lt {direccion['lote']}", direccion.get("colonia")]
+        encabezado.append(", ".join(str(p) for p in partes if p))
+        if direccion.get("referencia"):
+            encabezado.append(f"Ref: {direccion['referencia']}")
+        if direccion.get("fecha_entrega"):
+            encabezado.append(f"Entrega: {_fecha(direccion['fecha_entrega'])}")
+    salida += [_parrafo(linea, ancho) for linea in encabezado]
+
+    salida.append(separador)
+    for producto in ticket.get("productos", []):
+        importe = (producto.get("precioUnitario") or 0) * (producto.get("cantidad") or 0)
+        salida.append(_renglon(f"{producto.get('cantidad')} {producto.get('nombre')}", _dinero(importe), ancho))
+        salida += [_parrafo(linea, ancho, sangria="   ") for linea in _subrenglones(producto)]
+    salida.append(separador)
+
+    salida += [_NEGRITA, _renglon("TOTAL", _dinero(ticket.get("total_venta")), ancho), _SIN_NEGRITA]
+    if ticket.get("comentarios"):
+        salida += [_texto("\n"), _parrafo(str(ticket["comentarios"]), ancho)]
+    salida += [_texto("\n\n\n"), _CORTE]
+    return b"".join(salida)
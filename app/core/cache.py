@@ -0,0 +1,250 @@
+"""
+Caché en memoria con TTL y tamaño máximo opcional (LRU), por número de entradas
+y por bytes aproximados, repartida en particiones con lock propio. Las cachés con
+nombre quedan registradas para que el barrendero de fondo quite las expiradas y
+/check/caches muestre sus métricas.
+Thread-safe para las rutas que FastAPI ejecuta en el threadpool.
+"""
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Importar Lock para thread safety
+from threading import Event, Lock, Thread
+
+logger = logging.getLogger(__name__)
+
+
+def estimar_bytes(valor: Any) -> int:
+    """
+    Tamaño aproximado de un valor con sys.getsizeof, recorriendo dicts, listas, tuplas,
+    sets y objetos con __slots__ o __dict__. Cada objeto se cuenta una sola vez.
+    """
+    vistos = set()
+    pendientes = [valor]
+    total = 0
+    while pendientes:
+        obj = pendientes.pop()
+        if id(obj) in vistos:
+            continue
+        vistos.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            pendientes.extend(obj.keys())
+            pendientes.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pendientes.extend(obj)
+        else:
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    pendientes.append(getattr(obj, slot))
+            if hasattr(obj, "__dict__"):
+                pendientes.append(obj.__dict__)
+    return total
+
+
+# nombre -> caché, para el barrendero y las métricas
+_registro: Dict[str, "TTLCache"] = {}
+_registro_lock = Lock()
+
+
+class _Particion:
+    """Una parte de la caché con su propio lock, orden LRU y parte de los límites."""
+    __slots__ = ("datos", "lock", "maxsize", "maxbytes", "bytes", "hits", "misses",
+                 "evictions", "expiradas", "rechazadas")
+
+    def __init__(self, maxsize: Optional[int], maxbytes: Optional[int]):
+        # llave -> (valor, expira (time.monotonic), bytes)
+        self.datos: "OrderedDict[Any, Tuple[Any, float, int]]" = OrderedDict()
+        self.lock = Lock()
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expiradas = 0
+        self.rechazadas = 0
+
+    def quitar(self, key: Any):
+        _, _, tamano = self.datos.pop(key)
+        self.bytes -= tamano
+
+
+def _repartir(total: Optional[int], partes: int) -> List[Optional[int]]:
+    """Dividir un límite entre las particiones sin que la suma pase del total."""
+    if total is None:
+        return [None] * partes
+    return [total // partes + (1 if i < total % partes else 0) for i in range(partes)]
+
+
+class TTLCache:
+    """
+    Las llaves se reparten por hash entre `particiones` partes independientes, así dos
+    hilos solo compiten por el lock si sus llaves caen en la misma. El LRU y los límites
+    (maxsize, maxbytes) se aplican por partición, con el total repartido entre ellas.
+    La expiración usa time.monotonic(), que no cambia con ajustes al reloj del sistema.
+    """
+
+    def __init__(self, ttl_days: int = 5, ttl_seconds: Optional[float] = None, maxsize: Optional[int] = None,
+                 maxbytes: Optional[int] = None, nombre: Optional[str] = None,
+                 medir: Callable[[Any], int] = estimar_bytes, particiones: int = 8):
+        self.ttl = float(ttl_seconds) if ttl_seconds is not None else ttl_days * 86400.0
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nombre = nombre
+        self._medir = medir
+        if maxsize is not None:
+            particiones = max(1, min(particiones, maxsize))
+        self._particiones = [_Particion(n, b) for n, b in zip(_repartir(maxsize, particiones),
+                                                               _repartir(maxbytes, particiones))]
+        if nombre is not None:
+            with _registro_lock:
+                _registro[nombre] = self
+
+    def _particion(self, key: Any) -> _Particion:
+        return self._particiones[hash(key) % len(self._particiones)]
+
+    def get(self, key: Any) -> Optional[Any]:
+        particion = self._particion(key)
+        with particion.lock:
+            entrada = particion.datos.get(key)
+            if entrada is not None:
+                if time.monotonic() < entrada[1]:
+                    particion.datos.move_to_end(key)
+                    particion.hits += 1
+                    return entrada[0]
+                # Eliminar entrada expirada
+                particion.quitar(key)
+                particion.expiradas += 1
+            particion.misses += 1
+            return None
+
+    def set(self, key: Any, value: Any):
+        # Medir fuera del lock; para valores grandes es lo más caro
+        tamano = self._medir(value)
+        particion = self._particion(key)
+        with particion.lock:
+            if key in particion.datos:
+                particion.quitar(key)
+            if particion.maxbytes is not None and tamano > particion.maxbytes:
+                # No cabe ni con la partición vacía
+                particion.rechazadas += 1
+                return
+            particion.datos[key] = (value, time.monotonic() + self.ttl, tamano)
+            particion.bytes += tamano
+            # Desalojar las entradas usadas hace más tiempo
+            while (particion.maxsize is not None and len(particion.datos) > particion.maxsize) or \
+                    (particion.maxbytes is not None and particion.bytes > particion.maxbytes):
+                _, (_, _, liberado) = particion.datos.popitem(last=False)
+                particion.bytes -= liberado
+                particion.evictions += 1
+
+    def delete(self, key: Any):
+        particion = self._particion(key)
+        with particion.lock:
+            if key in particion.datos:
+                particion.quitar(key)
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Eliminar las entradas cuya llave cumpla el predicado. Regresa cuántas se borraron."""
+        borradas = 0
+        for particion in self._particiones:
+            with particion.lock:
+                keys = [key for key in particion.datos if predicate(key)]
+                for key in keys:
+                    particion.quitar(key)
+                borradas += len(keys)
+        return borradas
+
+    def clear(self):
+        for particion in self._particiones:
+            with particion.lock:
+                particion.datos.clear()
+                particion.bytes = 0
+
+    def __len__(self) -> int:
+        return sum(len(particion.datos) for particion in self._particiones)
+
+    def stats(self) -> Dict[str, Any]:
+        totales = dict.fromkeys(("entradas", "bytes", "hits", "misses", "evictions", "expiradas", "rechazadas"), 0)
+        for particion in self._particiones:
+            with particion.lock:
+                totales["entradas"] += len(particion.datos)
+                for campo in ("bytes", "hits", "misses", "evictions", "expiradas", "rechazadas"):
+                    totales[campo] += getattr(particion, campo)
+        return {
+            "entradas": totales["entradas"],
+            "maxsize": self.maxsize,
+            "bytes": totales["bytes"],
+            "maxbytes": self.maxbytes,
+            "ttl_segundos": self.ttl,
+            "particiones": len(self._particiones),
+            "hits": totales["hits"],
+            "misses": totales["misses"],
+            "evictions": totales["evictions"],
+            "expiradas": totales["expiradas"],
+            "rechazadas": totales["rechazadas"],
+        }
+
+    def cleanup_expired(self) -> int:
+        """Eliminar entradas expiradas. Regresa cuántas se quitaron."""
+        quitadas = 0
+        for particion in self._particiones:
+            with particion.lock:
+                now = time.monotonic()
+                # En orden LRU las más viejas por escritura no siempre van primero, se revisan todas
+                expired_keys = [key for key, (_, expira, _) in particion.datos.items() if now >= expira]
+                for key in expired_keys:
+                    particion.quitar(key)
+                particion.expiradas += len(expired_keys)
+                quitadas += len(expired_keys)
+        return quitadas
+
+
+def estadisticas_caches() -> Dict[str, Dict[str, Any]]:
+    """Métricas de todas las cachés con nombre."""
+    with _registro_lock:
+        caches = dict(_registro)
+    return {nombre: cache.stats() for nombre, cache in sorted(caches.items())}
+
+
+def limpiar_expiradas() -> int:
+    with _registro_lock:
+        caches = list(_registro.values())
+    return sum(cache.cleanup_expired() for cache in caches)
+
+
+class BarrenderoCaches:
+    """Hilo de fondo que cada `intervalo` segundos quita las entradas expiradas de las cachés registradas."""
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._detener = Event()
+        self._hilo: Optional[Thread] = None
+
+    def iniciar(self):
+        if self.intervalo <= 0 or (self._hilo is not None and self._hilo.is_alive()):
+            return
+        self._detener.clear()
+        self._hilo = Thread(target=self._correr, name="barrendero-caches", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: Optional[float] = 5):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    def _correr(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                quitadas = limpiar_expiradas()
+                if quitadas:
+                    logger.debug("Barrendero de cachés: %s entradas expiradas", quitadas)
+            except Exception:
+                logger.exception("Error al limpiar las cachés")
@@ -3,7 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 import jwt
 from jwt import InvalidTokenError
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict
 
 from dotenv import load_dotenv
 import os
@@ -19,6 +19,7 @@ class TokenData(BaseModel):
     username: Optional[str] = None
     id_emp: Optional[int] = None  # ← Agregar esto
     id_cargo: Optional[int] = None  # ← Opcional, pero útil
+    permisos: Optional[Dict[str, bool]] = None  # Permisos embebidos por login
 
 def verify_token(token: str = Depends(oauth2_scheme)) -> TokenData:
     credentials_exception = HTTPException(
@@ -36,7 +37,9 @@ def verify_token(token: str = Depends(oauth2_scheme)) -> TokenData:
             
         return TokenData(
             username=username,
-            id_emp=id_emp  # ← Agregar esto
+            id_emp=id_emp,  # ← Agregar esto
+            id_cargo=payload.get("id_cargo"),
+            permisos=payload.get("permisos")
         )
     except InvalidTokenError:
         raise credentials_exception
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+Invalidación de cachés entre workers de uvicorn.
+Cada worker conserva sus cachés en memoria (los hits no cambian); lo que se comparte
+es el aviso de que un tema ("catalogo", "permisos", "cocina") cambió. Quien escribe llama a
+publicar(tema) y los demás workers, al empezar su siguiente petición (ver el middleware
+en app/main.py), ejecutan las funciones registradas con suscribir(tema, funcion).
+
+Backends (CACHE_INVALIDACION):
+- local: un solo worker, no comparte nada (por omisión).
+- mmap: un contador por tema en un archivo mapeado en memoria que comparten los
+  workers de la misma máquina; revisar es leer unos enteros, sin llamadas al sistema.
+- redis: pub/sub en CACHE_INVALIDACION_REDIS_URL, para workers en varias máquinas.
+
+Si el backend configurado no arranca (archivo o Redis inaccesible) la app no arranca:
+un worker que no se entera de las invalidaciones serviría datos viejos sin avisar.
+"""
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from abc import ABC, abstractmethod
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CACHE_INVALIDACION = os.getenv("CACHE_INVALIDACION", "local").strip().lower()
+CACHE_INVALIDACION_ARCHIVO = os.getenv(
+    "CACHE_INVALIDACION_ARCHIVO", os.path.join(tempfile.gettempdir(), "pizzetos-invalidacion.bin")
+)
+CACHE_INVALIDACION_REDIS_URL = os.getenv("CACHE_INVALIDACION_REDIS_URL", "redis://localhost:6379/0")
+# Pausa entre intentos de reconectar la suscripción de Redis
+CACHE_INVALIDACION_REINTENTO = int(os.getenv("CACHE_INVALIDACION_REINTENTO", "2"))
+
+TEMA_CATALOGO = "catalogo"
+TEMA_PERMISOS = "permisos"
+TEMA_DIMENSIONES = "dimensiones"
+TEMA_COCINA = "cocina"
+
+
+class BackendInvalidacion(ABC):
+    """Interfaz: publicar un tema y consultar qué temas cambiaron en otros procesos."""
+
+    @abstractmethod
+    def publicar(self, tema: str):
+        ...
+
+    @abstractmethod
+    def cambios(self) -> Set[str]:
+        """Temas publicados por otros procesos desde la última llamada."""
+
+    def registrar(self, tema: str):
+        """Se llama una vez por tema suscrito, antes de consultar cambios()."""
+        pass
+
+
+class InvalidacionLocal(BackendInvalidacion):
+    def publicar(self, tema: str):
+        pass
+
+    def cambios(self) -> Set[str]:
+        return set()
+
+
+class InvalidacionMmap(BackendInvalidacion):
+    """
+    Archivo de RANURAS contadores de 64 bits; cada tema usa la ranura crc32(tema) % RANURAS
+    (dos temas en la misma ranura solo provocan una invalidación de más). Incrementar se
+    serializa con flock; leer no toma lock.
+    """
+    RANURAS = 64
+    _FORMATO = f"<{RANURAS}Q"
+
+    def __init__(self, ruta: str):
+        import fcntl
+
+        self._fcntl = fcntl
+        self._fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o600)
+        tamano = struct.calcsize(self._FORMATO)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < tamano:
+                os.ftruncate(self._fd, tamano)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mapa = mmap.mmap(self._fd, tamano)
+        self._lock = Lock()
+        self._temas: Dict[int, Set[str]] = {}
+        self._vistos = list(struct.unpack_from(self._FORMATO, self._mapa))
+
+    def _ranura(self, tema: str) -> int:
+        ranura = zlib.crc32(tema.encode()) % self.RANURAS
+        self._temas.setdefault(ranura, set()).add(tema)
+        return ranura
+
+    def publicar(self, tema: str):
+        with self._lock:
+            ranura = self._ranura(tema)
+            offset = ranura * 8
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            try:
+                valor = struct.unpack_from("<Q", self._mapa, offset)[0] + 1
+                struct.pack_into("<Q", self._mapa, offset, valor)
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+            # Este proceso ya se invalidó al publicar; si otro publicó en medio también
+            # cambió el contador antes y se detecta en la siguiente revisión
+            if valor == self._vistos[ranura] + 1:
+                self._vistos[ranura] = valor
+
+    def cambios(self) -> Set[str]:
+        actuales = struct.unpack_from(self._FORMATO, self._mapa)
+        if list(actuales) == self._vistos:
+            return set()
+        with self._lock:
+            temas = set()
+            for ranura, valor in enumerate(actuales):
+                if valor != self._vistos[ranura]:
+                    self._vistos[ranura] = valor
+                    temas |= self._temas.get(ranura, set())
+            return temas
+
+    def registrar(self, tema: str):
+        # Asociar el tema a su ranura para reconocerlo en cambios()
+        with self._lock:
+            self._ranura(tema)
+
+
+class InvalidacionRedis(BackendInvalidacion):
+    """
+    Pub/sub de Redis; un hilo escucha el canal y acumula los temas recibidos. Si se cae
+    la conexión el hilo vuelve a suscribirse cada CACHE_INVALIDACION_REINTENTO segundos;
+    lo publicado mientras tanto se perdió, así que al reconectar se invalidan todos los
+    temas suscritos.
+    """
+    CANAL = "pizzetos:invalidacion"
+
+    def __init__(self, url: str):
+        import redis
+
+        self._id = f"{os.getpid()}-{id(self)}"
+        self._cliente = redis.Redis.from_url(url)
+        self._pendientes: Set[str] = set()
+        self._temas: Set[str] = set()
+        self._lock = Lock()
+        # La primera suscripción no se reintenta: si Redis no responde la app no arranca
+        pubsub = self._suscribir()
+        Thread(target=self._escuchar, args=(pubsub,), name="invalidacion-redis", daemon=True).start()
+
+    def _suscribir(self):
+        pubsub = self._cliente.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.CANAL)
+        return pubsub
+
+    def _escuchar(self, pubsub):
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = self._suscribir()
+                    with self._lock:
+                        self._pendientes |= self._temas
+                    logger.warning("Suscripción de invalidación a Redis restablecida")
+                for mensaje in pubsub.listen():
+                    self._recibir(mensaje)
+            except Exception as e:
+                logger.warning("Se perdió la suscripción de invalidación a Redis (%s); reintentando", e)
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+                pubsub = None
+            time.sleep(CACHE_INVALIDACION_REINTENTO)
+
+    def _recibir(self, mensaje):
+        try:
+            origen, _, tema = mensaje["data"].decode().partition("|")
+        except Exception:
+            return
+        if origen != self._id:
+            with self._lock:
+                self._pendientes.add(tema)
+
+    def publicar(self, tema: str):
+        try:
+            self._cliente.publish(self.CANAL, f"{self._id}|{tema}")
+        except Exception:
+            # Los demás workers se enteran por el TTL de sus cachés
+            logger.exception("No se pudo publicar la invalidación de %s", tema)
+
+    def cambios(self) -> Set[str]:
+        if not self._pendientes:
+            return set()
+        with self._lock:
+            temas, self._pendientes = self._pendientes, set()
+            return temas
+
+    def registrar(self, tema: str):
+        with self._lock:
+            self._temas.add(tema)
+
+
+def _crear_backend() -> BackendInvalidacion:
+    if CACHE_INVALIDACION == "local":
+        return InvalidacionLocal()
+    if CACHE_INVALIDACION == "mmap":
+        return InvalidacionMmap(CACHE_INVALIDACION_ARCHIVO)
+    if CACHE_INVALIDACION == "redis":
+        return InvalidacionRedis(CACHE_INVALIDACION_REDIS_URL)
+    raise ValueError(f"CACHE_INVALIDACION desconocido: {CACHE_INVALIDACION!r} (local, mmap o redis)")
+
+
+backend_invalidacion = _crear_backend()
+
+# tema -> funciones que descartan la copia local (no deben volver a publicar)
+_suscriptores: Dict[str, List[Callable[[], None]]] = {}
+
+
+def suscribir(tema: str, funcion: Callable[[], None]):
+    _suscriptores.setdefault(tema, []).append(funcion)
+    backend_invalidacion.registrar(tema)
+
+
+def publicar(tema: str):
+    """Avisar a los demás workers; la copia local ya la descartó quien llama."""
+    backend_invalidacion.publicar(tema)
+
+
+def aplicar_invalidaciones() -> Set[str]:
+    """Descartar lo que otros workers invalidaron. Se llama al inicio de cada petición."""
+    temas = backend_invalidacion.cambios()
+    for tema in temas:
+        for funcion in _suscriptores.get(tema, ()):
+            try:
+                funcion()
+            except Exception:
+                logger.exception("Error al invalidar %s", tema)
+    return temas
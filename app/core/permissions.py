@@ -5,22 +5,83 @@ from app.db.session import get_session
 from app.models.empleadoModel import Empleados
 from app.models.permisosModel import permisos as Permisos  
 from app.core.dependency import verify_token, TokenData
+from app.core.cache import TTLCache
+from app.core.invalidacion import TEMA_PERMISOS, publicar, suscribir
 
+from dotenv import load_dotenv
+import os
 
-def get_user_permissions(id_emp: int, session: Session) -> dict:
+load_dotenv()
 
+# Caché de permisos: id_emp -> id_cargo y id_cargo -> permisos
+PERMISOS_CACHE_TTL = int(os.getenv("PERMISOS_CACHE_TTL", "300"))
+PERMISOS_CACHE_MAX = int(os.getenv("PERMISOS_CACHE_MAX", "512"))
+# Confiar en el claim "permisos" que login embebe en el JWT (sin consultar la base)
+PERMISOS_DESDE_TOKEN = os.getenv("PERMISOS_DESDE_TOKEN", "false").strip().lower() in ("1", "true", "yes", "si", "sí", "on")
 
-    empleado = session.get(Empleados, id_emp)
-    if not empleado:
-        return {}
+_cache_cargo_empleado = TTLCache(ttl_seconds=PERMISOS_CACHE_TTL, maxsize=PERMISOS_CACHE_MAX, nombre="cargo_empleado")
+_cache_permisos_cargo = TTLCache(ttl_seconds=PERMISOS_CACHE_TTL, maxsize=PERMISOS_CACHE_MAX, nombre="permisos_cargo")
+
+
+def invalidar_permisos_cargo(id_cargo: int):
+    """Llamar cuando cambian o se eliminan los permisos de un cargo."""
+    _cache_permisos_cargo.delete(id_cargo)
+    publicar(TEMA_PERMISOS)
+
+
+def invalidar_permisos_empleado(id_emp: int):
+    """Llamar cuando cambia el cargo o el estado de un empleado."""
+    _cache_cargo_empleado.delete(id_emp)
+    publicar(TEMA_PERMISOS)
+
+
+def _descartar_permisos():
+    _cache_cargo_empleado.clear()
+    _cache_permisos_cargo.clear()
+
+
+# Otro worker cambió permisos o empleados
+suscribir(TEMA_PERMISOS, _descartar_permisos)
+
+
+def limpiar_cache_permisos():
+    _descartar_permisos()
+    publicar(TEMA_PERMISOS)
+
+
+def get_user_permissions(id_emp: int, session: Session) -> dict:
+
+    id_cargo = _cache_cargo_empleado.get(id_emp)
+    if id_cargo is None:
+        empleado = session.get(Empleados, id_emp)
+        if not empleado:
+            return {}
+        id_cargo = empleado.id_ca
+        _cache_cargo_empleado.set(id_emp, id_cargo)
+    
+    cached_permisos = _cache_permisos_cargo.get(id_cargo)
+    if cached_permisos is not None:
+        return cached_permisos
     
     # Buscar permisos por id_cargo
-    statement = select(Permisos).where(Permisos.id_cargo == empleado.id_ca)
+    statement = select(Permisos).where(Permisos.id_cargo == id_cargo)
     permisos = session.exec(statement).first()
     
     if not permisos:
         return {}
     
+    resultado = _serializar_permisos(permisos)
+    _cache_permisos_cargo.set(id_cargo, resultado)
+    return resultado
+
+
+def _resolver_permisos(token_data: TokenData, session: Session) -> dict:
+    if PERMISOS_DESDE_TOKEN and token_data.permisos is not None:
+        return token_data.permisos
+    return get_user_permissions(token_data.id_emp, session)
+
+
+def _serializar_permisos(permisos) -> dict:
     # Retornar diccionario con todos los permisos
     return {
         "crear_producto": permisos.crear_producto,
@@ -51,7 +112,7 @@ def require_permission(permission_name: str):
         session: Session = Depends(get_session)
     ):
         # Obtener permisos del usuario
-        permisos = get_user_permissions(token_data.id_emp, session)
+        permisos = _resolver_permisos(token_data, session)
         
         # Verificar si tiene el permiso
         if not permisos.get(permission_name, False):
@@ -72,7 +133,7 @@ def require_any_permission(*permission_names: str):
         token_data: TokenData = Depends(verify_token),
         session: Session = Depends(get_session)
     ):
-        permisos = get_user_permissions(token_data.id_emp, session)
+        permisos = _resolver_permisos(token_data, session)
         
         has_permission = any(
             permisos.get(perm, False) for perm in permission_names
@@ -95,7 +156,7 @@ def require_all_permissions(*permission_names: str):
         token_data: TokenData = Depends(verify_token),
         session: Session = Depends(get_session)
     ):
-        permisos = get_user_permissions(token_data.id_emp, session)
+        permisos = _resolver_permisos(token_data, session)
         
         missing_perms = [
             perm for perm in permission_names 
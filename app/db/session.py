@@ -1,9 +1,18 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import Column, Index, Table, event, inspect
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
+from threading import Lock
+from typing import List, Tuple
+import logging
+import time
 import os
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 from app.models import (empleadoModel, 
                         clienteModel, 
                         magnoModel, 
@@ -31,7 +40,8 @@ from app.models import (empleadoModel,
                         DireccionesModel,
                         pDireccionModel,
                         cajaModel,
-                        pEspecialModel)
+                        pEspecialModel,
+                        resumenVentaModel)
 
 
 DB_USER = os.getenv("DB_USER")
@@ -43,11 +53,181 @@ DB_NAME = os.getenv("DB_NAME")
 DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 
-engine = create_engine(DATABASE_URL, echo=True)
+def _env_bool(nombre: str, default: bool) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None or valor.strip() == "":
+        return default
+    return valor.strip().lower() in ("1", "true", "yes", "si", "sí", "on")
+
+
+# Configuración del pool (por worker de uvicorn)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Reciclar antes del wait_timeout de MySQL evita "MySQL server has gone away" tras la noche
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# Límite por sentencia SELECT en milisegundos (max_execution_time de MySQL); 0 = sin límite
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_ECHO = _env_bool("DB_ECHO", False)
+
+
+class PoolMetrics:
+    """Contadores del pool de conexiones para dimensionarlo por worker."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.invalidaciones = 0
+            self.timeouts = 0
+            self.esperas = 0
+            self.espera_total = 0.0
+            self.espera_max = 0.0
+
+    def registrar_espera(self, segundos: float, timeout: bool = False):
+        with self._lock:
+            self.esperas += 1
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+            if timeout:
+                self.timeouts += 1
+
+    def incrementar(self, contador: str):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidaciones": self.invalidaciones,
+                "timeouts": self.timeouts,
+                "esperas": self.esperas,
+                "espera_promedio_ms": round(self.espera_total / self.esperas * 1000, 3) if self.esperas else 0.0,
+                "espera_max_ms": round(self.espera_max * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada petición para obtener una conexión."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.registrar_espera(time.perf_counter() - inicio, timeout=True)
+            raise
+        pool_metrics.registrar_espera(time.perf_counter() - inicio)
+        return conexion
+
+
+connect_args = {}
+if DB_STATEMENT_TIMEOUT_MS > 0:
+    connect_args["init_command"] = f"SET SESSION max_execution_time={DB_STATEMENT_TIMEOUT_MS}"
+
+
+engine = create_engine(
+    DATABASE_URL,
+    echo=DB_ECHO,
+    poolclass=MeteredQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=connect_args,
+)
+
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_metrics.incrementar("connects")
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.incrementar("checkouts")
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_metrics.incrementar("checkins")
+
+
+@event.listens_for(engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    pool_metrics.incrementar("invalidaciones")
+
+
+def get_pool_stats() -> dict:
+    """Estado actual del pool más los contadores acumulados."""
+    pool = engine.pool
+    estado = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pre_ping": DB_POOL_PRE_PING,
+    }
+    if isinstance(pool, QueuePool):
+        estado.update({
+            "en_uso": pool.checkedout(),
+            "disponibles": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+    estado.update(pool_metrics.snapshot())
+    return estado
 
 
 def init_db():
     SQLModel.metadata.create_all(engine)
+    verificar_esquema()
+
+
+def esquema_pendiente() -> Tuple[List[Tuple[Table, Column]], List[Index]]:
+    """
+    Columnas e índices de los modelos que faltan en tablas que ya existían (create_all
+    solo crea tablas nuevas). Solo lee el catálogo de la base.
+    """
+    inspector = inspect(engine)
+    columnas, indices = [], []
+    for tabla in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(tabla.name):
+            continue
+        existentes = {columna["name"] for columna in inspector.get_columns(tabla.name)}
+        columnas += [(tabla, columna) for columna in tabla.columns if columna.name not in existentes]
+        nombres = {indice["name"] for indice in inspector.get_indexes(tabla.name)}
+        indices += [indice for indice in tabla.indexes if indice.name not in nombres]
+    return columnas, indices
+
+
+def verificar_esquema():
+    """
+    Al arrancar no se hace DDL: con varios workers los ALTER/CREATE INDEX compiten entre
+    sí y en tablas grandes bloquean mientras la app arranca. Se aplican a mano con
+    scripts/migrar_esquema.py; aquí solo se avisa lo que falta.
+    """
+    columnas, indices = esquema_pendiente()
+    if columnas:
+        faltantes = ", ".join(f"{tabla.name}.{columna.name}" for tabla, columna in columnas)
+        raise RuntimeError(f"Faltan columnas en la base ({faltantes}); correr scripts/migrar_esquema.py")
+    # Los upserts dependen de los índices únicos; sin ellos duplicarían filas
+    unicos = [indice.name for indice in indices if indice.unique]
+    if unicos:
+        raise RuntimeError(f"Faltan índices únicos en la base ({', '.join(unicos)}); correr scripts/migrar_esquema.py")
+    if indices:
+        logger.warning("Faltan índices (%s); correr scripts/migrar_esquema.py", ", ".join(i.name for i in indices))
 
 
 def get_session():
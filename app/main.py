@@ -1,7 +1,32 @@
 from fastapi import FastAPI, Depends
-from app.db.session import init_db
+from anyio import to_thread
+from sqlmodel import Session
+from app.db.session import init_db, get_pool_stats, engine, DB_POOL_SIZE, DB_MAX_OVERFLOW
+from app.api.refactors.cachedDef import precargar_catalogo
+from app.api.refactors.menuSnapshot import construir_menu
+from app.api.refactors.dimensionesCache import cargar_dimensiones
+from app.api.refactors.resumenRefactor import resumen_pendiente
+from app.core.cache import BarrenderoCaches, estadisticas_caches
+from app.core.invalidacion import aplicar_invalidaciones
+from app.api.refactors.cocinaRefactor import vigia_cocina
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.dependency import verify_token
+from dotenv import load_dotenv
+import logging
+import os
+
+load_dotenv()
+
+# Las rutas usan Session síncrona; FastAPI las ejecuta en un threadpool acotado
+# para no bloquear el event loop. Por omisión, una conexión del pool por hilo: más
+# hilos solo esperan conexión hasta DB_POOL_TIMEOUT (ver scripts/bench_carga_pos.py).
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+# Cada cuántos segundos se quitan las entradas expiradas de las cachés; 0 = nunca
+CACHE_BARRIDO_SEGUNDOS = float(os.getenv("CACHE_BARRIDO_SEGUNDOS", "60"))
+
+logger = logging.getLogger(__name__)
+
+barrendero_caches = BarrenderoCaches(CACHE_BARRIDO_SEGUNDOS)
 
 from app.api import (login, 
                     empleados,
@@ -27,12 +52,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Venta-Version", "X-Siguiente-Cursor"],
 )
 
 
+@app.middleware("http")
+async def sincronizar_caches(request, call_next):
+    # Descartar lo que otros workers invalidaron antes de atender la petición
+    aplicar_invalidaciones()
+    return await call_next(request)
+
+
 @app.on_event("startup")
 def on_startup():
+    if THREADPOOL_SIZE > DB_POOL_SIZE + DB_MAX_OVERFLOW:
+        logger.warning("THREADPOOL_SIZE=%s excede el pool de conexiones (%s + %s); los hilos de sobra "
+                       "esperarán conexión", THREADPOOL_SIZE, DB_POOL_SIZE, DB_MAX_OVERFLOW)
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
     init_db()
+    # Precargar el catálogo de productos, el menú, sucursales y métodos de pago;
+    # si falla se llenan bajo demanda
+    try:
+        with Session(engine) as session:
+            precargar_catalogo(session)
+            construir_menu(session)
+            cargar_dimensiones(session)
+    except Exception:
+        logger.exception("No se pudo precargar el catálogo de productos")
+    # El acumulado de ventas se llena al desplegar, no aquí
+    try:
+        with Session(engine) as session:
+            if resumen_pendiente(session):
+                logger.warning("El acumulado diario de ventas está vacío; correr scripts/reconstruir_resumen_ventas.py")
+    except Exception:
+        logger.exception("No se pudo revisar el acumulado diario de ventas")
+    barrendero_caches.iniciar()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    barrendero_caches.detener()
+    vigia_cocina.detener()
 
 
 @app.post("/check", tags=["Check"])
@@ -40,6 +100,16 @@ def check_token(username: str = Depends(verify_token)):
     return {"valid": True, "username": username.username}
 
 
+@app.get("/check/db-pool", tags=["Check"])
+def check_db_pool(username: str = Depends(verify_token)):
+    return get_pool_stats()
+
+
+@app.get("/check/caches", tags=["Check"])
+def check_caches(username: str = Depends(verify_token)):
+    return estadisticas_caches()
+
+
 
 app.include_router(login.router, prefix="/login", tags=["login"])
 app.include_router(empleados.router, prefix="/empleados", tags=["personal"])
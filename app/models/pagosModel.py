@@ -5,7 +5,7 @@ from decimal import Decimal
 class Pago(SQLModel, table=True):
     __tablename__="Pago"
     id_pago: Optional[int] = Field(default=None, primary_key=True)
-    id_venta:int
+    id_venta: int = Field(index=True)
     id_metpago: int
     monto: Decimal
     referencia: Optional[str] = None
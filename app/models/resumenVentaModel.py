@@ -0,0 +1,19 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Numeric
+from datetime import date
+from decimal import Decimal
+
+
+class ResumenVentaDia(SQLModel, table=True):
+    """
+    Acumulado por día x sucursal x caja x método de pago, mantenido al escribir pagos.
+    Las filas con id_metpago = 0 llevan el conteo (num) y total (monto) de las ventas.
+    """
+    __tablename__ = "ResumenVentaDia"
+
+    fecha: date = Field(primary_key=True)
+    id_suc: int = Field(primary_key=True)
+    id_caja: int = Field(primary_key=True)
+    id_metpago: int = Field(primary_key=True)
+    num: int = Field(default=0)
+    monto: Decimal = Field(default=Decimal("0"), sa_column=Column(Numeric(14, 2), nullable=False))
@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, Numeric
+from sqlalchemy import Column, Numeric, Index
 from typing import Optional
 from datetime import datetime
 from decimal import Decimal
@@ -7,6 +7,11 @@ from decimal import Decimal
 
 class Venta(SQLModel, table=True):
     __tablename__ = "Venta"
+    __table_args__ = (
+        # Reportes por rango de fechas, con y sin sucursal
+        Index("ix_Venta_id_suc_fecha_hora", "id_suc", "fecha_hora"),
+        Index("ix_Venta_fecha_hora", "fecha_hora"),
+    )
     
     id_venta: Optional[int] = Field(default=None, primary_key=True)
     id_suc: int = Field(foreign_key="Sucursal.id_suc")
@@ -19,6 +24,8 @@ class Venta(SQLModel, table=True):
     nombreClie: Optional[str] = Field(default=None)
     id_caja: int = Field(default=None, foreign_key="Caja.id_caja")
     detalles: Optional[str] = Field(default=None)
+    # Se incrementa en cada escritura del POS sobre la venta (ver cocinaRefactor)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
 
 
 class Ingredientes(SQLModel, table=True):
@@ -30,6 +37,26 @@ class Ingredientes(SQLModel, table=True):
 
 class PVersion(SQLModel, table=True):
     __tablename__ = "PVersion"
+    __table_args__ = (
+        # Una fila por sucursal; el upsert de incrementar_version_sucursal depende de él
+        Index("ix_PVersion_id_suc", "id_suc", unique=True),
+    )
+
     id_pversion: Optional[int] = Field(default=None, primary_key=True)
     id_suc: int = Field(foreign_key="Sucursal.id_suc")
-    version: int
\ No newline at end of file
+    version: int
+
+
+class CambioCocina(SQLModel, table=True):
+    """Bitácora de cambios para cocina: una fila por cada versión de PVersion de la sucursal."""
+    __tablename__ = "CambiosCocina"
+    __table_args__ = (
+        Index("ix_CambiosCocina_id_suc_version", "id_suc", "version"),
+    )
+
+    id_cambio: Optional[int] = Field(default=None, primary_key=True)
+    id_suc: int = Field(foreign_key="Sucursal.id_suc")
+    version: int
+    # Sin llave foránea: el cambio de una venta eliminada se conserva
+    id_venta: int
+    evento: str = Field(max_length=20)
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from decimal import Decimal
+from typing import List
 
 class priceHamburguesa(BaseModel):
     id_hamb: int
@@ -62,4 +63,23 @@ class PricePizza(BaseModel):
     id_pizza: int
     nombre: str
     precio: Decimal
-    tamano: str
\ No newline at end of file
+    tamano: str
+
+class MenuCompleto(BaseModel):
+    version: str
+    hamburguesas: List[priceHamburguesa]
+    alitas: List[PriceAlita]
+    costillas: List[PriceCostilla]
+    spaguetty: List[PriceSpaghetti]
+    papas: List[PricePapas]
+    rectangular: List[PriceRectangular]
+    barra: List[PriceBarra]
+    mariscos: List[PriceMarisco]
+    refrescos: List[PriceRefresco]
+    paquetes: List[PricePaquete]
+    magno: List[PriceMagno]
+    pizzas: List[PricePizza]
+    descripciones: List[dict]
+    ingredientes: List[dict]
+    tamanosPizzas: List[dict]
+    especialidades: List[dict]
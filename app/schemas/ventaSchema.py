@@ -70,7 +70,8 @@ class ContenidoPaquete(BaseModel):
 
 class ItemVentaRequest(BaseModel):
     cantidad: int
-    precio_unitario: Decimal
+    # Si no se manda, lo calcula el servidor (ver cotizador)
+    precio_unitario: Optional[Decimal] = None
     
     id_hamb: Optional[int] = None
     id_cos: Optional[int] = None
@@ -136,12 +137,47 @@ class PagoVentaRequest(BaseModel):
         return self
     
     
+def _contar_producto(p):
+    if p is None:
+        return 0
+    if isinstance(p, list):
+        return 1 if len(p) > 0 else 0
+    return 1
+
+
+def validar_productos_items(items: List[ItemVentaRequest], etiqueta: str = 'Item'):
+    """Cada item debe tener un producto O ingredientes personalizados (los paquetes llevan su contenido)."""
+    for idx, item in enumerate(items):
+        productos = [
+            item.id_hamb, item.id_cos, item.id_alis, item.id_spag,
+            item.id_papa, item.id_rec, item.id_barr, item.id_maris,
+            item.id_refresco, item.id_paquete, item.id_magno, item.id_pizza,
+            item.pizza_mitad
+        ]
+        productos_definidos = sum(_contar_producto(p) for p in productos)
+        if item.ingredientes is not None:
+            if productos_definidos > 0:
+                raise ValueError(f'{etiqueta} {idx + 1}: No puede especificar un producto e ingredientes...')
+        else:
+            # Si es un paquete, permitimos más de un ID (el del paquete + sus contenidos)
+            if item.id_paquete is not None:
+                # Validar que al menos haya 1 producto (el paquete en sí ya cuenta)
+                if productos_definidos < 1:
+                    raise ValueError(f'{etiqueta} {idx + 1}: Paquete inválido')
+            else:
+                # Si NO es paquete, mantenemos la regla estricta de SOLO UNO
+                if productos_definidos != 1:
+                    raise ValueError(
+                        f'{etiqueta} {idx + 1}: Debe especificar exactamente un producto o ingredientes personalizados'
+                    )
+
+
 class VentaRequest(BaseModel):
     id_suc: int
     id_cliente: Optional[int] = None
     id_direccion: Optional[int] = None  # Para tipo_servicio = 2 y 3
     mesa: Optional[int] = None  # Para tipo_servicio = 0
-    total: Decimal
+    total: Optional[Decimal] = None  # Si no se manda, se calcula con los precios de los items
     comentarios: str = None
     status: int = 0
     tipo_servicio: int = 0
@@ -170,7 +206,8 @@ class VentaRequest(BaseModel):
                 raise ValueError(f'Debe especificar al menos un método de pago cuando tipo_servicio es {self.tipo_servicio}')
 
             # Solo para 'para llevar', validar que la suma de los pagos coincida con el total
-            if self.tipo_servicio == 1:
+            # (sin total se valida al calcularlo, en validar_pagos_tipo_servicio)
+            if self.tipo_servicio == 1 and self.total is not None:
                 suma_pagos = sum(pago.monto for pago in self.pagos)
                 if abs(suma_pagos - self.total) > Decimal('0.01'):
                     raise ValueError(
@@ -183,46 +220,17 @@ class VentaRequest(BaseModel):
                     raise ValueError('Los montos de pago deben ser mayores a 0')
         
         # Validar items: cada item debe tener un producto O ingredientes personalizados
-        for idx, item in enumerate(self.items):
-            productos = [
-                item.id_hamb, item.id_cos, item.id_alis, item.id_spag,
-                item.id_papa, item.id_rec, item.id_barr, item.id_maris,
-                item.id_refresco, item.id_paquete, item.id_magno, item.id_pizza,
-                item.pizza_mitad
-            ]
-            def contar_producto(p):
-                if p is None:
-                    return 0
-                if isinstance(p, list):
-                    return 1 if len(p) > 0 else 0
-                return 1
-            
-            productos_definidos = sum(contar_producto(p) for p in productos)
-            # Si hay ingredientes personalizados... (sin cambios)
-            if item.ingredientes is not None:
-                if productos_definidos > 0:
-                    raise ValueError(f'Item {idx + 1}: No puede especificar un producto e ingredientes...')
-            else:
-                # AQUÍ ESTÁ EL CAMBIO:
-                # Si es un paquete, permitimos más de un ID (el del paquete + sus contenidos)
-                if item.id_paquete is not None:
-                    # Validar que al menos haya 1 producto (el paquete en sí ya cuenta)
-                    if productos_definidos < 1:
-                         raise ValueError(f'Item {idx + 1}: Paquete inválido')
-                else:
-                    # Si NO es paquete, mantenemos la regla estricta de SOLO UNO
-                    if productos_definidos != 1:
-                        raise ValueError(
-                            f'Item {idx + 1}: Debe especificar exactamente un producto o ingredientes personalizados'
-                        )
+        validar_productos_items(self.items)
         return self
 
     
 
 class VentaEditRequest(BaseModel):
-    total: Decimal
+    total: Optional[Decimal] = None
     comentarios: Optional[str] = None
     items: List[ItemVentaRequest]
+    # Venta.version con la que se armó la edición; si ya cambió se responde 409
+    version: Optional[int] = None
     
     @field_validator('items')
     @classmethod
@@ -232,6 +240,47 @@ class VentaEditRequest(BaseModel):
         return v
 
 
+class ItemDetalleCambio(ItemVentaRequest):
+    id_detalle: int
+
+
+class VentaCambiosRequest(BaseModel):
+    """
+    Edición por renglones (id_detalle de /pos/edit/{id_venta}/detalle): solo se insertan,
+    modifican o eliminan los DetalleVenta indicados. Sin total se calcula con los renglones
+    finales; sin comentarios se conservan los actuales.
+    """
+    version: int
+    total: Optional[Decimal] = None
+    comentarios: Optional[str] = None
+    agregar: List[ItemVentaRequest] = []
+    modificar: List[ItemDetalleCambio] = []
+    eliminar: List[int] = []
+
+    @model_validator(mode='after')
+    def validar_cambios(self):
+        ids = [item.id_detalle for item in self.modificar] + self.eliminar
+        if len(ids) != len(set(ids)):
+            raise ValueError('Cada id_detalle solo puede aparecer una vez entre modificar y eliminar')
+        if not (self.agregar or self.modificar or self.eliminar):
+            raise ValueError('Debe especificar al menos un cambio')
+        # Los renglones nuevos o modificados siguen las mismas reglas que al crear la venta
+        validar_productos_items(self.agregar, 'Agregar')
+        validar_productos_items(self.modificar, 'Modificar')
+        return self
+
+
+class CotizacionRequest(BaseModel):
+    items: List[ItemVentaRequest]
+
+    @field_validator('items')
+    @classmethod
+    def validar_items_no_vacios(cls, v):
+        if not v or len(v) == 0:
+            raise ValueError('Debe especificar al menos un item')
+        return v
+
+
 class VentaResponse(BaseModel):
     id_venta: int
     id_suc: int
@@ -245,6 +294,7 @@ class VentaResponse(BaseModel):
 class RegistrarPagoRequest(BaseModel):
     id_venta: int
     pagos: List[PagoVentaRequest]
+    version: Optional[int] = None
     
     @model_validator(mode='after')
     def validar_pagos(self):
@@ -0,0 +1,119 @@
+"""
+Benchmark de contención de TTLCache (app/core/cache.py) con 1, 8 y 32 hilos.
+
+Cada hilo hace lecturas de llaves del catálogo (todas hits, como la cocina en caliente)
+durante un tiempo fijo. Se compara:
+- anterior: un solo Lock para toda la caché y datetime.now() en cada lectura.
+- TTLCache con 1 partición y con las 8 de omisión (time.monotonic()).
+- lista plana sin lock, como CatalogoPlano en cachedDef.
+
+Uso:
+    python scripts/bench_cache.py [--segundos 1.0] [--llaves 400]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.cache import TTLCache
+
+
+class TTLCacheAnterior:
+    """Lectura de la implementación previa: un lock global y datetime.now()."""
+
+    def __init__(self, ttl_seconds: float):
+        self.cache = OrderedDict()
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self.cache:
+                value, timestamp = self.cache[key]
+                if datetime.now() - timestamp < self.ttl:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.cache[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self.cache[key] = (value, datetime.now())
+            self.cache.move_to_end(key)
+
+
+class ListaPlana:
+    """Lectura sin lock de una lista indexada por id (CatalogoPlano)."""
+
+    def __init__(self, llaves: int):
+        self.tabla = [None] * llaves
+
+    def get(self, key):
+        return self.tabla[key[1]]
+
+    def set(self, key, value):
+        self.tabla[key[1]] = value
+
+
+def medir(cache, llaves, hilos: int, segundos: float) -> float:
+    """Lecturas por segundo sumando todos los hilos."""
+    detener = threading.Event()
+    conteos = [0] * hilos
+    barrera = threading.Barrier(hilos + 1)
+
+    def trabajar(n: int):
+        get = cache.get
+        total = 0
+        barrera.wait()
+        while not detener.is_set():
+            for key in llaves:
+                get(key)
+            total += len(llaves)
+        conteos[n] = total
+
+    trabajadores = [threading.Thread(target=trabajar, args=(n,)) for n in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    time.sleep(segundos)
+    detener.set()
+    for t in trabajadores:
+        t.join()
+    return sum(conteos) / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segundos", type=float, default=1.0)
+    parser.add_argument("--llaves", type=int, default=400)
+    args = parser.parse_args()
+
+    llaves = [("pizza", i) for i in range(args.llaves)]
+    variantes = {
+        "anterior (lock global)": TTLCacheAnterior(ttl_seconds=3600),
+        "TTLCache 1 partición": TTLCache(ttl_seconds=3600, maxsize=4096, particiones=1),
+        "TTLCache 8 particiones": TTLCache(ttl_seconds=3600, maxsize=4096),
+        "lista plana sin lock": ListaPlana(args.llaves),
+    }
+    for cache in variantes.values():
+        for key in llaves:
+            cache.set(key, {"nombre": f"Pizza {key[1]}", "tamano": "Grande"})
+
+    print(f"{'':24s}" + "".join(f"{h:>14d} hilos" for h in (1, 8, 32)))
+    for nombre, cache in variantes.items():
+        resultados = [medir(cache, llaves, hilos, args.segundos) for hilos in (1, 8, 32)]
+        print(f"{nombre:24s}" + "".join(f"{r / 1e6:14.2f} M/s  " for r in resultados))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Prueba de carga: latencia de POST /pos/ (cobrar una venta) sola y mientras otros
+clientes piden /corte/resumen-mes, que es la consulta pesada de la hora del corte.
+
+Reporta p50, p95, p99 y máximo de POST /pos/ en cada fase, las peticiones por segundo
+y los errores. Sirve para dimensionar THREADPOOL_SIZE contra DB_POOL_SIZE +
+DB_MAX_OVERFLOW: si el threadpool es más grande que el pool, los hilos de sobra se
+quedan esperando conexión y el p99 sube hasta DB_POOL_TIMEOUT.
+
+Uso:
+    python scripts/bench_carga_pos.py [--segundos 10] [--hilos-pos 8] [--hilos-resumen 4]
+    python scripts/bench_carga_pos.py --db mysql+pymysql://.../bench
+    python scripts/bench_carga_pos.py --base http://localhost:8000 --id-caja 1
+
+Por omisión levanta la app con uvicorn en este proceso sobre un archivo SQLite
+temporal con un año de ventas. SQLite serializa las escrituras, así que los números
+absolutos solo son comparables entre corridas; para medir en serio usar --db con una
+base MySQL desechable (el script crea las tablas y las llena, NO usarlo contra
+producción). Con --base no se llena nada y se le pega a un servidor ya levantado.
+THREADPOOL_SIZE, DB_POOL_SIZE y DB_MAX_OVERFLOW se toman del entorno como en la app.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# app.db.session arma la URL de MySQL al importarse; aquí se reemplaza el engine
+for var, valor in (("DB_USER", "bench"), ("DB_PASSWORD", ""), ("DB_HOST", "localhost"),
+                   ("DB_PORT", "3306"), ("DB_NAME", "bench"),
+                   ("SECRET_KEY", "bench"), ("ALGORITHM", "HS256"), ("ACCESS_TOKEN_EXPIRE_MINUTES", "600")):
+    os.environ.setdefault(var, valor)
+
+import httpx
+
+VENTA = {
+    "id_suc": 1, "tipo_servicio": 0, "mesa": 1, "total": "90", "comentarios": "bench",
+    "items": [{"cantidad": 1, "precio_unitario": "90", "id_hamb": 1}],
+}
+
+
+def levantar_app(url_db: str, anio: int, ventas_dia: int, puerto: int) -> str:
+    """Crear y llenar la base, cambiar el engine de la app y arrancar uvicorn en un hilo."""
+    from sqlalchemy import event
+    from sqlmodel import SQLModel, Session, create_engine
+
+    import app.db.session as db
+
+    opciones = {}
+    if url_db.startswith("sqlite"):
+        opciones["connect_args"] = {"check_same_thread": False, "timeout": 30}
+    # Mismo pool que la app, para que la espera por conexión se mida igual
+    engine = create_engine(url_db, poolclass=db.MeteredQueuePool, pool_size=db.DB_POOL_SIZE,
+                           max_overflow=db.DB_MAX_OVERFLOW, pool_timeout=db.DB_POOL_TIMEOUT, **opciones)
+    # Antes de importar app.main (también lo importa bench_resumen_mes), que toma el engine al importarse
+    db.engine = engine
+
+    import uvicorn
+    import app.main
+    from bench_resumen_mes import _funciones_sqlite, poblar
+    from app.api.refactors.resumenRefactor import reconstruir_resumen
+
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _funciones_sqlite)
+    SQLModel.metadata.create_all(engine)
+    ventas, pagos = poblar(engine, anio, ventas_dia)
+    with Session(engine) as session:
+        reconstruir_resumen(session)
+        session.commit()
+    print(f"{ventas} ventas y {pagos} pagos en {anio} ({engine.dialect.name})")
+
+    servidor = uvicorn.Server(uvicorn.Config(app.main.app, host="127.0.0.1", port=puerto, log_level="warning"))
+    threading.Thread(target=servidor.run, name="uvicorn", daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+    print(f"THREADPOOL_SIZE={app.main.THREADPOOL_SIZE} DB_POOL_SIZE={db.DB_POOL_SIZE} "
+          f"DB_MAX_OVERFLOW={db.DB_MAX_OVERFLOW}")
+    return f"http://127.0.0.1:{puerto}"
+
+
+def percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def fase(base: str, segundos: float, hilos_pos: int, hilos_resumen: int, id_caja: int, anio: int):
+    """Latencias de POST /pos/ (segundos) y cuántas peticiones de cada tipo fallaron."""
+    detener = threading.Event()
+    latencias, errores, resumenes = [], {"pos": 0, "resumen": 0}, [0]
+    lock = threading.Lock()
+    venta = {**VENTA, "id_caja": id_caja}
+
+    def cobrar():
+        with httpx.Client(base_url=base, timeout=120) as cliente:
+            while not detener.is_set():
+                inicio = time.perf_counter()
+                respuesta = cliente.post("/pos/", json=venta)
+                transcurrido = time.perf_counter() - inicio
+                with lock:
+                    if respuesta.status_code == 200:
+                        latencias.append(transcurrido)
+                    else:
+                        errores["pos"] += 1
+
+    def resumir(n: int):
+        with httpx.Client(base_url=base, timeout=120) as cliente:
+            mes = 1 + n % 12
+            while not detener.is_set():
+                respuesta = cliente.get("/corte/resumen-mes", params={"mes": mes, "anio": anio})
+                with lock:
+                    if respuesta.status_code == 200:
+                        resumenes[0] += 1
+                    else:
+                        errores["resumen"] += 1
+                mes = 1 + mes % 12
+
+    hilos = [threading.Thread(target=cobrar) for _ in range(hilos_pos)]
+    hilos += [threading.Thread(target=resumir, args=(n,)) for n in range(hilos_resumen)]
+    for hilo in hilos:
+        hilo.start()
+    time.sleep(segundos)
+    detener.set()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, resumenes[0], errores
+
+
+def reportar(nombre: str, latencias, resumenes: int, errores, segundos: float):
+    if not latencias:
+        print(f"{nombre:22s} sin ventas cobradas; errores {errores}")
+        return
+    ms = [t * 1000 for t in latencias]
+    print(f"{nombre:22s} {len(ms) / segundos:7.1f} ventas/s | p50 {percentil(ms, 0.50):7.1f} ms "
+          f"| p95 {percentil(ms, 0.95):7.1f} ms | p99 {percentil(ms, 0.99):7.1f} ms | max {max(ms):7.1f} ms "
+          f"| resumen-mes {resumenes / segundos:5.1f}/s | errores {errores}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", help="URL de un servidor ya levantado; si no, se levanta uno aquí")
+    parser.add_argument("--db", default=f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_carga_pos.db')}",
+                        help="URL de una base desechable para el servidor local")
+    parser.add_argument("--anio", type=int, default=2024)
+    parser.add_argument("--ventas-dia", type=int, default=300)
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--id-caja", type=int, default=1)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--hilos-pos", type=int, default=8)
+    parser.add_argument("--hilos-resumen", type=int, default=4)
+    args = parser.parse_args()
+
+    base = args.base
+    if base is None:
+        if args.db.startswith("sqlite:///") and os.path.exists(args.db[len("sqlite:///"):]):
+            os.remove(args.db[len("sqlite:///"):])
+        base = levantar_app(args.db, args.anio, args.ventas_dia, args.puerto)
+
+    latencias, resumenes, errores = fase(base, args.segundos, args.hilos_pos, 0, args.id_caja, args.anio)
+    reportar("POST /pos/ solo", latencias, resumenes, errores, args.segundos)
+    latencias, resumenes, errores = fase(base, args.segundos, args.hilos_pos, args.hilos_resumen, args.id_caja, args.anio)
+    reportar("POST /pos/ + resumen", latencias, resumenes, errores, args.segundos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark del cotizador de ventas (app/api/refactors/cotizador.py).
+
+Cotiza carritos de 1 a 200 renglones con el índice de precios en memoria y los
+compara contra cotizar consultando la base renglón por renglón. Además verifica
+que ambos den el mismo total.
+
+Uso:
+    python scripts/bench_cotizador.py [--repeticiones 200] [--url mysql+pymysql://.../bench]
+
+Por omisión usa SQLite en memoria. Con --url se puede apuntar a una base MySQL
+desechable: el script crea las tablas y las llena, NO usarlo contra producción.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# app.db.session arma la URL de MySQL al importarse; aquí no se usa ese engine
+for var, valor in (("DB_USER", "bench"), ("DB_PASSWORD", ""), ("DB_HOST", "localhost"),
+                   ("DB_PORT", "3306"), ("DB_NAME", "bench"),
+                   ("SECRET_KEY", "bench"), ("ALGORITHM", "HS256"), ("ACCESS_TOKEN_EXPIRE_MINUTES", "600")):
+    os.environ.setdefault(var, valor)
+
+from sqlmodel import SQLModel, Session, create_engine, select
+
+import app.main  # noqa: F401  registra todos los modelos
+from app.api.refactors.cotizador import cotizar_items
+from app.api.refactors.menuSnapshot import construir_menu
+from app.schemas.ventaSchema import ItemVentaRequest
+from app.models.especialidadModel import especialidad
+from app.models.tamanosPizzasModel import tamanosPizzas
+from app.models.tamanosRefrescosModel import tamanosRefrescos
+from app.models.pizzasModel import pizzas
+from app.models.hamburguesasModel import hamburguesas
+from app.models.alitasModel import alitas
+from app.models.refrescosModel import refrescos
+from app.models.rectangularModel import rectangular
+from app.models.paquetesModel import paquete
+
+ESPECIALIDADES = 20
+
+
+def poblar(engine):
+    with Session(engine) as session:
+        session.add(tamanosRefrescos(id_tamano=1, tamano="2 litros", precio=Decimal("45.00")))
+        for id_tamano, (tamano, precio) in enumerate((("Grande", "150.00"), ("Grande Especial", "170.00"),
+                                                       ("Familiar", "190.00"), ("Familiar Especial", "210.00")), 1):
+            session.add(tamanosPizzas(id_tamañop=id_tamano, tamano=tamano, precio=Decimal(precio)))
+        for id_esp in range(1, ESPECIALIDADES + 1):
+            session.add(especialidad(id_esp=id_esp, nombre=f"Especialidad {id_esp}", descripcion="Benchmark"))
+            session.add(pizzas(id_pizza=id_esp, id_esp=id_esp, id_tamano=1 + id_esp % 4, id_cat=1))
+            session.add(rectangular(id_rec=id_esp, id_esp=id_esp, id_cat=1, precio=Decimal(230 + id_esp)))
+            session.add(hamburguesas(id_hamb=id_esp, paquete=f"Hamburguesa {id_esp}", precio=Decimal(80 + id_esp), id_cat=1))
+            session.add(alitas(id_alis=id_esp, orden=f"Alitas {id_esp}", precio=Decimal(110 + id_esp), id_cat=1))
+            session.add(refrescos(id_refresco=id_esp, nombre=f"Refresco {id_esp}", id_tamano=1, id_cat=1))
+        for id_paquete in (1, 2, 3):
+            session.add(paquete(id_paquete=id_paquete, nombre=f"Paquete {id_paquete}", descripcion="Benchmark",
+                                precio=Decimal(250 + 50 * id_paquete)))
+        session.commit()
+
+
+def carrito(renglones: int):
+    def item():
+        ids = lambda: random.randint(1, ESPECIALIDADES)  # noqa: E731
+        return random.choice((
+            lambda: {"id_pizza": ids()},
+            lambda: {"id_hamb": ids(), "queso": 15},
+            lambda: {"id_alis": ids()},
+            lambda: {"id_refresco": ids()},
+            lambda: {"id_rec": [ids(), ids(), ids(), ids()]},
+            lambda: {"ingredientes": {"tamano": 2, "ingredientes": [1, 2, 3]}},
+            lambda: {"pizza_mitad": {"tamano": 3, "ingredientes": [ids(), ids()]}},
+            lambda: {"id_paquete": {"id_paquete": 2, "id_pizzas": [ids()], "id_alis": ids()}},
+        ))()
+    return [ItemVentaRequest(cantidad=random.randint(1, 3), **item()) for _ in range(renglones)]
+
+
+def _cotizar_consultando(session: Session, items) -> Decimal:
+    """Cotizar sin índice: una consulta por producto, como lo haría el servidor sin caché."""
+    def precio(statement):
+        return session.exec(statement).one()
+
+    total = Decimal("0")
+    for item in items:
+        if item.pizza_mitad or item.ingredientes:
+            tamano = (item.pizza_mitad or item.ingredientes).tamano
+            unitario = precio(select(tamanosPizzas.precio).where(tamanosPizzas.id_tamañop == tamano))
+        elif item.id_paquete:
+            unitario = precio(select(paquete.precio).where(paquete.id_paquete == item.id_paquete.id_paquete))
+        elif item.id_pizza:
+            unitario = precio(select(tamanosPizzas.precio).join(pizzas, pizzas.id_tamano == tamanosPizzas.id_tamañop)
+                              .where(pizzas.id_pizza == item.id_pizza))
+        elif item.id_hamb:
+            unitario = precio(select(hamburguesas.precio).where(hamburguesas.id_hamb == item.id_hamb))
+        elif item.id_alis:
+            unitario = precio(select(alitas.precio).where(alitas.id_alis == item.id_alis))
+        elif item.id_refresco:
+            unitario = precio(select(tamanosRefrescos.precio).join(refrescos, refrescos.id_tamano == tamanosRefrescos.id_tamano)
+                              .where(refrescos.id_refresco == item.id_refresco))
+        else:
+            unitario = max(precio(select(rectangular.precio).where(rectangular.id_rec == id_rec)) for id_rec in item.id_rec)
+        total += (Decimal(unitario) + (item.queso or 0)) * item.cantidad
+    return total
+
+
+def medir(funcion, repeticiones: int):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2], resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite://", help="URL de una base desechable (por omisión SQLite en memoria)")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(14)
+    engine = create_engine(args.url)
+    SQLModel.metadata.create_all(engine)
+    poblar(engine)
+
+    with Session(engine) as session:
+        inicio = time.perf_counter()
+        indice = construir_menu(session).precios
+        print(f"índice de precios (con el snapshot del menú): {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+        for renglones in (1, 10, 50, 100, 200):
+            items = carrito(renglones)
+            t_indice, cotizacion = medir(lambda: cotizar_items(indice, items), args.repeticiones)
+            t_consultas, total = medir(lambda: _cotizar_consultando(session, items), max(1, args.repeticiones // 20))
+            print(f"{renglones:3d} renglones: índice {t_indice * 1e6:8.1f} µs | consultando {t_consultas * 1e6:9.1f} µs "
+                  f"| x{t_consultas / t_indice:6.1f} | mismo total: {cotizacion.total == total}")
+
+
+if __name__ == "__main__":
+    main()
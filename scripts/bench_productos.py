@@ -0,0 +1,206 @@
+"""
+Microbenchmark de _procesar_producto_por_tipo (app/api/refactors/getsRefactor.py).
+
+Resuelve cargas del tamaño de la pantalla de cocina (pedidos abiertos con varios
+renglones de todos los tipos) con la tabla de despacho y el catálogo plano, y con la
+cadena de ifs anterior sobre las funciones cacheadas. Reporta renglones por segundo
+y verifica que ambas den exactamente el mismo resultado.
+
+Uso:
+    python scripts/bench_productos.py [--pedidos 40] [--renglones 6] [--repeticiones 50]
+
+Usa SQLite en memoria; después de la primera vuelta no hay consultas, todo sale del
+catálogo en memoria.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# app.db.session arma la URL de MySQL al importarse; aquí no se usa ese engine
+for var, valor in (("DB_USER", "bench"), ("DB_PASSWORD", ""), ("DB_HOST", "localhost"),
+                   ("DB_PORT", "3306"), ("DB_NAME", "bench"),
+                   ("SECRET_KEY", "bench"), ("ALGORITHM", "HS256"), ("ACCESS_TOKEN_EXPIRE_MINUTES", "600")):
+    os.environ.setdefault(var, valor)
+
+from sqlmodel import SQLModel, Session, create_engine, select
+
+import app.main  # noqa: F401  registra todos los modelos
+from app.api.refactors import cachedDef
+from app.api.refactors.getsRefactor import _procesar_producto_por_tipo
+from app.models.detallesModel import DetalleVenta
+from app.models.ventaModel import Ingredientes
+from app.models.especialidadModel import especialidad
+from app.models.tamanosPizzasModel import tamanosPizzas
+from app.models.tamanosRefrescosModel import tamanosRefrescos
+from app.models.pizzasModel import pizzas
+from app.models.hamburguesasModel import hamburguesas
+from app.models.costillasModel import costillas
+from app.models.alitasModel import alitas
+from app.models.spaguettyModel import spaguetty
+from app.models.papasModel import papas
+from app.models.mariscosModel import mariscos
+from app.models.refrescosModel import refrescos
+from app.models.magnoModel import magno
+from app.models.rectangularModel import rectangular
+from app.models.barraModel import barra
+
+N = 20
+
+
+def poblar(engine):
+    with Session(engine) as session:
+        session.add(tamanosRefrescos(id_tamano=1, tamano="2 litros", precio=Decimal("45.00")))
+        for id_tamano, tamano in enumerate(("Grande", "Grande Especial", "Familiar", "Grande Camaron"), 1):
+            session.add(tamanosPizzas(id_tamañop=id_tamano, tamano=tamano, precio=Decimal("150.00")))
+        for i in range(1, N + 1):
+            session.add(especialidad(id_esp=i, nombre=f"Especialidad {i}", descripcion="Benchmark"))
+            session.add(Ingredientes(id_ingrediente=i, ingrediente=f"Ingrediente {i}"))
+            session.add(pizzas(id_pizza=i, id_esp=i, id_tamano=1 + i % 3, id_cat=1))
+            session.add(hamburguesas(id_hamb=i, paquete=f"Hamburguesa {i}", precio=Decimal("90"), id_cat=1))
+            session.add(costillas(id_cos=i, orden=f"Costillas {i}", precio=Decimal("200"), id_cat=1))
+            session.add(alitas(id_alis=i, orden=f"Alitas {i}", precio=Decimal("120"), id_cat=1))
+            session.add(spaguetty(id_spag=i, orden=f"Spaguetty {i}", precio=Decimal("80"), id_cat=1))
+            session.add(papas(id_papa=i, orden=f"Papas {i}", precio=Decimal("60"), id_cat=1))
+            session.add(mariscos(id_maris=i, nombre=f"Marisco {i}", descripcion="Benchmark", id_tamañop=4, id_cat=1))
+            session.add(refrescos(id_refresco=i, nombre=f"Refresco {i}", id_tamano=1, id_cat=1))
+            session.add(magno(id_magno=i, id_especialidad=i, id_refresco=1, precio=Decimal("300")))
+            session.add(rectangular(id_rec=i, id_esp=i, id_cat=1, precio=Decimal("250")))
+            session.add(barra(id_barr=i, id_especialidad=i, id_cat=1, precio=Decimal("220")))
+        session.commit()
+
+
+def renglon():
+    ids = lambda: random.randint(1, N)  # noqa: E731
+    columnas = random.choice((
+        lambda: {"id_pizza": ids(), "queso": random.choice((None, 15))},
+        lambda: {"id_hamb": ids()}, lambda: {"id_cos": ids()}, lambda: {"id_alis": ids()},
+        lambda: {"id_spag": ids()}, lambda: {"id_papa": ids()}, lambda: {"id_maris": ids()},
+        lambda: {"id_refresco": ids()},
+        lambda: {"id_magno": [ids(), ids()]},
+        lambda: {"id_rec": [ids(), ids(), ids(), ids()]},
+        lambda: {"id_barr": [ids(), ids()]},
+        lambda: {"pizza_mitad": {"tamano": 1, "ingredientes": [ids(), ids()]}},
+        lambda: {"ingredientes": {"tamano": 2, "ingredientes": [ids(), ids(), ids()]}},
+        lambda: {"id_paquete": {"id_paquete": 2, "id_pizzas": [ids()], "id_refresco": ids(), "id_alis": ids()}},
+        lambda: {"id_paquete": {"id_paquete": 3, "id_pizzas": [ids(), ids(), ids()], "id_refresco": ids()}},
+    ))()
+    return DetalleVenta(id_venta=1, cantidad=random.randint(1, 3), precio_unitario=Decimal("10"), status=random.randint(0, 2), **columnas)
+
+
+# ---------- implementación anterior (cadena de ifs sobre las funciones cacheadas) ----------
+
+def _mitad_anterior(session, det):
+    try:
+        mitad_data = det.pizza_mitad
+        if isinstance(mitad_data, str):
+            mitad_data = json.loads(mitad_data)
+        tamano_id = mitad_data.get("tamano")
+        nombre_tamano = cachedDef.get_tamano_pizza_nombre(session, tamano_id)
+        nombres = [cachedDef.get_especialidad_nombre(session, i) for i in mitad_data.get("ingredientes", [])]
+        return {"cantidad": det.cantidad, "nombre": f"Pizza Mitad - {nombre_tamano}", "tipo": "Pizza Mitad",
+                "status": det.status, "es_personalizado": True, "tamano": nombre_tamano,
+                "detalles_ingredientes": {"tamano": nombre_tamano, "tamano_id": tamano_id, "especialidades": nombres,
+                                          "cantidad_especialidades": len(nombres)}}
+    except Exception as e:
+        return {"cantidad": det.cantidad, "nombre": "Pizza Mitad - Error", "tipo": "Pizza Mitad", "status": det.status,
+                "es_personalizado": True, "detalles_ingredientes": {"error": str(e)}}
+
+
+def _paquete_anterior(session, det):
+    paquete_data = json.loads(det.id_paquete) if isinstance(det.id_paquete, str) else det.id_paquete
+    detalles = {"paquete": paquete_data.get("id_paquete", "Desconocido")}
+    nombres_pizzas = []
+    for pid in paquete_data.get("id_pizzas", []) or []:
+        info = cachedDef.procesar_pizza_cached(session, 1, pid, det.status)
+        nombres_pizzas.append(info["nombre"] if info else f"Pizza #{pid}")
+    if nombres_pizzas:
+        detalles["pizzas"] = nombres_pizzas
+    for llave, procesar, nombre in (("id_refresco", cachedDef.procesar_refresco_cached, "Refresco"),
+                                    ("id_hamb", cachedDef.procesar_hamburguesa_cached, "Hamburguesa"),
+                                    ("id_alis", cachedDef.procesar_alitas_cached, "Alitas")):
+        id_producto = paquete_data.get(llave)
+        if id_producto:
+            info = procesar(session, 1, id_producto, det.status)
+            detalles[nombre.lower()] = info["nombre"] if info else f"{nombre} #{id_producto}"
+    return [{"cantidad": det.cantidad, "nombre": f"Paquete {detalles['paquete']}", "tipo": "Paquete",
+             "status": det.status, "es_personalizado": False, "detalles_ingredientes": detalles}]
+
+
+def _procesar_anterior(session, det):
+    if det.pizza_mitad:
+        return [_mitad_anterior(session, det)]
+    if det.ingredientes:
+        return [cachedDef.procesar_producto_personalizado_cached(session, det.cantidad, det.ingredientes, det.status)]
+    if det.id_paquete:
+        return _paquete_anterior(session, det)
+    productos = []
+    if det.id_pizza:
+        pizza = cachedDef.procesar_pizza_cached(session, det.cantidad, det.id_pizza, det.status)
+        if pizza is not None:
+            pizza["con_queso"] = bool(det.queso)
+            productos.append(pizza)
+    for columna, procesar in (("id_hamb", cachedDef.procesar_hamburguesa_cached), ("id_cos", cachedDef.procesar_costilla_cached),
+                              ("id_alis", cachedDef.procesar_alitas_cached), ("id_spag", cachedDef.procesar_spaghetti_cached),
+                              ("id_papa", cachedDef.procesar_papas_cached), ("id_maris", cachedDef.procesar_mariscos_cached),
+                              ("id_refresco", cachedDef.procesar_refresco_cached)):
+        if getattr(det, columna):
+            producto = procesar(session, det.cantidad, getattr(det, columna), det.status)
+            if producto:
+                productos.append(producto)
+    for columna, procesar in (("id_magno", cachedDef.procesar_magno_cached), ("id_rec", cachedDef.procesar_rectangular_cached),
+                              ("id_barr", cachedDef.procesar_barra_cached)):
+        if getattr(det, columna):
+            productos.extend(procesar(session, det.cantidad, getattr(det, columna), det.status))
+    return productos
+
+
+def medir(funcion, repeticiones: int):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2], resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pedidos", type=int, default=40)
+    parser.add_argument("--renglones", type=int, default=6, help="renglones por pedido")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(15)
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    poblar(engine)
+
+    detalles = [renglon() for _ in range(args.pedidos * args.renglones)]
+    with Session(engine) as session:
+        cachedDef.precargar_catalogo(session)
+        # Ingredientes en el identity map durante toda la medición, como los deja _cargar_datos_pedidos
+        ingredientes = session.exec(select(Ingredientes)).all()
+        # Igual que _construir_pedidos_cocina: el catálogo plano se pide una vez por pantalla
+        plano = cachedDef.obtener_catalogo_plano(session)
+
+        t_antes, r_antes = medir(lambda: [_procesar_anterior(session, det) for det in detalles], args.repeticiones)
+        t_ahora, r_ahora = medir(lambda: [_procesar_producto_por_tipo(session, det, plano) for det in detalles], args.repeticiones)
+
+    renglones = len(detalles)
+    print(f"{args.pedidos} pedidos x {args.renglones} renglones = {renglones} renglones por pantalla "
+          f"({len(ingredientes)} ingredientes en el catálogo)")
+    print(f"anterior: {renglones / t_antes:10,.0f} renglones/s ({t_antes * 1000:6.2f} ms por pantalla)")
+    print(f"tabla:    {renglones / t_ahora:10,.0f} renglones/s ({t_ahora * 1000:6.2f} ms por pantalla)")
+    print(f"x{t_antes / t_ahora:.1f} | mismos resultados: {r_antes == r_ahora}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark de /corte/resumen-mes sobre un año sintético de ventas.
+
+Compara la consulta original (YEAR()/MONTH() sobre fecha_hora y suma en Python)
+contra la actual, que lee el acumulado diario ResumenVentaDia por rango [inicio, fin).
+
+Uso:
+    python scripts/bench_resumen_mes.py [--ventas-dia 300] [--url mysql+pymysql://.../bench]
+
+Por omisión usa SQLite en memoria. Con --url se puede apuntar a una base MySQL
+desechable: el script crea las tablas y las llena, NO usarlo contra producción.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# app.db.session arma la URL de MySQL al importarse; aquí no se usa ese engine
+for var, valor in (("DB_USER", "bench"), ("DB_PASSWORD", ""), ("DB_HOST", "localhost"),
+                   ("DB_PORT", "3306"), ("DB_NAME", "bench"),
+                   ("SECRET_KEY", "bench"), ("ALGORITHM", "HS256"), ("ACCESS_TOKEN_EXPIRE_MINUTES", "600")):
+    os.environ.setdefault(var, valor)
+
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, create_engine, select, func
+
+import app.main  # noqa: F401  registra todos los modelos
+from app.api.corte import get_resumen_mes
+from app.api.refactors.resumenRefactor import reconstruir_resumen
+from app.models.ventaModel import Venta
+from app.models.pagosModel import Pago, MetodosPago
+from app.models.sucursalModel import Sucursal
+
+
+def _funciones_sqlite(dbapi_conn, _):
+    """YEAR(), MONTH() y DAY() de MySQL para poder correr en SQLite."""
+    def parte(attr):
+        return lambda valor: None if valor is None else getattr(datetime.fromisoformat(str(valor)), attr)
+    for nombre in ("year", "month", "day"):
+        dbapi_conn.create_function(nombre, 1, parte(nombre))
+
+
+def _resumen_mes_anterior(session: Session, mes: int, anio: int, id_suc):
+    """Implementación previa, para comparar tiempos y resultados."""
+    statement = select(Venta, Pago, MetodosPago).outerjoin(
+        Pago, Venta.id_venta == Pago.id_venta
+    ).outerjoin(
+        MetodosPago, Pago.id_metpago == MetodosPago.id_metpago
+    ).where(
+        func.year(Venta.fecha_hora) == anio,
+        func.month(Venta.fecha_hora) == mes
+    )
+    if id_suc is not None:
+        statement = statement.where(Venta.id_suc == id_suc)
+
+    dias_data = {}
+    for venta, pago, metodo in session.exec(statement).all():
+        dia = dias_data.setdefault(venta.fecha_hora.day, {
+            "efectivo": Decimal("0"), "tarjeta": Decimal("0"), "transferencia": Decimal("0")
+        })
+        if pago and metodo and metodo.metodo.lower() in dia:
+            dia[metodo.metodo.lower()] += pago.monto
+    return [(d, v["efectivo"], v["tarjeta"], v["transferencia"]) for d, v in sorted(dias_data.items())]
+
+
+def poblar(engine, anio: int, ventas_dia: int, sucursales: int = 3):
+    random.seed(anio)
+    with Session(engine) as session:
+        for id_suc in range(1, sucursales + 1):
+            session.add(Sucursal(id_suc=id_suc, nombre=f"Sucursal {id_suc}", direccion="Bench", telefono=1000000 + id_suc))
+        for id_metpago, metodo in enumerate(("Efectivo", "Tarjeta", "Transferencia"), 1):
+            session.add(MetodosPago(id_metpago=id_metpago, metodo=metodo))
+        session.commit()
+
+        ventas, pagos = [], []
+        id_venta = 0
+        dia = datetime(anio, 1, 1)
+        while dia.year == anio:
+            for _ in range(ventas_dia):
+                id_venta += 1
+                ventas.append({
+                    "id_venta": id_venta,
+                    "id_suc": random.randint(1, sucursales),
+                    "fecha_hora": dia + timedelta(seconds=random.randint(10 * 3600, 23 * 3600)),
+                    "total": Decimal("250.00"),
+                    "status": 2,
+                    "tipo_servicio": 1,
+                    "id_caja": 1,
+                })
+                for _ in range(random.choice((1, 1, 1, 2))):
+                    pagos.append({
+                        "id_venta": id_venta,
+                        "id_metpago": random.randint(1, 3),
+                        "monto": Decimal(random.randint(50, 900)),
+                    })
+            dia += timedelta(days=1)
+
+        session.execute(Venta.__table__.insert(), ventas)
+        session.execute(Pago.__table__.insert(), pagos)
+        session.commit()
+    return len(ventas), len(pagos)
+
+
+def medir(funcion, repeticiones: int):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite://", help="URL de una base desechable (por omisión SQLite en memoria)")
+    parser.add_argument("--anio", type=int, default=2024)
+    parser.add_argument("--ventas-dia", type=int, default=300)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _funciones_sqlite)
+    SQLModel.metadata.create_all(engine)
+
+    total_ventas, total_pagos = poblar(engine, args.anio, args.ventas_dia)
+    print(f"{total_ventas} ventas y {total_pagos} pagos en {args.anio} ({engine.dialect.name})")
+
+    with Session(engine) as session:
+        inicio = time.perf_counter()
+        filas = reconstruir_resumen(session)
+        session.commit()
+        print(f"acumulado diario: {filas} filas en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    with Session(engine) as session:
+        for mes, id_suc in ((6, None), (6, 2), (12, None)):
+            t_antes, r_antes = medir(lambda: _resumen_mes_anterior(session, mes, args.anio, id_suc), args.repeticiones)
+            t_ahora, r_ahora = medir(lambda: get_resumen_mes(mes=mes, anio=args.anio, id_suc=id_suc, session=session), args.repeticiones)
+            iguales = r_antes == [(r.dia, r.efectivo, r.tarjeta, r.transferencia) for r in r_ahora]
+            print(f"mes={mes:2d} id_suc={id_suc}: antes {t_antes * 1000:8.1f} ms | ahora {t_ahora * 1000:8.1f} ms "
+                  f"| x{t_antes / t_ahora:5.1f} | mismos resultados: {iguales}")
+
+
+if __name__ == "__main__":
+    main()
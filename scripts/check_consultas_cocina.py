@@ -0,0 +1,153 @@
+"""
+Verifica que /pos/pedidos-cocina haga el mismo número de consultas sin importar
+cuántos pedidos abiertos haya (sin N+1).
+
+Llena una base SQLite en memoria con pedidos de los cuatro tipos de servicio y
+renglones de todos los tipos de producto, cuenta las sentencias con un listener
+before_cursor_execute y compara 10 contra 60 pedidos abiertos. El catálogo y las
+sucursales se calientan antes de medir, igual que en un worker que ya atendió
+peticiones. Termina con error si los conteos difieren.
+
+Uso:
+    python scripts/check_consultas_cocina.py [--pocos 10] [--muchos 60]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# app.db.session arma la URL de MySQL al importarse; aquí no se usa ese engine
+for var, valor in (("DB_USER", "bench"), ("DB_PASSWORD", ""), ("DB_HOST", "localhost"),
+                   ("DB_PORT", "3306"), ("DB_NAME", "bench"),
+                   ("SECRET_KEY", "bench"), ("ALGORITHM", "HS256"), ("ACCESS_TOKEN_EXPIRE_MINUTES", "600")):
+    os.environ.setdefault(var, valor)
+
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, create_engine
+
+import app.main  # noqa: F401  registra todos los modelos
+from app.api.pos import listar_pedidos_cocina
+from app.models.ventaModel import Venta, Ingredientes
+from app.models.detallesModel import DetalleVenta
+from app.models.clienteModel import Cliente
+from app.models.DireccionesModel import Direccion
+from app.models.pDireccionModel import pDireccion
+from app.models.pEspecialModel import PEspecial
+from app.models.sucursalModel import Sucursal
+from app.models.pagosModel import MetodosPago
+from app.models.especialidadModel import especialidad
+from app.models.tamanosPizzasModel import tamanosPizzas
+from app.models.tamanosRefrescosModel import tamanosRefrescos
+from app.models.pizzasModel import pizzas
+from app.models.hamburguesasModel import hamburguesas
+from app.models.costillasModel import costillas
+from app.models.alitasModel import alitas
+from app.models.spaguettyModel import spaguetty
+from app.models.papasModel import papas
+from app.models.mariscosModel import mariscos
+from app.models.refrescosModel import refrescos
+from app.models.magnoModel import magno
+from app.models.rectangularModel import rectangular
+from app.models.barraModel import barra
+
+# Un renglón de cada tipo que resuelve _procesar_producto_por_tipo
+RENGLONES = (
+    {"id_pizza": 1, "queso": 15}, {"id_hamb": 1}, {"id_cos": 1}, {"id_alis": 1}, {"id_spag": 1},
+    {"id_papa": 1}, {"id_maris": 1}, {"id_refresco": 1}, {"id_magno": [1, 2]}, {"id_rec": [1, 2, 3, 1]},
+    {"id_barr": [2, 3]}, {"ingredientes": {"tamano": 2, "ingredientes": [1, 2, 3]}},
+    {"pizza_mitad": {"tamano": 1, "ingredientes": [1, 3]}},
+    {"id_paquete": {"id_paquete": 2, "id_pizzas": [1], "id_refresco": 1, "id_alis": 1}},
+)
+
+
+def poblar_catalogo(engine):
+    with Session(engine) as session:
+        session.add(Sucursal(id_suc=1, nombre="Centro", direccion="Check", telefono=1000001))
+        for id_metpago, metodo in enumerate(("Tarjeta", "Efectivo", "Transferencia"), 1):
+            session.add(MetodosPago(id_metpago=id_metpago, metodo=metodo))
+        session.add(tamanosRefrescos(id_tamano=1, tamano="2 litros", precio=Decimal("45.00")))
+        for id_tamano, tamano in enumerate(("Grande", "Grande Especial", "Familiar", "Grande Camaron"), 1):
+            session.add(tamanosPizzas(id_tamañop=id_tamano, tamano=tamano, precio=Decimal("150.00")))
+        for i in range(1, 4):
+            session.add(especialidad(id_esp=i, nombre=f"Especialidad {i}", descripcion="Check"))
+            session.add(Ingredientes(id_ingrediente=i, ingrediente=f"Ingrediente {i}"))
+            session.add(pizzas(id_pizza=i, id_esp=i, id_tamano=1, id_cat=1))
+            session.add(magno(id_magno=i, id_especialidad=i, id_refresco=1, precio=Decimal("300")))
+            session.add(rectangular(id_rec=i, id_esp=i, id_cat=1, precio=Decimal("250")))
+            session.add(barra(id_barr=i, id_especialidad=i, id_cat=1, precio=Decimal("220")))
+        session.add(hamburguesas(id_hamb=1, paquete="Hamburguesa", precio=Decimal("90"), id_cat=1))
+        session.add(costillas(id_cos=1, orden="Costillas", precio=Decimal("200"), id_cat=1))
+        session.add(alitas(id_alis=1, orden="Alitas", precio=Decimal("120"), id_cat=1))
+        session.add(spaguetty(id_spag=1, orden="Spaguetty", precio=Decimal("80"), id_cat=1))
+        session.add(papas(id_papa=1, orden="Papas", precio=Decimal("60"), id_cat=1))
+        session.add(mariscos(id_maris=1, nombre="Camaron", descripcion="Check", id_tamañop=4, id_cat=1))
+        session.add(refrescos(id_refresco=1, nombre="Refresco", id_tamano=1, id_cat=1))
+        session.add(Cliente(id_clie=1, nombre="Ana", apellido="Lopez", telefono=5551234))
+        session.add(Direccion(id_dir=1, id_clie=1, calle="Av 1", manzana="M1", lote="L1", colonia="Col", referencia="Ref"))
+        session.commit()
+
+
+def agregar_pedidos(engine, desde: int, hasta: int):
+    """Pedidos abiertos de hoy con id_venta en [desde, hasta), rotando tipo de servicio."""
+    ahora = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    with Session(engine) as session:
+        for id_venta in range(desde, hasta):
+            tipo = id_venta % 4
+            session.add(Venta(id_venta=id_venta, id_suc=1, mesa=id_venta if tipo == 0 else None,
+                              fecha_hora=ahora - timedelta(seconds=id_venta), total=Decimal("500"),
+                              status=id_venta % 2, tipo_servicio=tipo, nombreClie=f"Cliente {id_venta}",
+                              id_caja=1, comentarios="Check"))
+            if tipo == 2:
+                session.add(pDireccion(id_clie=1, id_dir=1, id_venta=id_venta))
+            if tipo == 3:
+                session.add(PEspecial(id_venta=id_venta, id_dir=1, id_clie=1, fecha_creacion=ahora, fecha_entrega=ahora))
+            for columnas in RENGLONES:
+                session.add(DetalleVenta(id_venta=id_venta, cantidad=2, precio_unitario=Decimal("10"), status=1, **columnas))
+        session.commit()
+
+
+def contar_consultas(engine) -> int:
+    sentencias = []
+
+    def registrar(conn, cursor, statement, *args):
+        sentencias.append(statement)
+
+    with Session(engine) as session:
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            respuesta = listar_pedidos_cocina(session=session, filtro="hoy", id_suc=1)
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+    return len(respuesta["pedidos"]), len(sentencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pocos", type=int, default=10)
+    parser.add_argument("--muchos", type=int, default=60)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    poblar_catalogo(engine)
+
+    agregar_pedidos(engine, 1, args.pocos + 1)
+    # Primera vuelta: carga catálogo y sucursales en memoria
+    contar_consultas(engine)
+    pedidos_pocos, consultas_pocos = contar_consultas(engine)
+
+    agregar_pedidos(engine, args.pocos + 1, args.muchos + 1)
+    pedidos_muchos, consultas_muchos = contar_consultas(engine)
+
+    print(f"{pedidos_pocos:4d} pedidos abiertos: {consultas_pocos} consultas")
+    print(f"{pedidos_muchos:4d} pedidos abiertos: {consultas_muchos} consultas")
+    assert pedidos_pocos == args.pocos and pedidos_muchos == args.muchos, "no se listaron todos los pedidos"
+    assert consultas_pocos == consultas_muchos, "el número de consultas crece con los pedidos (N+1)"
+    print("OK: mismo número de consultas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Agregar a una base existente las columnas e índices nuevos de los modelos.
+
+create_all solo crea tablas que no existen; las columnas (por ejemplo Venta.version) e
+índices que se agregan a tablas que ya existían se aplican con este script, una sola
+vez por despliegue y antes de levantar los workers. La app ya no hace DDL al arrancar:
+solo verifica el esquema y se niega a arrancar si falta una columna.
+
+Uso:
+    python scripts/migrar_esquema.py            # aplicar lo que falte
+    python scripts/migrar_esquema.py --dry-run  # solo mostrar las sentencias
+
+Usa la base configurada en .env. En MySQL las sentencias piden ALGORITHM=INPLACE y
+LOCK=NONE para no bloquear escrituras mientras se construyen; si el servidor no puede
+hacerlo así la sentencia falla en vez de bloquear la tabla.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from sqlmodel import SQLModel
+
+import app.main  # noqa: F401  registra todos los modelos
+from app.db.session import engine, esquema_pendiente
+
+
+def sentencias():
+    columnas, indices = esquema_pendiente()
+    mysql = engine.dialect.name == "mysql"
+    preparer = engine.dialect.identifier_preparer
+    resultado = []
+    for tabla, columna in columnas:
+        if not columna.nullable and columna.server_default is None:
+            raise RuntimeError(f"Falta la columna {tabla.name}.{columna.name} y no tiene valor por omisión; "
+                               "necesita migración a mano")
+        definicion = CreateColumn(columna).compile(dialect=engine.dialect)
+        sentencia = f"ALTER TABLE {preparer.format_table(tabla)} ADD COLUMN {definicion}"
+        resultado.append(sentencia + (", ALGORITHM=INPLACE, LOCK=NONE" if mysql else ""))
+    for indice in indices:
+        sentencia = str(CreateIndex(indice).compile(dialect=engine.dialect))
+        resultado.append(sentencia + (" ALGORITHM=INPLACE LOCK=NONE" if mysql else ""))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar las sentencias sin ejecutarlas")
+    args = parser.parse_args()
+
+    if not args.dry_run:
+        SQLModel.metadata.create_all(engine)
+    pendientes = sentencias()
+    if not pendientes:
+        print("El esquema está al día")
+        return
+    for sentencia in pendientes:
+        print(sentencia + ";")
+        if not args.dry_run:
+            # Cada DDL se confirma sola en MySQL; una por transacción
+            with engine.begin() as conexion:
+                conexion.execute(text(sentencia))
+    if not args.dry_run:
+        print(f"{len(pendientes)} cambios aplicados")
+
+
+if __name__ == "__main__":
+    main()
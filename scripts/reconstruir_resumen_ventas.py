@@ -0,0 +1,40 @@
+"""
+Reconstruir el acumulado diario de ventas (ResumenVentaDia) desde Venta y Pago.
+
+Uso:
+    python scripts/reconstruir_resumen_ventas.py                      # todo el histórico
+    python scripts/reconstruir_resumen_ventas.py --desde 2025-01-01 --hasta 2025-02-01
+
+El rango es semiabierto [desde, hasta). Usa la base configurada en .env. Es paso de
+despliegue la primera vez que se instala el acumulado (después de
+scripts/migrar_esquema.py y antes de levantar los workers; la app no lo llena sola), y
+útil después de corregir ventas o pagos directamente en la base de datos.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlmodel import Session
+
+from app.db.session import engine, init_db
+from app.api.refactors.resumenRefactor import reconstruir_resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--desde", type=date.fromisoformat, default=None, help="Primer día (YYYY-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, default=None, help="Día siguiente al último (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    init_db()
+    with Session(engine) as session:
+        filas = reconstruir_resumen(session, args.desde, args.hasta)
+        session.commit()
+    print(f"Acumulado reconstruido: {filas} filas")
+
+
+if __name__ == "__main__":
+    main()